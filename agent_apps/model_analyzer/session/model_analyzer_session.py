@@ -1,11 +1,78 @@
+import asyncio
+import hashlib
+import os
 import pickle
+import time
 from threading import Lock
-import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from agent_apps.model_analyzer.utils.shap_plot_generator import SHAPPlotGenerator
+import structlog
+
+from app.cache.distributed_lock import DistributedLock
+from app.cache.memoized_session_cache import MemoizedSessionCache
 from app.cache.session_cache_manager import SessionCacheManager
+from app.core.worker_pool import WorkerPool, WorkerPoolFullError
 from app.storage.object_reader import ObjectReader
 
+logger = structlog.get_logger(__name__)
+
+# Bump when the cached session layout or SHAP computation changes so that
+# content-addressed session ids stop matching artifacts built the old way.
+SESSION_FORMAT_VERSION = "4"
+
+# A build lock expires this long after its holder stops extending it (e.g. the pod died)
+SESSION_BUILD_LOCK_TTL_SECONDS = float(os.getenv("SESSION_BUILD_LOCK_TTL_SECONDS", 60))
+# How often a caller waiting on another worker's build checks the cache
+SESSION_BUILD_POLL_SECONDS = float(os.getenv("SESSION_BUILD_POLL_SECONDS", 1))
+
+
+def build_session_artifacts(model_bytes: bytes) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Unpickles a model bundle and computes its SHAP values.
+
+    This is the CPU-bound part of session creation. It is a module-level function over
+    plain bytes so that it can run in a worker process (see WorkerPool.run_cpu).
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, float]]: The session artifacts keyed by datatype
+        and the seconds spent unpickling and computing SHAP values.
+    """
+    # Imported here rather than at module level: shap takes seconds to import
+    import numpy as np
+    from agent_apps.model_analyzer.utils.shap_plot_generator import SHAPPlotGenerator
+
+    timings = {}
+    started = time.perf_counter()
+    model_data = pickle.loads(model_bytes)
+    timings["unpickle"] = time.perf_counter() - started
+
+    model = model_data["model"]
+    X_test = model_data["X_test"]
+    y_test = model_data["y_test"]
+    X_test_transformed = model_data.get("X_test_transformed", X_test)
+
+    started = time.perf_counter()
+    shap_generator = SHAPPlotGenerator(model=model, X_test=X_test_transformed, output_dir="shap_outputs")
+    shap_generator.calculate_shap_values()
+    timings["shap"] = time.perf_counter() - started
+
+    shap_values = shap_generator.shap_values
+    if isinstance(shap_values, np.ndarray):
+        # The class slice is a strided view; a contiguous copy can be stored raw and
+        # memory-mapped by the session cache
+        shap_values = np.ascontiguousarray(shap_values)
+
+    artifacts = {
+        "model": model,
+        "features": X_test_transformed.columns.tolist(),
+        "X_test": X_test,
+        "y_test": y_test,
+        "X_test_transformed": X_test_transformed,
+        "shap": shap_values,
+    }
+    return artifacts, timings
+
+
 class ModelAnalyzerSession:
     _instance = None
     _lock = Lock()
@@ -28,43 +95,222 @@ class ModelAnalyzerSession:
             raise RuntimeError("ModelAnalyzerSession is not initialized. Call with memory_manager first.")
         return cls._instance
 
+    def scoped(self) -> "ModelAnalyzerSession":
+        """
+        Returns a view of this session whose loads are memoized, for a group of agent runs
+        (e.g. a batch of queries) reading the same session artifacts. Loaded objects are
+        shared between those runs and must be treated as read-only.
+        """
+        view = object.__new__(ModelAnalyzerSession)
+        view._init(MemoizedSessionCache(self.session_cache))
+        return view
+
+    @staticmethod
+    def session_id_for(reader: ObjectReader) -> str:
+        """
+        Derives a content-addressed session ID from the identity of the model object,
+        so repeated requests for the same model resolve to the same cached session.
+        """
+        identity = f"{SESSION_FORMAT_VERSION}:{reader.identity()}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+    def has_session(self, session_id: str) -> bool:
+        return self.session_cache.exists(session_id, "shap")
+
+    async def ahas_session(self, session_id: str) -> bool:
+        return await self.session_cache.aexists(session_id, "shap")
+
+    @staticmethod
+    def _download(reader: ObjectReader) -> bytes:
+        with reader.read() as f:
+            return f.read()
+
+    def _persist(self, session_id: str, artifacts: Dict[str, Any]) -> None:
+        # Written as one bundle where the cache supports it (X_test_transformed is often
+        # X_test itself and is then stored once). "shap" marks the session as complete
+        # (see has_session), so it comes last for caches that save one datatype at a time.
+        self.session_cache.save_many(session_id, self._session_items(artifacts))
+
+    async def _apersist(self, session_id: str, artifacts: Dict[str, Any]) -> None:
+        await self.session_cache.asave_many(session_id, self._session_items(artifacts))
+
+    @staticmethod
+    def _session_items(artifacts: Dict[str, Any]) -> Dict[str, Any]:
+        datatypes = ("model", "features", "X_test", "y_test", "X_test_transformed", "shap")
+        return {datatype: artifacts[datatype] for datatype in datatypes}
+
     def create_session(self, reader: ObjectReader, session_id: str = None) -> str:
         """
         Creates a session by reading a model via the ObjectReader, computing SHAP values,
         and caching the results.
 
+        This blocks the calling thread for the whole build; code running on the event
+        loop should use `acreate_session` instead.
+
         Args:
             reader (ObjectReader): Source to load model pickle.
-            session_id (str, optional): Unique session ID. If None, one will be generated.
+            session_id (str, optional): Session ID to use. If None, it is derived from the
+                identity of the model object, so an already analysed model is not recomputed.
 
         Returns:
             str: The session ID used.
         """
-        session_id = session_id or str(uuid.uuid4())
+        session_id = session_id or self.session_id_for(reader)
 
-        if self.session_cache.exists(session_id, "shap"):
+        if self.has_session(session_id):
             return session_id  # Session already cached
 
-        with reader.read() as f:
-            model_data = pickle.load(f)
+        artifacts, _ = build_session_artifacts(self._download(reader))
+        self._persist(session_id, artifacts)
 
-        model = model_data["model"]
-        X_test = model_data["X_test"]
-        y_test = model_data["y_test"]
-        X_test_transformed = model_data.get("X_test_transformed", X_test)
+        return session_id
 
-        shap_generator = SHAPPlotGenerator(model=model, X_test=X_test_transformed, output_dir="shap_outputs")
-        shap_generator.calculate_shap_values()
+    async def acreate_session(self, reader: ObjectReader, session_id: str = None,
+                              on_phase: Optional[Callable[[str, Dict[str, float]], None]] = None) -> str:
+        """
+        Async variant of `create_session` that keeps the event loop free: the download
+        and cache writes run in the I/O pool, unpickling and SHAP in the CPU pool.
 
-        self.session_cache.save(session_id, "model", model)
-        self.session_cache.save(session_id, "features", X_test_transformed.columns.tolist())
-        self.session_cache.save(session_id, "shap", shap_generator.shap_values)
-        self.session_cache.save(session_id, "X_test", X_test)
-        self.session_cache.save(session_id, "y_test", y_test)
-        self.session_cache.save(session_id, "X_test_transformed", X_test_transformed)
+        The build holds the session cache's lock (see SessionCacheManager.get_lock), so a
+        session is built once across every worker and pod sharing the cache: a caller that
+        finds the lock taken waits for the other build to land in the cache instead.
 
+        Args:
+            reader (ObjectReader): Source to load model pickle.
+            session_id (str, optional): Session ID to use, derived from the model identity if None.
+            on_phase (Callable, optional): Called with the phase name ("wait", "download",
+                "build", "persist") as each phase starts, and with the timings recorded so
+                far. The timings dict is updated in place and holds seconds per phase
+                (wait, download, unpickle, shap, persist) once the session is created.
+
+        Raises:
+            WorkerPoolFullError: If the worker pools are saturated.
+        """
+        pool = WorkerPool.get_instance()
+        session_id = session_id or await pool.run_io(self.session_id_for, reader)
+
+        if await self.ahas_session(session_id):
+            return session_id  # Session already cached
+
+        timings: Dict[str, float] = {}
+        lock = self.session_cache.get_lock()
+        lock_name = self._build_lock_name(session_id)
+
+        token = await pool.run_io(lock.acquire, lock_name, SESSION_BUILD_LOCK_TTL_SECONDS)
+        if token is None:
+            # Another worker or pod is building this session: wait for its result
+            if on_phase is not None:
+                on_phase("wait", timings)
+            started = time.perf_counter()
+            while token is None:
+                await asyncio.sleep(SESSION_BUILD_POLL_SECONDS)
+                if await self.ahas_session(session_id):
+                    logger.info("Session built by another worker", session_id=session_id,
+                                wait_seconds=round(time.perf_counter() - started, 3))
+                    timings["wait"] = time.perf_counter() - started
+                    return session_id
+                # The lock frees up without a session if the other build failed or its holder died
+                token = await pool.run_io(lock.acquire, lock_name, SESSION_BUILD_LOCK_TTL_SECONDS)
+            timings["wait"] = time.perf_counter() - started
+
+        keepalive = asyncio.create_task(self._keep_lock(lock, lock_name, token))
+        try:
+            if not await self.ahas_session(session_id):
+                await self._abuild(reader, session_id, timings, on_phase)
+        finally:
+            keepalive.cancel()
+            # Shielded so the release still completes if this task is cancelled meanwhile
+            await asyncio.shield(self._release_lock(lock, lock_name, token))
         return session_id
 
+    async def await_shared_build(self, session_id: str, timeout: float) -> bool:
+        """
+        Waits for a build of the session by any worker or pod sharing the cache, as seen
+        through its build lock, so a caller can wait on a build it did not submit.
+
+        Returns:
+            bool: True once the session is cached, False if no build of it is running.
+
+        Raises:
+            TimeoutError: If the build is still running after `timeout` seconds.
+            WorkerPoolFullError: If the I/O pool is saturated.
+        """
+        pool = WorkerPool.get_instance()
+        lock = self.session_cache.get_lock()
+        deadline = time.monotonic() + timeout
+        while await pool.run_io(lock.is_held, self._build_lock_name(session_id)):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Session {session_id} is still being built")
+            await asyncio.sleep(SESSION_BUILD_POLL_SECONDS)
+            if await self.ahas_session(session_id):
+                return True
+        # The build may have landed just before the lock was released
+        return await self.ahas_session(session_id)
+
+    @staticmethod
+    def _build_lock_name(session_id: str) -> str:
+        return f"session_build_{session_id}"
+
+    async def _abuild(self, reader: ObjectReader, session_id: str, timings: Dict[str, float],
+                      on_phase: Optional[Callable[[str, Dict[str, float]], None]]) -> None:
+        pool = WorkerPool.get_instance()
+
+        def start(phase: str) -> float:
+            if on_phase is not None:
+                on_phase(phase, timings)
+            return time.perf_counter()
+
+        started = start("download")
+        model_bytes = await pool.run_io(self._download, reader)
+        timings["download"] = time.perf_counter() - started
+
+        start("build")
+        artifacts, build_timings = await pool.run_cpu(build_session_artifacts, model_bytes)
+        del model_bytes
+        timings.update(build_timings)
+
+        started = start("persist")
+        await self._apersist(session_id, artifacts)
+        timings["persist"] = time.perf_counter() - started
+
+        logger.info("Session created", session_id=session_id,
+                    **{f"{phase}_seconds": round(seconds, 3) for phase, seconds in timings.items()})
+
+    @staticmethod
+    async def _release_lock(lock: DistributedLock, lock_name: str, token: str) -> None:
+        try:
+            await WorkerPool.get_instance().run_io(lock.release, lock_name, token)
+        except WorkerPoolFullError:
+            # Not left to expire: a file lock is only freed by its release
+            await asyncio.get_running_loop().run_in_executor(None, lock.release, lock_name, token)
+
+    @staticmethod
+    async def _keep_lock(lock: DistributedLock, lock_name: str, token: str) -> None:
+        """Extends the build lock while a build runs, so a long build does not lose it to its TTL."""
+        while True:
+            await asyncio.sleep(SESSION_BUILD_LOCK_TTL_SECONDS / 3)
+            try:
+                if not await WorkerPool.get_instance().run_io(lock.extend, lock_name, token, SESSION_BUILD_LOCK_TTL_SECONDS):
+                    logger.warning("Session build lock lost", lock=lock_name)
+                    return
+            except Exception as e:
+                logger.warning("Could not extend session build lock", lock=lock_name, error=str(e))
+
+    def load_artifacts(self, session_id: str, *datatypes: str) -> Tuple[Any, ...]:
+        """
+        Loads several artifacts of a session in one cache round trip.
+
+        Returns:
+            Tuple[Any, ...]: The artifacts, in the order of `datatypes`.
+        """
+        loaded = self.session_cache.load_many(session_id, datatypes)
+        return tuple(loaded[datatype] for datatype in datatypes)
+
+    async def aload_artifacts(self, session_id: str, *datatypes: str) -> Tuple[Any, ...]:
+        """Async variant of `load_artifacts`, for tools running on the event loop."""
+        loaded = await self.session_cache.aload_many(session_id, datatypes)
+        return tuple(loaded[datatype] for datatype in datatypes)
+
     def get_y_test(self, session_id: str):
         return self.session_cache.load(session_id, "y_test")
     
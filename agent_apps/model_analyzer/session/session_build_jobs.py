@@ -0,0 +1,242 @@
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Dict, Literal, Optional, Set
+
+import structlog
+
+from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
+from app.cache.session_cache_manager import SessionCacheManager
+from app.storage.object_reader import ObjectReader
+
+logger = structlog.get_logger(__name__)
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+# Job records are stored in the session cache under (job id, JOB_DATATYPE)
+JOB_DATATYPE = "session_build_job"
+
+
+class SessionBuildPendingError(Exception):
+    """Raised when a session is still being built after the caller's wait budget."""
+
+    def __init__(self, job: "SessionBuildJob"):
+        super().__init__(f"Session {job.session_id} is still being built (job {job.job_id})")
+        self.job = job
+
+
+class SessionBuildFailedError(Exception):
+    """Raised when waiting on a session build that failed."""
+
+    def __init__(self, job: "SessionBuildJob"):
+        super().__init__(f"Session build {job.job_id} failed: {job.error}")
+        self.job = job
+
+
+@dataclass
+class SessionBuildJob:
+    job_id: str
+    session_id: str
+    status: JobStatus = "queued"
+    phase: Optional[str] = None
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    exception: Optional[BaseException] = field(default=None, repr=False)
+    # Serializes the writes of the job record, so the last one written is the latest state
+    record_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    @property
+    def in_flight(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "phase": self.phase,
+            "error": self.error,
+            "timings": {phase: round(seconds, 3) for phase, seconds in self.timings.items()},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class SessionBuildJobManager:
+    """
+    Runs session builds as background jobs on the event loop of the API process.
+
+    A session id has at most one build in flight: submitting a model whose session is
+    already being built returns the existing job, and `wait_for_session` lets agent
+    queries wait on that build instead of starting another one.
+
+    The job runs in the worker that accepted it, but its record (status, phase, timings,
+    error) is written to the shared session cache backend on every change, so any
+    worker or pod can answer `get_job_record`. Records expire SESSION_JOB_TTL_SECONDS
+    after their last update; finished jobs are dropped from memory after as long.
+
+    Configuration (environment):
+        SESSION_JOB_MAX_RUNNING: Builds running at once; further jobs stay queued (default 4).
+        SESSION_JOB_TTL_SECONDS: How long job records remain queryable (default 3600).
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    @classmethod
+    def get_instance(cls) -> "SessionBuildJobManager":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    obj = super().__new__(cls)
+                    obj._initialize()
+                    cls._instance = obj
+        return cls._instance
+
+    def _initialize(self, store: Optional[SessionCacheManager] = None):
+        self.max_running = int(os.getenv("SESSION_JOB_MAX_RUNNING", 4))
+        self.job_ttl = float(os.getenv("SESSION_JOB_TTL_SECONDS", 3600))
+        # The backend itself: a near cache would keep serving another pod's stale record
+        self._store = store
+        self._record_writes: Set[asyncio.Task] = set()
+        self._jobs: Dict[str, SessionBuildJob] = {}
+        self._in_flight: Dict[str, SessionBuildJob] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def store(self) -> SessionCacheManager:
+        if self._store is None:
+            from app.cache.session_cache_factory import SessionCacheFactory
+
+            self._store = SessionCacheFactory.get_backend()
+        return self._store
+
+    async def submit(self, session: ModelAnalyzerSession, reader: ObjectReader, session_id: str) -> SessionBuildJob:
+        """
+        Schedules a build of `session_id` from `reader`, or returns the job already building it.
+        The job's record is stored before this returns, so it can be polled right away.
+        """
+        self._prune()
+        job = self._in_flight.get(session_id)
+        if job is not None:
+            return job
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_running)
+
+        job = SessionBuildJob(job_id=uuid.uuid4().hex, session_id=session_id)
+        self._jobs[job.job_id] = job
+        self._in_flight[session_id] = job
+        job.task = asyncio.create_task(self._run(job, session, reader))
+        logger.info("Session build queued", job_id=job.job_id, session_id=session_id)
+        await self._save_record(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[SessionBuildJob]:
+        """A job accepted by this worker."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def get_job_record(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The record of a job accepted by any worker (see SessionBuildJob.to_dict), or None."""
+        job = self.get_job(job_id)
+        if job is not None:
+            return job.to_dict()
+        try:
+            record = await self.store.aload(job_id, JOB_DATATYPE)
+        except FileNotFoundError:
+            return None
+        if record is None or record.pop("expires_at", 0) < time.time():
+            # Backends without per-entry expiry keep the record until their eviction
+            return None
+        return record
+
+    def get_in_flight(self, session_id: str) -> Optional[SessionBuildJob]:
+        return self._in_flight.get(session_id)
+
+    async def wait(self, job: SessionBuildJob, timeout: Optional[float] = None) -> str:
+        """
+        Waits for a job to finish and returns its session id.
+
+        Raises:
+            SessionBuildPendingError: If the job is still in flight after `timeout` seconds.
+            SessionBuildFailedError: If the build failed.
+        """
+        if job.in_flight:
+            try:
+                # shield: a caller giving up must not cancel a build other callers wait on
+                await asyncio.wait_for(asyncio.shield(job.task), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise SessionBuildPendingError(job)
+        if job.status == "failed":
+            raise SessionBuildFailedError(job) from job.exception
+        return job.session_id
+
+    async def wait_for_session(self, session_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Waits on the in-flight build of `session_id`, if any.
+
+        Returns:
+            bool: True if a build was awaited and completed, False if none was in flight.
+        """
+        job = self._in_flight.get(session_id)
+        if job is None:
+            return False
+        await self.wait(job, timeout)
+        return True
+
+    async def _run(self, job: SessionBuildJob, session: ModelAnalyzerSession, reader: ObjectReader) -> None:
+        def on_phase(phase: str, timings: Dict[str, float]) -> None:
+            job.phase = phase
+            job.timings = timings
+            # Called on the event loop, from code that cannot await it; referenced until done
+            write = asyncio.create_task(self._save_record(job))
+            self._record_writes.add(write)
+            write.add_done_callback(self._record_writes.discard)
+
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = time.time()
+                await self._save_record(job)
+                await session.acreate_session(reader, job.session_id, on_phase=on_phase)
+            job.status = "done"
+            logger.info("Session build finished", job_id=job.job_id, session_id=job.session_id, timings=job.timings)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.exception = e
+            logger.exception("Session build failed", job_id=job.job_id, session_id=job.session_id, error=str(e))
+        finally:
+            if job.in_flight:  # cancelled, e.g. on shutdown
+                job.status = "failed"
+                job.error = "Session build was cancelled"
+            job.phase = None
+            job.finished_at = time.time()
+            self._in_flight.pop(job.session_id, None)
+            await self._save_record(job)
+
+    async def _save_record(self, job: SessionBuildJob) -> None:
+        async with job.record_lock:
+            # Taken under the lock, so a write never replaces a newer state with an older one
+            record = {**job.to_dict(), "expires_at": time.time() + self.job_ttl}
+            try:
+                await self.store.asave(job.job_id, JOB_DATATYPE, record, ttl=int(self.job_ttl))
+            except Exception as e:
+                # The build goes on; only other workers lose sight of it
+                logger.warning("Could not store session build job record", job_id=job.job_id, error=str(e))
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
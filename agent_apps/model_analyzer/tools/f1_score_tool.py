@@ -1,5 +1,4 @@
 
-from sklearn.metrics import f1_score
 from llama_index.core.workflow.context import Context
 
 from llama_index.core.tools import FunctionTool
@@ -25,9 +24,9 @@ async def get_f1_score(ctx: Context) -> str:
 
     analyzer_session:ModelAnalyzerSession = await ctx.get("model_analyzer_session")
     session_id:str = await ctx.get("session_id")
-    X_test = analyzer_session.get_X_test(session_id)
-    y_test = analyzer_session.get_y_test(session_id)
-    model = analyzer_session.get_model(session_id) 
+    X_test, y_test, model = await analyzer_session.aload_artifacts(session_id, "X_test", "y_test", "model")
+    from sklearn.metrics import f1_score  # imported on first use, sklearn is slow to import
+
     y_pred = model.predict(X_test)
     return round(f1_score(y_test, y_pred), 4)
     
@@ -16,7 +16,7 @@ async def create_model_analyzer_session_from_pickle(ctx: Context,file_path: str)
     - Use FileObjectReader for local `.pkl` files
     - Use S3ObjectReader for `s3://` URIs
 
-    It initializes a ModelAnalyzerSession using JoblibSessionCache and returns a unique session ID.
+    It initializes a ModelAnalyzerSession on the configured session cache and returns a unique session ID.
 
     Args:
         file_path (str): Path to the pickle file. Supported formats:
@@ -43,6 +43,6 @@ async def create_model_analyzer_session_from_pickle(ctx: Context,file_path: str)
 
     session_cache = SessionCacheFactory.get_cache_manager()
     session = ModelAnalyzerSession(session_cache)
-    session_id = session.create_session(reader)
+    session_id = await session.acreate_session(reader)
     await ctx.set("session_id",session_id)
     return session_id
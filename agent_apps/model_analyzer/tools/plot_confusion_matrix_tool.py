@@ -1,9 +1,5 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import confusion_matrix
 from llama_index.core.workflow.context import Context
 from io import BytesIO
-import base64
 from llama_index.core.tools import FunctionTool
 
 
@@ -11,21 +7,19 @@ from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyz
 
 from agent_apps.model_analyzer.tools.tool_names import ModelAnalyzerToolName
 from app.models.agent_models import ToolResultOutput
+from app.storage.artifact_store import ArtifactStore
 
 async def plot_confusion_matrix_image(ctx: Context) -> ToolResultOutput:
     """
-    Generate a base64-encoded PNG image of the model's confusion matrix.
+    Generate a PNG image of the model's confusion matrix, stored as a session artifact.
 
     This tool is useful for visually interpreting model performance by comparing 
     predicted vs actual labels. The output can be embedded into dashboards or 
     consumed by downstream GenAI agents.
 
     Returns:
-        str: Base64-encoded string of the confusion matrix image in PNG format.
-    
-    Example:
-        >>> base64_img = plot_confusion_matrix_base64()
-        >>> # Use in HTML: <img src="data:image/png;base64,{base64_img}" />
+        ToolResultOutput: A STORAGEARTIFACT result whose `output_ref` references the PNG image,
+        served by GET /modelquery/artifacts/{session_id}/{output_ref}.
     
     Tool Tags:
         - explainability
@@ -34,13 +28,16 @@ async def plot_confusion_matrix_image(ctx: Context) -> ToolResultOutput:
     analyzer_session:ModelAnalyzerSession = await ctx.get("model_analyzer_session")
     session_id:str = await ctx.get("session_id")
     conversation_id:str = await ctx.get("conversation_id")
-    X_test = analyzer_session.get_X_test(session_id)
-    y_test = analyzer_session.get_y_test(session_id)
-    model = analyzer_session.get_model(session_id) 
+    X_test, y_test, model = await analyzer_session.aload_artifacts(session_id, "X_test", "y_test", "model")
     
     if model is None or X_test is None or y_test is None:
         raise ValueError("Model and test data must be trained/preprocessed first.")
 
+    # Imported on first use: pyplot, seaborn and sklearn add seconds to application startup
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.metrics import confusion_matrix
+
     y_pred = model.predict(X_test)
     cm = confusion_matrix(y_test, y_pred)
 
@@ -58,9 +55,9 @@ async def plot_confusion_matrix_image(ctx: Context) -> ToolResultOutput:
     plt.close()
     buffer.seek(0)
 
-    img_base64 = base64.b64encode(buffer.read()).decode("utf-8")
+    output_ref = await ArtifactStore(analyzer_session.session_cache).aput(session_id, buffer.getvalue(), media_type="image/png")
     tool_result = ToolResultOutput(tool_name=ModelAnalyzerToolName.SHAP_SUMMARY_PLOT,
-        conversation_id=conversation_id, content_type="BASE64IMAGE", content=img_base64, session_id=session_id)
+        conversation_id=conversation_id, content_type="STORAGEARTIFACT", content=None, output_ref=output_ref, session_id=session_id)
     return tool_result
 
 
@@ -1,6 +1,5 @@
 from typing import List, Dict, Any, Optional
 import uuid
-import pandas as pd
 from llama_index.core.workflow.context import Context
 
 from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
@@ -34,8 +33,9 @@ async def shap_feature_importance_data(ctx: Context,
     analyzer_session:ModelAnalyzerSession = await ctx.get("model_analyzer_session")
     session_id:str = await ctx.get("session_id")
     conversation_id:str = await ctx.get("conversation_id")
-    shap_values = analyzer_session.get_shap_values(session_id)
-    feature_names = analyzer_session.get_features(session_id)
+    shap_values, feature_names = await analyzer_session.aload_artifacts(session_id, "shap", "features")
+
+    import pandas as pd  # imported on first use
 
     # Compute global feature importance
     shap_importance_df = pd.DataFrame({
@@ -6,7 +6,7 @@ from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyz
 from agent_apps.model_analyzer.tools.tool_names import ModelAnalyzerToolName
 from app.llms.llm_manager import LLMManager  # You can replace with your preferred LLM
 
-def generate_shap_insight_narrative(
+async def generate_shap_insight_narrative(
     session_id: str,
     feature_num: int
 ) -> str:
@@ -22,8 +22,7 @@ def generate_shap_insight_narrative(
     """
     llm = LLMManager.get_llm(model_name="40-mini")
     analyzer_session = ModelAnalyzerSession.get_instance()
-    shap_values = analyzer_session.get_shap_values(session_id)               
-    feature_names = analyzer_session.get_features(session_id)
+    shap_values, feature_names = await analyzer_session.aload_artifacts(session_id, "shap", "features")
 
     mean_abs = np.abs(shap_values).mean(axis=0)
     top_indices = np.argsort(mean_abs)[::-1][:feature_num]
@@ -96,7 +95,7 @@ def generate_shap_insight_narrative(
         """
 
 
-    return llm.complete(prompt).text
+    return (await llm.acomplete(prompt)).text
 
 
 shap_insight_narrative_tool = FunctionTool.from_defaults(
@@ -1,9 +1,6 @@
-import base64
 import io
 from typing import Optional
 from pydantic import BaseModel, Field
-import shap
-import matplotlib.pyplot as plt
 import numpy as np
 from llama_index.core.workflow.context import Context
 from llama_index.core.tools import FunctionTool
@@ -12,6 +9,7 @@ from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyz
 from agent_apps.model_analyzer.tools.tool_names import ModelAnalyzerToolName
 from app.llms.llm_manager import LLMManager
 from app.models.agent_models import ToolResultOutput  # You can replace with your preferred LLM
+from app.storage.artifact_store import ArtifactStore
 
 
 
@@ -20,11 +18,11 @@ async def generate_shap_summary_plot_image(
     feature_num: Optional[int] = None
 ) -> ToolResultOutput:
     """
-    Generate a SHAP summary plot image as a base64-encoded string or all or top N features.
+    Generate a SHAP summary plot image for all or top N features.
 
     This function retrieves the model analysis session using the provided session ID,
     generates a summary plot of the SHAP values (for all or top N features),
-    and returns it as a base64-encoded PNG image
+    and stores it as a PNG artifact of the session.
 
 
     Args:
@@ -32,7 +30,7 @@ async def generate_shap_summary_plot_image(
         feature_num (int): Number of  features to include in the insights.
         
     Returns:
-        str: A base64-encoded PNG image string representing the SHAP summary plot.
+        ToolResultOutput: A STORAGEARTIFACT result whose `output_ref` references the PNG image.
 
     Raises:
         ValueError: If the session cannot be found or required SHAP data is missing.
@@ -42,8 +40,7 @@ async def generate_shap_summary_plot_image(
     analyzer_session:ModelAnalyzerSession = await ctx.get("model_analyzer_session")
     session_id:str = await ctx.get("session_id")
     conversation_id:str = await ctx.get("conversation_id")
-    shap_values = analyzer_session.get_shap_values(session_id)
-    X = analyzer_session.get_X_test_transformed(session_id)
+    shap_values, X = await analyzer_session.aload_artifacts(session_id, "shap", "X_test_transformed")
 
     if not analyzer_session or shap_values is None or X is None:
         raise ValueError(f"Missing analyzer_session or required SHAP data for session_id: {session_id}")
@@ -54,6 +51,10 @@ async def generate_shap_summary_plot_image(
         shap_values = shap_values[:, top_indices]
         X = X.iloc[:, top_indices]
     
+    # Imported on first use: shap and pyplot add seconds to application startup
+    import matplotlib.pyplot as plt
+    import shap
+
     plt.figure()
     shap.summary_plot(shap_values, X, show=False)
 
@@ -62,9 +63,9 @@ async def generate_shap_summary_plot_image(
     plt.close()
     buffer.seek(0)
 
-    encoded_image = base64.b64encode(buffer.read()).decode("utf-8")
+    output_ref = await ArtifactStore(analyzer_session.session_cache).aput(session_id, buffer.getvalue(), media_type="image/png")
     tool_result = ToolResultOutput(tool_name=ModelAnalyzerToolName.SHAP_SUMMARY_PLOT,
-        conversation_id=conversation_id, content_type="BASE64IMAGE", content=encoded_image, session_id=session_id)
+        conversation_id=conversation_id, content_type="STORAGEARTIFACT", content=None, output_ref=output_ref, session_id=session_id)
     return tool_result
 
 async def generate_shap_summary_plot_image_text(response :  ToolResultOutput | None):
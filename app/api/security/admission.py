@@ -0,0 +1,22 @@
+import structlog
+from fastapi import Depends, HTTPException, Request, status
+
+from app.api.security.api_key import get_api_key
+from app.core.admission_controller import AdmissionController, AdmissionRejectedError
+
+logger = structlog.get_logger(__name__)
+
+
+async def admit_agent_run(request: Request, api_key: str = Depends(get_api_key)):
+    """
+    Dependency that holds an agent slot (see AdmissionController) for the whole request,
+    including the body of streaming responses, and answers 429 when none is available.
+    """
+    try:
+        async with AdmissionController.get_instance().admit(api_key) as queue_time:
+            if queue_time > 0.1:
+                logger.info("Agent request admitted after queueing", path=request.url.path, queue_seconds=round(queue_time, 3))
+            yield api_key
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)})
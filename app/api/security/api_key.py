@@ -1,5 +1,7 @@
+from typing import Optional
+
 from app.core.config import settings
-from fastapi import FastAPI, Depends, HTTPException, Header
+from fastapi import FastAPI, Depends, HTTPException, Header, WebSocket, WebSocketException, status
 from fastapi.security import APIKeyHeader
 
 app = FastAPI()
@@ -8,7 +10,31 @@ app = FastAPI()
 API_KEY = settings.AI_AGENT_API_KEY
 
 api_key_header = APIKeyHeader(name="X-Api-Key", auto_error= False)
+# Browsers cannot set headers on a WebSocket, so they send the key as a subprotocol:
+# new WebSocket(url, ["api-key." + key])
+WEBSOCKET_API_KEY_PROTOCOL_PREFIX = "api-key."
+
 async def get_api_key(api_key: str = Depends(api_key_header)):
     if api_key != API_KEY:
         raise HTTPException(status_code=403, detail="Invalid API Key")
-    return api_key
\ No newline at end of file
+    return api_key
+
+def websocket_api_key_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """The `api-key.<key>` subprotocol the client offered, which `accept` must echo back."""
+    for protocol in websocket.scope.get("subprotocols", []):
+        if protocol.startswith(WEBSOCKET_API_KEY_PROTOCOL_PREFIX):
+            return protocol
+    return None
+
+async def get_websocket_api_key(websocket: WebSocket):
+    """
+    API key check for WebSocket routes: the `X-Api-Key` header, or an `api-key.<key>`
+    subprotocol for browsers. Never read from the URL, which ends up in access logs.
+    """
+    api_key = websocket.headers.get("X-Api-Key")
+    protocol = websocket_api_key_subprotocol(websocket)
+    if api_key is None and protocol is not None:
+        api_key = protocol[len(WEBSOCKET_API_KEY_PROTOCOL_PREFIX):]
+    if api_key != API_KEY:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid API Key")
+    return api_key
@@ -0,0 +1,40 @@
+import uuid
+
+import structlog
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.core.warmup import StartupWarmup
+from app.utils.success_wrapper import SuccessResponse
+
+logger = structlog.get_logger(__name__)
+
+# Probe endpoints: no API key, so the orchestrator can call them
+health_router = APIRouter()
+
+READINESS_RETRY_AFTER_SECONDS = "5"
+
+
+@health_router.get('/live')
+async def liveness(request:Request):
+    """The process is up and serving requests (it may still be warming up)."""
+    request_id = (
+        request.headers.get('request_id')
+        or request.headers.get('x-request-id')
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    return SuccessResponse.ok(request_id = request_id, data = {"status": "alive"})
+
+
+@health_router.get('/ready')
+async def readiness(request:Request):
+    """200 once the startup warm-up has finished, 503 while it runs (or after it failed in strict mode)."""
+    request_id = (
+        request.headers.get('request_id')
+        or request.headers.get('x-request-id')
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    warmup = StartupWarmup.get_instance()
+    if not warmup.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f'Not ready: warm-up {warmup.status}',
+                            headers={"Retry-After": READINESS_RETRY_AFTER_SECONDS})
+    return SuccessResponse.ok(request_id = request_id, data = warmup.snapshot())
@@ -1,25 +1,38 @@
 import structlog
 
 from app.core.utils.agent_result_utils import AgentResultUtils
+from app.models.agent_models import SavantAgentOutput
+from app.core.utils.agent_event_stream import AgentEventStream
 logger = structlog.get_logger(__name__)
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import Response, StreamingResponse
 # from fastapi
 
-from pydantic import BaseModel
-from app.api.security.api_key import get_api_key
-from app.core.workflows.model_performance_analysis_workflow import ModelPerformanceWorkflow
-from typing import List,Literal,Optional
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, model_validator
+from app.api.security.api_key import get_api_key, get_websocket_api_key, websocket_api_key_subprotocol
+from app.api.security.admission import admit_agent_run
+from app.core.admission_controller import AdmissionController, AdmissionRejectedError
+from typing import Annotated,List,Literal,Optional,Tuple,Union
 from llama_index.core.llms import ChatMessage
 from app.storage.file_object_reader import FileObjectReader
 from app.storage.s3_object_reader import S3ObjectReader
-from app.cache.joblib_session_cache import JoblibSessionCache
+from app.storage.artifact_store import ArtifactStore
+from app.storage.conversation_store import CONVERSATION_ID_PATTERN, ConversationStore
+from app.cache.session_cache_factory import SessionCacheFactory
 from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
+from agent_apps.model_analyzer.session.session_build_jobs import (
+    SessionBuildFailedError,
+    SessionBuildJobManager,
+    SessionBuildPendingError,
+)
 from app.llms.llm_manager import LLMManager
 from app.core.agent.kernel.workflow_agent.function_agent import FunctionAgent
 from agent_apps.model_analyzer.tools.shap_insight_narrative_tool import shap_insight_narrative_tool
 from agent_apps.model_analyzer.tools.shap_summary_plot_tool import shap_summary_plot_image_tool
 from agent_apps.model_analyzer.agent.ds_model_agents import PharmaModelAnalyzerAgent
+from app.core.agent.savant_agent_pool import SavantAgentPool
+from app.core.agent.agent_conversation import AgentConversation
 from llama_index.core.workflow.context import Context
 from llama_index.core.agent.workflow.workflow_events import (
     AgentOutput,
@@ -32,6 +45,10 @@ from app.utils.success_wrapper import SuccessResponse
 from app.utils.error_wrapper import ErrorResponse
 from app.core.config import settings
 from app.core.s3_client import get_s3_client
+from app.core.worker_pool import WorkerPool, WorkerPoolFullError
+from app.core.warmup import StartupWarmup
+import asyncio
+import os
 import uuid
 import dataclasses
 from typing import Literal, Any
@@ -39,62 +56,237 @@ from typing import Literal, Any
 
 router = APIRouter()
 
-class ModelPerformanceRequest(BaseModel):
-    user_query:str
-    file_key:str
-    bucket_name: str
+MODEL_ANALYZER_TOOLS = [shap_summary_plot_image_tool, shap_insight_narrative_tool]
+MODEL_ANALYZER_LLM_ALIAS = "40-mini"
+# Seconds a client should back off when the session worker pools are saturated
+SESSION_RETRY_AFTER_SECONDS = "5"
+# How long a query waits on a session that is still being built before answering 409
+SESSION_BUILD_WAIT_SECONDS = float(os.getenv("SESSION_BUILD_WAIT_SECONDS", 60))
+# Artifact references are content hashes, so a response never changes for a given URL
+ARTIFACT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Upper bound on questions per batch request and on agent runs a batch executes at once
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", 20))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 4))
+# A conversation WebSocket with no message (and no turn running) for this long is closed
+AGENT_WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("AGENT_WS_IDLE_TIMEOUT_SECONDS", 600))
+
+class ModelSourceRequest(BaseModel):
+    file_key: Optional[str] = None
+    bucket_name: Optional[str] = None
+    session_id: Optional[str] = None # Reuse an existing analysis session instead of reading the model again
     chat_history: Optional[List[ChatMessage]] = [] # Added chat history. Default is an empty list
 
+    @model_validator(mode="after")
+    def check_model_source(self):
+        if not self.session_id and not (self.file_key and self.bucket_name):
+            raise ValueError("Either session_id or both bucket_name and file_key must be provided")
+        return self
+
+class ModelPerformanceRequest(ModelSourceRequest):
+    user_query:str
+    # Continue a stored conversation: its history is read on the server, send only the new user_query
+    conversation_id: Optional[str] = Field(default=None, pattern=CONVERSATION_ID_PATTERN.pattern)
+
+class BatchQueryRequest(ModelSourceRequest):
+    queries: List[str] = Field(min_length=1, max_length=BATCH_MAX_QUERIES) # Questions answered against the same model session
+
+class ConversationStart(ModelSourceRequest):
+    type: Literal['start']
+    conversation_id: Optional[str] = Field(default=None, pattern=CONVERSATION_ID_PATTERN.pattern)
+
+class ConversationQuery(BaseModel):
+    type: Literal['query']
+    user_query: str
+
+class ConversationCancel(BaseModel):
+    type: Literal['cancel']
+
+# Messages a client sends on the conversation WebSocket
+CONVERSATION_MESSAGE = TypeAdapter(Annotated[Union[ConversationStart, ConversationQuery, ConversationCancel], Field(discriminator="type")])
+
 @dataclasses.dataclass
 class OutputData:
     content_type: Literal['BASE64IMAGE','STORAGEARTIFACT','JSON','STRING','BINARY']
     conv_text: str
     content: Any | None = None
+    session_id: Optional[str] = None
+    conversation_id: Optional[str] = None
 
+@dataclasses.dataclass
+class BatchQueryResult:
+    index: int
+    user_query: str
+    status: Literal['ok','error']
+    output: SavantAgentOutput | None = None
+    error: str | None = None
 
-@router.post('/agent/query')
-async def agent_query(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(get_api_key)):
-    
-    request_id = (
-        request.headers.get('request_id') 
-        or request.headers.get('x-request-id') 
-        or f'{__name__}+{uuid.uuid4()}'
-    )
-    
+
+def _session_workers_busy(request_id: str, e: Exception) -> HTTPException:
+    logger.warning("Session workers saturated", request_id=request_id, error=str(e))
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail = f'Session workers busy: {str(e)}',
+                         headers={"Retry-After": SESSION_RETRY_AFTER_SECONDS})
+
+
+async def _await_shared_build(request_id: str, session: ModelAnalyzerSession, session_id: str) -> bool:
+    """
+    Waits on a build of `session_id` running on another worker (whose job is not known
+    here). Returns whether the session is cached; a build still running is a 409.
+    """
+    try:
+        return await session.await_shared_build(session_id, timeout=SESSION_BUILD_WAIT_SECONDS)
+    except TimeoutError:
+        logger.info("Session build still running on another worker", request_id=request_id, session_id=session_id)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail = f'Session build in progress on another worker (session_id {session_id})',
+                            headers={"Retry-After": SESSION_RETRY_AFTER_SECONDS})
+
+
+async def _resolve_model_session(request_id: str, req: ModelSourceRequest) -> Tuple[ModelAnalyzerSession, str]:
+    """
+    Returns the analyzer session and session id for a request. An explicit `session_id`
+    must already be cached or being built; otherwise the id is derived from the S3 object
+    identity and the session is only built when no cached session exists for that model version.
+
+    A session that is still being built (by this or a concurrent request, or a
+    `POST /session` job, on any worker) is waited on for up to SESSION_BUILD_WAIT_SECONDS,
+    then reported as 409 so the client can poll the build job instead of holding the
+    connection open.
+    """
+    session = ModelAnalyzerSession(SessionCacheFactory.get_cache_manager())
+    pool = WorkerPool.get_instance()
+    jobs = SessionBuildJobManager.get_instance()
+    try:
+      if req.session_id:
+          if not await session.ahas_session(req.session_id):
+              job = jobs.get_in_flight(req.session_id)
+              if job is not None:
+                  await jobs.wait(job, timeout=SESSION_BUILD_WAIT_SECONDS)
+              elif not await _await_shared_build(request_id, session, req.session_id):
+                  raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f'Session not found: {req.session_id}')
+          return session, req.session_id
+
+      try:
+        reader = S3ObjectReader(bucket = req.bucket_name, key=req.file_key, s3_client=get_s3_client())
+        session_id = await pool.run_io(ModelAnalyzerSession.session_id_for, reader)
+      except WorkerPoolFullError:
+          raise
+      except Exception as e:
+          logger.exception("File reading error", request_id=request_id, bucket_name=req.bucket_name, file_key=req.file_key, error=str(e))
+          raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f'File reading error: {str(e)}')
+
+      if not await session.ahas_session(session_id):
+          await jobs.wait(await jobs.submit(session, reader, session_id), timeout=SESSION_BUILD_WAIT_SECONDS)
+      return session, session_id
+    except WorkerPoolFullError as e:
+        raise _session_workers_busy(request_id, e)
+    except SessionBuildPendingError as e:
+        logger.info("Session build still running", request_id=request_id, session_id=e.job.session_id, job_id=e.job.job_id)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail = f'Session build in progress: poll /session/jobs/{e.job.job_id} (session_id {e.job.session_id})',
+                            headers={"Retry-After": SESSION_RETRY_AFTER_SECONDS})
+    except SessionBuildFailedError as e:
+        if isinstance(e.__cause__, WorkerPoolFullError):
+            raise _session_workers_busy(request_id, e)
+        logger.error("Session creation error", request_id=request_id, session_id=e.job.session_id, job_id=e.job.job_id, error=e.job.error)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Session creation error: {e.job.error}')
+
+
+def _get_model_analyzer_kernel(request_id: str) -> ModelAnalyzerKernel:
     try:
-      llm = LLMManager.get_llm(model_name="40-mini")
-      agent = PharmaModelAnalyzerAgent(
-          tools=[shap_summary_plot_image_tool, shap_insight_narrative_tool],
-          llm=llm,
+      return SavantAgentPool.get_instance().get_kernel(
+          PharmaModelAnalyzerAgent,
+          tools=MODEL_ANALYZER_TOOLS,
+          llm_alias=MODEL_ANALYZER_LLM_ALIAS,
+          kernel_cls=ModelAnalyzerKernel,
       )
     except Exception as e:
         logger.exception("LLM or Agent initialization error", request_id=request_id, error=str(e))
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail = f'LLM or Agent initialization error: {str(e)}')
+
+
+def _warm_up_agents(config: dict) -> None:
+    """Builds the pooled model analyzer kernel (LLM client, agent, step discovery)."""
+    _get_model_analyzer_kernel("startup-warmup")
+
+
+async def _warm_up_models(config: dict) -> None:
+    """Builds the sessions of the hot models listed in the warm-up config, unless already cached."""
+    pool = WorkerPool.get_instance()
+    jobs = SessionBuildJobManager.get_instance()
+    session = ModelAnalyzerSession(SessionCacheFactory.get_cache_manager())
+    for model in config.get("models", []):
+        reader = S3ObjectReader(bucket = model["bucket_name"], key=model["file_key"], s3_client=get_s3_client())
+        session_id = await pool.run_io(ModelAnalyzerSession.session_id_for, reader)
+        if not await session.ahas_session(session_id):
+            await jobs.wait(await jobs.submit(session, reader, session_id))
+        logger.info("Warmed model session", bucket_name=model["bucket_name"], file_key=model["file_key"], session_id=session_id)
+
+
+StartupWarmup.get_instance().register("agents", _warm_up_agents)
+StartupWarmup.get_instance().register("models", _warm_up_models)
+
+
+async def _load_conversation(request_id: str, conversation_id: Optional[str],
+                             chat_history: Optional[List[ChatMessage]]) -> Tuple[str, List[ChatMessage]]:
+    """
+    Returns the conversation id and the history to start the run from: the stored
+    history of `conversation_id`, or the request's `chat_history` for a new conversation.
+    """
+    if not conversation_id:
+        return str(uuid.uuid4()), list(chat_history or [])
+
+    store = ConversationStore(SessionCacheFactory.get_cache_manager())
+    try:
+      history = await WorkerPool.get_instance().run_io(store.load, conversation_id)
+    except WorkerPoolFullError as e:
+        raise _session_workers_busy(request_id, e)
+    if not history:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f'Conversation not found: {conversation_id}')
+    return conversation_id, history
+
+
+async def _save_conversation(request_id: str, conversation_id: str, context: Context) -> None:
+    """
+    Appends what the run added to the agent's memory to the stored conversation. A
+    failed save is logged rather than failing the answer that was already produced.
+    """
     try:
-      # reader = FileObjectReader("tests/test_data/pateint_fullfilment_model.pkl")
-      reader = S3ObjectReader(bucket = req.bucket_name, key=req.file_key, s3_client=get_s3_client())
+      memory = await context.get("memory")
+      history = await memory.aget_all()
+      store = ConversationStore(SessionCacheFactory.get_cache_manager())
+      await WorkerPool.get_instance().run_io(store.sync, conversation_id, history)
     except Exception as e:
-        logger.exception("File reading error", request_id=request_id, bucket_name=req.bucket_name, file_key=req.file_key, error=str(e))
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f'File reading error: {str(e)}')
+        logger.exception("Conversation save error", request_id=request_id, conversation_id=conversation_id, error=str(e))
+
+
+@router.post('/agent/query')
+async def agent_query(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(admit_agent_run)):
+    
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
     
+    kernel = _get_model_analyzer_kernel(request_id)
+    session, session_id = await _resolve_model_session(request_id, req)
+    conversation_id, chat_history = await _load_conversation(request_id, req.conversation_id, req.chat_history)
+
     try:
-      memory = JoblibSessionCache.get_instance()
-      session = ModelAnalyzerSession(memory)
-      session_id = session.create_session(reader)
-      conversation_id = str(uuid.uuid4())
-      context = Context(workflow=agent) # type: ignore
+      context = kernel.new_context()
 
       await context.set("session_id",session_id)
       await context.set("model_analyzer_session",session)
       await context.set("conversation_id",conversation_id)
     except Exception as e:
-        logger.exception("Session creation error", request_id=request_id, error=str(e))
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Session creation error: {str(e)}')
+        logger.exception("Context initialization error", request_id=request_id, error=str(e))
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Context initialization error: {str(e)}')
 
     try:
       # raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail='Testing Agent run error')
-      response: AgentOutput = await agent.run(user_msg = req.user_query, chat_history = req.chat_history, ctx = context, kernel_cls = ModelAnalyzerKernel) # Sample query "generate shap summary image for 5 features"
+      response: AgentOutput = await kernel.run(user_msg = req.user_query, chat_history = chat_history, ctx = context) # Sample query "generate shap summary image for 5 features"
       response_content = str(response)
+      await _save_conversation(request_id, conversation_id, context)
       savant_agent_output = await AgentResultUtils.parse_result_output(context, response)
       return SuccessResponse.ok(request_id = request_id, data = savant_agent_output)
     except Exception as e:
@@ -102,58 +294,317 @@ async def agent_query(request:Request, req:ModelPerformanceRequest, api_key:str
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Agent run error: {str(e)}')
 
 
-@router.post('/query')
-async def query_workflow(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(get_api_key)):
-    
+@router.post('/agent/query/stream')
+async def agent_query_stream(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(admit_agent_run)):
+    """
+    Streaming variant of /agent/query. Emits Server-Sent Events as the run progresses:
+    `status`, then `agent_input`, `delta`, `tool_call`, `tool_result` and `agent_output`
+    events from the workflow, and finally a `result` event carrying the same body as
+    /agent/query, or an `error` event.
+    """
+    request_id = (
+        request.headers.get('request_id')
+        or request.headers.get('x-request-id')
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+
+    kernel = _get_model_analyzer_kernel(request_id)
+
+    async def event_source():
+        # Flush a first frame right away so the client sees progress while the session resolves
+        yield AgentEventStream.format_sse("status", {"request_id": request_id, "stage": "session"})
+        try:
+          session, session_id = await _resolve_model_session(request_id, req)
+          conversation_id, chat_history = await _load_conversation(request_id, req.conversation_id, req.chat_history)
+        except HTTPException as e:
+          yield AgentEventStream.format_sse("error", {"request_id": request_id, "status_code": e.status_code, "message": e.detail})
+          return
+
+        context = kernel.new_context()
+        await context.set("session_id",session_id)
+        await context.set("model_analyzer_session",session)
+        await context.set("conversation_id",conversation_id)
+        yield AgentEventStream.format_sse("status", {"request_id": request_id, "stage": "agent", "session_id": session_id,
+                                                     "conversation_id": conversation_id})
+
+        handler = kernel.run(user_msg = req.user_query, chat_history = chat_history, ctx = context)
+        try:
+          async for ev in handler.stream_events():
+              frame = AgentEventStream.to_sse(ev)
+              if frame:
+                  yield frame
+          response: AgentOutput = await handler
+          await _save_conversation(request_id, conversation_id, context)
+          savant_agent_output = await AgentResultUtils.parse_result_output(context, response)
+          yield AgentEventStream.format_sse("result", SuccessResponse.envelope(request_id = request_id, data = savant_agent_output))
+        except Exception as e:
+          logger.exception("Agent run error", request_id=request_id, error=str(e))
+          yield AgentEventStream.format_sse("error", {"request_id": request_id, "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY, "message": f'Agent run error: {str(e)}'})
+        finally:
+          # Stop the workflow if the client went away before the run finished
+          if not handler.done():
+              await handler.cancel_run()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "request_id": request_id},
+    )
+
+
+def _start_batch(request_id: str, req: BatchQueryRequest, kernel: ModelAnalyzerKernel,
+                 session: ModelAnalyzerSession, session_id: str) -> List[asyncio.Task]:
+    """
+    Starts one agent run per query on the shared kernel, at most BATCH_MAX_CONCURRENCY
+    at a time. The runs share a memoized view of the session, so each artifact is
+    loaded from the cache once per batch rather than once per tool call.
+    """
+    shared_session = session.scoped()
+    slots = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def run_query(index: int, user_query: str) -> BatchQueryResult:
+        async with slots:
+            try:
+              context = kernel.new_context()
+              await context.set("session_id",session_id)
+              await context.set("model_analyzer_session",shared_session)
+              await context.set("conversation_id",str(uuid.uuid4()))
+              handler = kernel.run(user_msg = user_query, chat_history = req.chat_history, ctx = context)
+              try:
+                response: AgentOutput = await asyncio.shield(handler)
+              except asyncio.CancelledError:
+                  # The batch was abandoned, stop the workflow rather than leaving it running
+                  await handler.cancel_run()
+                  raise
+              output = await AgentResultUtils.parse_result_output(context, response)
+              return BatchQueryResult(index=index, user_query=user_query, status='ok', output=output)
+            except Exception as e:
+                logger.exception("Agent run error", request_id=request_id, query_index=index, error=str(e))
+                return BatchQueryResult(index=index, user_query=user_query, status='error', error=f'Agent run error: {str(e)}')
+
+    return [asyncio.create_task(run_query(index, user_query)) for index, user_query in enumerate(req.queries)]
+
+
+@router.post('/agent/batch')
+async def agent_batch_query(request:Request, req:BatchQueryRequest, api_key:str = Depends(admit_agent_run)):
+    """
+    Answers several questions about one model in a single request. The session is
+    resolved once and the questions run as concurrent agent runs; a failing question
+    is reported in its own result without failing the batch. The batch takes a single
+    admission slot; its own runs are bounded by BATCH_MAX_CONCURRENCY.
+    """
     request_id = (
         request.headers.get('request_id') 
         or request.headers.get('x-request-id') 
         or f'{__name__}+{uuid.uuid4()}'
     )
+    kernel = _get_model_analyzer_kernel(request_id)
+    session, session_id = await _resolve_model_session(request_id, req)
+
+    tasks = _start_batch(request_id, req, kernel, session, session_id)
     try:
-      llm = LLMManager.get_llm(model_name="40-mini")
-      agent = PharmaModelAnalyzerAgent(
-          tools=[shap_summary_plot_image_tool, shap_insight_narrative_tool],
-          llm=llm,
-      )
-    except Exception as e:
-        logger.exception("LLM or Agent initialization error", request_id=request_id, error=str(e))
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail = f'LLM or Agent initialization error: {str(e)}')
+      results = await asyncio.gather(*tasks)
+    finally:
+      for task in tasks:
+          task.cancel()
+    return SuccessResponse.ok(request_id = request_id, data = {"session_id": session_id, "results": results})
+
+
+@router.post('/agent/batch/stream')
+async def agent_batch_query_stream(request:Request, req:BatchQueryRequest, api_key:str = Depends(admit_agent_run)):
+    """
+    Streaming variant of /agent/batch. Emits a `status` event, then one `query_result`
+    event per question in completion order, then `done`, or an `error` event if the
+    session cannot be resolved.
+    """
+    request_id = (
+        request.headers.get('request_id')
+        or request.headers.get('x-request-id')
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    kernel = _get_model_analyzer_kernel(request_id)
+
+    async def event_source():
+        yield AgentEventStream.format_sse("status", {"request_id": request_id, "stage": "session"})
+        try:
+          session, session_id = await _resolve_model_session(request_id, req)
+        except HTTPException as e:
+          yield AgentEventStream.format_sse("error", {"request_id": request_id, "status_code": e.status_code, "message": e.detail})
+          return
+        yield AgentEventStream.format_sse("status", {"request_id": request_id, "stage": "agent", "session_id": session_id})
+
+        tasks = _start_batch(request_id, req, kernel, session, session_id)
+        try:
+          for next_result in asyncio.as_completed(tasks):
+              yield AgentEventStream.format_sse("query_result", await next_result)
+          yield AgentEventStream.format_sse("done", {"request_id": request_id, "session_id": session_id, "count": len(tasks)})
+        finally:
+          # Stop outstanding runs if the client went away before the batch finished
+          for task in tasks:
+              task.cancel()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "request_id": request_id},
+    )
+
+
+async def _send_conversation_event(websocket: WebSocket, event: str, data: Any) -> None:
+    await websocket.send_text(AgentEventStream.format_json(event, data))
+
+
+async def _run_conversation_turn(websocket: WebSocket, request_id: str, api_key: str,
+                                 conversation: AgentConversation, user_query: str) -> None:
+    """Runs one turn under an admission slot, streaming its events and then its `result` (or an `error`)."""
     try:
-      # reader = FileObjectReader("tests/test_data/pateint_fullfilment_model.pkl")
-      reader = S3ObjectReader(bucket = req.bucket_name, key=req.file_key, s3_client=get_s3_client())
+      async with AdmissionController.get_instance().admit(api_key):
+          handler = conversation.run(user_query)
+          try:
+            async for ev in handler.stream_events():
+                message = AgentEventStream.to_message(ev)
+                if message:
+                    await _send_conversation_event(websocket, *message)
+            response: AgentOutput = await handler
+            await _save_conversation(request_id, conversation.conversation_id, conversation.context)
+            savant_agent_output = await AgentResultUtils.parse_result_output(conversation.context, response)
+            await _send_conversation_event(websocket, "result", SuccessResponse.envelope(request_id = request_id, data = savant_agent_output))
+          finally:
+            # Stop the workflow if the turn was cancelled or the client went away
+            if not handler.done():
+                await handler.cancel_run()
+    except AdmissionRejectedError as e:
+        await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": status.HTTP_429_TOO_MANY_REQUESTS,
+                                                            "message": str(e), "retry_after": e.retry_after})
+    except WebSocketDisconnect:
+        return  # The receive loop sees the disconnect and ends the conversation
     except Exception as e:
-        logger.exception("File reading error", request_id=request_id, bucket_name=req.bucket_name, file_key=req.file_key, error=str(e))
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'File reading error: {str(e)}')
+        logger.exception("Agent run error", request_id=request_id, conversation_id=conversation.conversation_id, error=str(e))
+        await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                                            "message": f'Agent run error: {str(e)}'})
+
+
+@router.websocket('/agent/ws')
+async def agent_conversation(websocket: WebSocket, api_key: str = Depends(get_websocket_api_key)):
+    """
+    Conversation channel: one connection keeps its workflow Context (chat memory,
+    scratchpad), its model session and the pooled agent across turns.
+
+    The client first sends `{"type": "start", ...}` with the model source of
+    /agent/query (`session_id`, or `bucket_name` and `file_key`) and an optional
+    `chat_history` or stored `conversation_id`, and gets `ready` back. Each `{"type": "query", "user_query": ...}`
+    then streams the events of /agent/query/stream and ends with `result` or `error`.
+    `{"type": "cancel"}` stops the running turn. Every message is a JSON object
+    `{"event": ..., "data": ...}`; each turn takes an admission slot while it runs.
+
+    The API key goes in the `X-Api-Key` header, or for browsers in an `api-key.<key>`
+    subprotocol (see get_websocket_api_key).
+    """
+    request_id = (
+        websocket.headers.get('request_id')
+        or websocket.headers.get('x-request-id')
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    await websocket.accept(subprotocol=websocket_api_key_subprotocol(websocket))
+
+    conversation: Optional[AgentConversation] = None
+    turn: Optional[asyncio.Task] = None
+    try:
+      while True:
+          try:
+            raw = await asyncio.wait_for(websocket.receive_text(), timeout=AGENT_WS_IDLE_TIMEOUT_SECONDS)
+          except asyncio.TimeoutError:
+              if turn is not None and not turn.done():
+                  continue
+              await websocket.close(code=1000, reason="Idle timeout")
+              return
+
+          try:
+            message = CONVERSATION_MESSAGE.validate_json(raw)
+          except ValidationError as e:
+              await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                                                  "message": f'Invalid message: {e.errors(include_url=False)}'})
+              continue
+
+          if isinstance(message, ConversationStart):
+              if conversation is not None:
+                  await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": status.HTTP_409_CONFLICT,
+                                                                      "message": "Conversation already started"})
+                  continue
+              try:
+                kernel = _get_model_analyzer_kernel(request_id)
+                session, session_id = await _resolve_model_session(request_id, message)
+                conversation_id, chat_history = await _load_conversation(request_id, message.conversation_id, message.chat_history)
+              except HTTPException as e:
+                  await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": e.status_code, "message": e.detail})
+                  continue
+              conversation = AgentConversation(kernel, chat_history=chat_history, conversation_id=conversation_id)
+              # Loaded artifacts are memoized for the lifetime of the connection
+              await conversation.bind(session_id=session_id, model_analyzer_session=session.scoped())
+              await _send_conversation_event(websocket, "ready", {"request_id": request_id, "session_id": session_id,
+                                                                  "conversation_id": conversation.conversation_id})
+
+          elif isinstance(message, ConversationQuery):
+              if conversation is None:
+                  await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": status.HTTP_409_CONFLICT,
+                                                                      "message": "Send a start message first"})
+              elif turn is not None and not turn.done():
+                  await _send_conversation_event(websocket, "error", {"request_id": request_id, "status_code": status.HTTP_409_CONFLICT,
+                                                                      "message": "A turn is already running"})
+              else:
+                  turn = asyncio.create_task(_run_conversation_turn(websocket, request_id, api_key, conversation, message.user_query))
+
+          elif turn is not None and not turn.done():
+              turn.cancel()
+              await asyncio.gather(turn, return_exceptions=True)
+              await _send_conversation_event(websocket, "cancelled", {"request_id": request_id})
+    except WebSocketDisconnect:
+        logger.info("Conversation closed", request_id=request_id,
+                    conversation_id=conversation.conversation_id if conversation else None,
+                    turns=conversation.turns if conversation else 0)
+    finally:
+      if turn is not None and not turn.done():
+          turn.cancel()
+          await asyncio.gather(turn, return_exceptions=True)
+
+
+@router.post('/query')
+async def query_workflow(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(admit_agent_run)):
     
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    kernel = _get_model_analyzer_kernel(request_id)
+    session, session_id = await _resolve_model_session(request_id, req)
+    conversation_id, chat_history = await _load_conversation(request_id, req.conversation_id, req.chat_history)
+
     try:
-      memory = JoblibSessionCache.get_instance()
-      session = ModelAnalyzerSession(memory)
-      session_id = session.create_session(reader)
-      conversation_id = str(uuid.uuid4())
-      context = Context(workflow=agent) # type: ignore
+      context = kernel.new_context()
 
       await context.set("session_id",session_id)
       await context.set("model_analyzer_session",session)
       await context.set("conversation_id",conversation_id)
     except Exception as e:
-        logger.exception("Session creation error", request_id=request_id, error=str(e))
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Session creation error: {str(e)}')
+        logger.exception("Context initialization error", request_id=request_id, error=str(e))
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Context initialization error: {str(e)}')
 
     try:
-      response: AgentOutput = await agent.run(user_msg = req.user_query, chat_history = req.chat_history, ctx = context, kernel_cls = ModelAnalyzerKernel) # Sample query "generate shap summary image for 5 features"
+      response: AgentOutput = await kernel.run(user_msg = req.user_query, chat_history = chat_history, ctx = context) # Sample query "generate shap summary image for 5 features"
+      await _save_conversation(request_id, conversation_id, context)
       savant_agent_output = await AgentResultUtils.parse_result_output(context, response)
       shap_plot_output = AgentResultUtils.get_raw_output( response.tool_calls, ModelAnalyzerToolName.SHAP_SUMMARY_PLOT) # type: ignore
 
-      base64_img = shap_plot_output.content if shap_plot_output else None
+      artifact_ref = shap_plot_output.output_ref if shap_plot_output else None
       
     except Exception as e:
         logger.exception("Agent run error", request_id=request_id, error=str(e))
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Agent run error: {str(e)}')
     try:
-      if base64_img:
-          content_type = 'BASE64IMAGE'
-          content = base64_img
+      if artifact_ref:
+          content_type = 'STORAGEARTIFACT'
+          content = str(request.url_for("get_artifact", session_id=session_id, ref=artifact_ref))
 
       # Add elif logic for other content types if needed in the future
 
@@ -166,7 +617,9 @@ async def query_workflow(request:Request, req:ModelPerformanceRequest, api_key:s
       result = OutputData(
           content_type=content_type,
           content=content,
-          conv_text=response_content
+          conv_text=response_content,
+          session_id=session_id,
+          conversation_id=conversation_id
       )
       return SuccessResponse.ok(request_id = request_id, data = result)
     
@@ -174,6 +627,46 @@ async def query_workflow(request:Request, req:ModelPerformanceRequest, api_key:s
         logger.exception("Response content processing error", request_id=request_id, error=str(e))
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail = f'Response content processing error: {str(e)}')
 
+@router.get('/artifacts/{session_id}/{ref}')
+async def get_artifact(request:Request, session_id:str, ref:str, api_key:str = Depends(get_api_key)):
+    """
+    Serves an artifact (e.g. a plot image) referenced by a tool result's `output_ref`.
+    Artifacts are content-addressed, so they are immutable and cacheable indefinitely.
+    """
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    if not ArtifactStore.is_valid_ref(ref):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f'Artifact not found: {ref}')
+
+    headers = {"ETag": f'"{ref}"', "Cache-Control": ARTIFACT_CACHE_CONTROL}
+    if request.headers.get("if-none-match") in (headers["ETag"], f'W/{headers["ETag"]}', "*"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+      store = ArtifactStore(SessionCacheFactory.get_cache_manager())
+      artifact = await store.aget(session_id, ref)
+    except WorkerPoolFullError as e:
+        raise _session_workers_busy(request_id, e)
+    except Exception as e:
+        logger.exception("Artifact read error", request_id=request_id, session_id=session_id, ref=ref, error=str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail = f'Artifact read error: {str(e)}')
+    if artifact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f'Artifact not found: {ref}')
+    return Response(content=artifact.data, media_type=artifact.media_type, headers=headers)
+
+@router.get('/admission')
+async def admission_stats(request:Request, api_key:str = Depends(get_api_key)):
+    """Concurrency, queue depth, rejections and queue time of the agent endpoints."""
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    return SuccessResponse.ok(request_id = request_id, data = AdmissionController.get_instance().stats())
+
 # Dummy endpoint to return JSON data. Delete this endpoint in production.
 
 @router.get('/dummy-json')
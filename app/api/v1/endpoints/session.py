@@ -1,18 +1,20 @@
 import structlog
 logger = structlog.get_logger(__name__)
 
-from fastapi import APIRouter,Depends,HTTPException, Query, Request
+from fastapi import APIRouter,Depends,HTTPException, Query, Request, status
 from pydantic import BaseModel
 from app.api.security.api_key import get_api_key
 from typing import List,Optional
 from llama_index.core.llms import ChatMessage
 from app.storage.file_object_reader import FileObjectReader
 from app.storage.s3_object_reader import S3ObjectReader
-from app.cache.joblib_session_cache import JoblibSessionCache
+from app.cache.session_cache_factory import SessionCacheFactory
 from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
+from agent_apps.model_analyzer.session.session_build_jobs import SessionBuildJob, SessionBuildJobManager
 
 from app.utils.success_wrapper import SuccessResponse
 from app.core.s3_client import get_s3_client
+from app.core.worker_pool import WorkerPool, WorkerPoolFullError
 import uuid
 # app/api/v1/endpoints/modelquery.py
 
@@ -23,6 +25,59 @@ class ModelPerformanceRequest(BaseModel):
     bucket_name: str
     chat_history: Optional[List[ChatMessage]] = [] # Added chat history. Default is an empty list
     
+async def _submit_session_build(request_id: str, req: ModelPerformanceRequest) -> SessionBuildJob:
+    """Schedules the session build for the requested model, joining an in-flight build of the same model."""
+    logger.info("Before reading file", request_id=request_id, bucket_name=req.bucket_name, file_key=req.file_key)
+    try:
+      reader = S3ObjectReader(bucket = req.bucket_name, key=req.file_key, s3_client=get_s3_client())
+      session_id = await WorkerPool.get_instance().run_io(ModelAnalyzerSession.session_id_for, reader)
+    except WorkerPoolFullError:
+        raise
+    except Exception as e:
+        logger.exception("File reading error", request_id=request_id, bucket_name=req.bucket_name, file_key=req.file_key, error=str(e))
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'File reading error: {str(e)}')
+
+    session = ModelAnalyzerSession(SessionCacheFactory.get_cache_manager())
+    return await SessionBuildJobManager.get_instance().submit(session, reader, session_id)
+
+
+@session_router.post('', status_code=status.HTTP_202_ACCEPTED)
+async def submit_session_build(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(get_api_key)):
+    """
+    Starts building the session for a model in the background and returns the build job.
+    Poll `GET /session/jobs/{job_id}` until it is done, then query with its `session_id`.
+    """
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    try:
+        job = await _submit_session_build(request_id, req)
+    except WorkerPoolFullError as e:
+        logger.warning("Session workers saturated", request_id=request_id, pool=e.kind, pending=e.pending)
+        raise HTTPException(status_code=503, detail=f'Session workers busy: {str(e)}', headers={"Retry-After": "5"})
+
+    location = str(request.url_for("get_session_build_job", job_id=job.job_id))
+    return SuccessResponse.ok(request_id = request_id, status_code = status.HTTP_202_ACCEPTED, data = job.to_dict(),
+                              headers = {"Location": location})
+
+
+@session_router.get('/jobs/{job_id}')
+async def get_session_build_job(request:Request, job_id:str, api_key:str = Depends(get_api_key)):
+    """Status of a session build job: queued, running, done or failed, with seconds per phase."""
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    # Answered from the shared job record, whichever worker or pod runs the job
+    record = await SessionBuildJobManager.get_instance().get_job_record(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f'Session build job not found: {job_id}')
+    return SuccessResponse.ok(request_id = request_id, data = record)
+
+
 @session_router.post('/session_id')
 async def create_session(request:Request, req:ModelPerformanceRequest, api_key:str = Depends(get_api_key) ):
 
@@ -32,18 +87,28 @@ async def create_session(request:Request, req:ModelPerformanceRequest, api_key:s
         or f'{__name__}+{uuid.uuid4()}'
     )
     try:
-        logger.info("Before reading file", request_id=request_id, bucket_name=req.bucket_name, file_key=req.file_key)
-        reader = S3ObjectReader(bucket = req.bucket_name, key=req.file_key, s3_client=get_s3_client())
-        # reader = FileObjectReader("tests/test_data/pateint_fullfilment_model.pkl")
-        memory = JoblibSessionCache.get_instance()
-        session = ModelAnalyzerSession(memory)
-        session_id = session.create_session(reader)
+        job = await _submit_session_build(request_id, req)
+        session_id = await SessionBuildJobManager.get_instance().wait(job)
         result = {"session_id": session_id}
         
         return SuccessResponse.ok(request_id = request_id, data = result) 
         
+    except HTTPException:
+        raise
     except Exception as e:
+        if isinstance(e, WorkerPoolFullError) or isinstance(e.__cause__, WorkerPoolFullError):
+            logger.warning("Session workers saturated", request_id=request_id, error=str(e))
+            raise HTTPException(status_code=503, detail=f'Session workers busy: {str(e)}', headers={"Retry-After": "5"})
         logger.exception("Error occurred in model session end point", request_id=request_id, error=str(e))
         raise HTTPException(status_code=500, detail=f'Session error: {str(e)}')
 
-  
\ No newline at end of file
+
+@session_router.get('/workers')
+async def worker_stats(request:Request, api_key:str = Depends(get_api_key)):
+    """Queue depth of the worker pools that build sessions."""
+    request_id = (
+        request.headers.get('request_id') 
+        or request.headers.get('x-request-id') 
+        or f'{__name__}+{uuid.uuid4()}'
+    )
+    return SuccessResponse.ok(request_id = request_id, data = WorkerPool.get_instance().stats())
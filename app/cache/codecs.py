@@ -0,0 +1,120 @@
+import zlib
+from threading import Lock
+from typing import Dict, Optional, Tuple, Type
+
+# Framed values start with this, then the codec name length (1 byte) and the name
+_FRAME_MAGIC = b"SCC1"
+
+
+class Codec:
+    """
+    Compression for serialized cache values. The base class stores data as is; subclasses
+    set `name` and override `compress` and `decompress`, and are made available to
+    `get_codec` with `register_codec`.
+    """
+
+    name = "none"
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return bytes(data)
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class Lz4Codec(Codec):
+    """LZ4 frames: much faster than zlib at a lower ratio. Requires the `lz4` package."""
+
+    name = "lz4"
+
+    def __init__(self):
+        import lz4.frame
+
+        self._frame = lz4.frame
+
+    def compress(self, data: bytes) -> bytes:
+        return self._frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._frame.decompress(data)
+
+
+class ZstdCodec(Codec):
+    """Zstandard: zlib's ratio or better at several times its speed. Requires the `zstandard` package."""
+
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        import zstandard
+
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        # Frames written by compress() carry their size, so no max_output_size is needed
+        return self._decompressor.decompress(data)
+
+
+_registry: Dict[str, Type[Codec]] = {codec.name: codec for codec in (Codec, ZlibCodec, Lz4Codec, ZstdCodec)}
+_instances: Dict[str, Codec] = {}
+_lock = Lock()
+
+
+def register_codec(codec: Type[Codec]) -> None:
+    with _lock:
+        _registry[codec.name] = codec
+        _instances.pop(codec.name, None)
+
+
+def get_codec(name: str) -> Codec:
+    """
+    The shared instance of a registered codec.
+
+    Raises:
+        ValueError: If no codec is registered under `name`.
+        ImportError: If the codec's package is not installed.
+    """
+    codec = _instances.get(name)
+    if codec is None:
+        with _lock:
+            if name not in _registry:
+                raise ValueError(f"Unknown codec '{name}', available: {', '.join(sorted(_registry))}")
+            codec = _instances.setdefault(name, _registry[name]())
+    return codec
+
+
+def frame(codec: Codec, data: bytes) -> bytes:
+    """Compresses `data` and prefixes it with the codec name, so `unframe` needs no configuration."""
+    name = codec.name.encode("ascii")
+    return b"".join((_FRAME_MAGIC, bytes([len(name)]), name, codec.compress(data)))
+
+
+def unframe(value: bytes) -> bytes:
+    """Decompresses a framed value. Unframed values (written before codecs) are returned as is."""
+    codec_name, payload = split_frame(value)
+    return payload if codec_name is None else get_codec(codec_name).decompress(payload)
+
+
+def split_frame(value: bytes) -> Tuple[Optional[str], memoryview]:
+    view = memoryview(value)
+    if view[:len(_FRAME_MAGIC)] != _FRAME_MAGIC:
+        return None, view
+    length = view[len(_FRAME_MAGIC)]
+    start = len(_FRAME_MAGIC) + 1
+    return bytes(view[start:start + length]).decode("ascii"), view[start + length:]
@@ -0,0 +1,167 @@
+import os
+import uuid
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class DistributedLock(ABC):
+    """
+    Named, non-blocking mutual exclusion shared by every process that uses the same
+    session cache, so that expensive work on a session runs once across workers and pods.
+
+    `acquire` returns an opaque token when the lock was taken and None when another
+    holder has it; only the holder's token can extend or release it. Locks with a TTL
+    expire on their own if the holder dies without releasing them. `is_held` tells
+    whether anyone holds a lock, without taking it.
+    """
+
+    @abstractmethod
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def extend(self, name: str, token: str, ttl: float) -> bool:
+        pass
+
+    @abstractmethod
+    def release(self, name: str, token: str) -> None:
+        pass
+
+    @abstractmethod
+    def is_held(self, name: str) -> bool:
+        pass
+
+
+class LocalLock(DistributedLock):
+    """Process-local lock, for caches that are not shared between processes."""
+
+    def __init__(self):
+        self._held: Dict[str, str] = {}
+        self._lock = Lock()
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        with self._lock:
+            if name in self._held:
+                return None
+            token = uuid.uuid4().hex
+            self._held[name] = token
+            return token
+
+    def extend(self, name: str, token: str, ttl: float) -> bool:
+        return self._held.get(name) == token
+
+    def release(self, name: str, token: str) -> None:
+        with self._lock:
+            if self._held.get(name) == token:
+                del self._held[name]
+
+    def is_held(self, name: str) -> bool:
+        with self._lock:
+            return name in self._held
+
+
+class FileLock(DistributedLock):
+    """
+    flock(2)-based lock on files in a directory, shared by the processes (e.g. uvicorn
+    workers) using the same joblib cache directory. The OS drops the lock when the
+    holding process dies, so the TTL is not needed. Falls back to a process-local lock
+    where flock is unavailable.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._fds: Dict[str, int] = {}
+        self._local = LocalLock() if fcntl is None else None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.lock")
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        if self._local is not None:
+            return self._local.acquire(name, ttl)
+        fd = os.open(self._path(name), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        token = uuid.uuid4().hex
+        self._fds[token] = fd
+        return token
+
+    def extend(self, name: str, token: str, ttl: float) -> bool:
+        if self._local is not None:
+            return self._local.extend(name, token, ttl)
+        return token in self._fds
+
+    def release(self, name: str, token: str) -> None:
+        if self._local is not None:
+            return self._local.release(name, token)
+        fd = self._fds.pop(token, None)
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def is_held(self, name: str) -> bool:
+        if self._local is not None:
+            return self._local.is_held(name)
+        fd = os.open(self._path(name), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)  # Also drops the probe's own flock
+        return False
+
+
+# Delete or refresh the key only while it still holds our token, so a holder whose
+# lock expired cannot release or extend the lock of the next holder.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisLock(DistributedLock):
+    """Redis lock (SET NX PX with a random token) shared by every pod using the same Redis."""
+
+    def __init__(self, client, prefix: str = "lock"):
+        self.client = client
+        self.prefix = prefix
+        self._release = client.register_script(_RELEASE_SCRIPT)
+        self._extend = client.register_script(_EXTEND_SCRIPT)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    def acquire(self, name: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if self.client.set(self._key(name), token, nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+
+    def extend(self, name: str, token: str, ttl: float) -> bool:
+        return bool(self._extend(keys=[self._key(name)], args=[token, int(ttl * 1000)]))
+
+    def release(self, name: str, token: str) -> None:
+        self._release(keys=[self._key(name)], args=[token])
+
+    def is_held(self, name: str) -> bool:
+        return bool(self.client.exists(self._key(name)))
@@ -1,11 +1,48 @@
 import os
+import re
+import time
 import joblib
-from threading import Lock
+import structlog
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from app.cache import session_bundle
+from app.cache.distributed_lock import FileLock
 from app.cache.session_cache_manager import SessionCacheManager
+from app.cache.session_index import SessionIndex
+from app.core.metrics import (
+    SESSION_CACHE_BLOB_WRITES,
+    SESSION_CACHE_DISK_BYTES,
+    SESSION_CACHE_EVICTIONS,
+    record_cache_bytes,
+    record_cache_lookup,
+)
+
+logger = structlog.get_logger(__name__)
+
+# Single-file bundles written before artifacts were shared between sessions; only
+# indexed, so that they are evicted
+BUNDLE_DATATYPE = "bundle"
+MANIFEST_DATATYPE = "manifest"
+BLOB_DIR = "blobs"
+# Splits "<id>_<datatype>.pkl" where ids may themselves contain underscores (conversation ids)
+_FILE_NAME = re.compile(
+    r"^(?P<id>.+?)_(?P<datatype>model|features|X_test|y_test|X_test_transformed|shap|"
+    r"artifact_[0-9a-f]{32}|conversation_\d+|conversation_meta|session_build_job)\.pkl$"
+)
 
 
 class JoblibSessionCache(SessionCacheManager):
+    """
+    Session cache on a local (or shared) directory.
+
+    Single datatypes are joblib files. Sessions saved with `save_many` are a small
+    manifest file pointing to content-addressed blob files in `blobs/`, so artifacts
+    identical across sessions (the same model analysed by many users) are stored once.
+    The SQLite index counts the sessions referencing each blob, and a blob is removed
+    when the last of them is deleted or evicted.
+    """
+
     _instance = None
     _lock = Lock()
 
@@ -22,21 +59,255 @@ class JoblibSessionCache(SessionCacheManager):
     def _initialize(self):
         # Load from ENV or use default
         self.cache_dir = os.getenv("JOBLIB_CACHE_DIR", "./cache_data")
-        os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.cache_dir, BLOB_DIR), exist_ok=True)
+        self._distributed_lock = FileLock(os.path.join(self.cache_dir, ".locks"))
+        # Sessions not read for this long are evicted (0 disables)
+        self.ttl_seconds = float(os.getenv("JOBLIB_CACHE_TTL_SECONDS", 24 * 3600))
+        # The least recently read sessions are evicted while the cache is above this (0 disables)
+        self.max_bytes = int(os.getenv("JOBLIB_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+        self.sweep_interval = float(os.getenv("JOBLIB_CACHE_SWEEP_INTERVAL_SECONDS", 300))
+        # Array buffers at least this large are stored raw in session bundles and memory-mapped
+        # when loaded, so the workers of a pod share one page-cached copy
+        self.mmap_min_bytes = int(os.getenv("JOBLIB_MMAP_MIN_BYTES", 16 * 1024))
+        # Serializes rewrites of a manifest when one of its datatypes is deleted
+        self._bundle_lock = Lock()
+
+        index_path = os.path.join(self.cache_dir, ".index.sqlite")
+        rebuild = not os.path.exists(index_path)
+        self.index = SessionIndex(index_path)
+        if rebuild:
+            self._rebuild_index()
+
+        self._evict_listeners: List[Callable[[str], None]] = []
+        self._sweep_wakeup = Event()
+        self._sweeper: Optional[Thread] = None
+        if self.sweep_interval > 0 and (self.ttl_seconds > 0 or self.max_bytes > 0):
+            self._sweeper = Thread(target=self._sweep_loop, name="joblib-cache-sweeper", daemon=True)
+            self._sweeper.start()
 
     def _get_path(self, id: str, datatype: str) -> str:
         return os.path.join(self.cache_dir, f"{id}_{datatype}.pkl")
 
-    def save(self, id: str, datatype: str, data: object) -> None:
-        joblib.dump(data, self._get_path(id, datatype), compress=("zlib", 3))
+    def _get_manifest_path(self, id: str) -> str:
+        return os.path.join(self.cache_dir, f"{id}_{MANIFEST_DATATYPE}.json")
+
+    def _get_blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, BLOB_DIR, f"{digest}.bin")
+
+    def save(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        # No per-entry expiry: entries go with their id, when it is evicted
+        path = self._get_path(id, datatype)
+        joblib.dump(data, path, compress=("zlib", 3))
+        size = os.path.getsize(path)
+        self.index.add(id, os.path.basename(path), [datatype], size)
+        record_cache_bytes("joblib", datatype, "write", size)
+        self._after_write()
+
+    def save_many(self, id: str, items: Dict[str, object]) -> None:
+        manifest, blobs = session_bundle.pack(items, mmap_min_bytes=self.mmap_min_bytes)
+        previous = set(self.index.blobs_of(id))
+        # Referenced before their files are looked for, so they cannot be collected in between
+        self.index.acquire_blobs(id, blobs)
+        for digest, blob in blobs.items():
+            blob_path = self._get_blob_path(digest)
+            if os.path.exists(blob_path):
+                SESSION_CACHE_BLOB_WRITES.labels("joblib", "reused").inc()
+                continue
+            session_bundle.write_blob_file(blob_path, digest, blob)
+            self.index.set_blob_bytes(digest, os.path.getsize(blob_path))
+            SESSION_CACHE_BLOB_WRITES.labels("joblib", "stored").inc()
+
+        path = self._get_manifest_path(id)
+        session_bundle.write_manifest_file(path, manifest)
+        self.index.add(id, os.path.basename(path), list(manifest["entries"]), os.path.getsize(path))
+        for datatype, entry in manifest["entries"].items():
+            record_cache_bytes("joblib", datatype, "write", blobs[entry["blob"]].nbytes)
+        if previous - set(blobs):
+            # Blobs of the session's previous version that it no longer uses
+            self.index.release_blobs(id, previous - set(blobs))
+            self._collect_blobs()
+        self._after_write()
 
     def load(self, id: str, datatype: str) -> object:
-        return joblib.load(self._get_path(id, datatype))
+        path = self._get_path(id, datatype)
+        try:
+            data = joblib.load(path)
+        except FileNotFoundError:
+            # Not saved on its own: it may be part of the id's bundle
+            return self.load_many(id, [datatype])[datatype]
+        record_cache_lookup("joblib", datatype, hit=True)
+        record_cache_bytes("joblib", datatype, "read", os.path.getsize(path))
+        self.index.touch(id)
+        return data
+
+    def load_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        datatypes = list(datatypes)
+        manifest = session_bundle.read_manifest_file(self._get_manifest_path(id)) or {"entries": {}}
+        blobs = {}
+        for datatype in datatypes:
+            entry = manifest["entries"].get(datatype)
+            if entry is None or entry["blob"] in blobs:
+                continue
+            try:
+                blobs[entry["blob"]] = session_bundle.read_blob_file(self._get_blob_path(entry["blob"]), entry["blob"])
+            except FileNotFoundError:
+                pass  # Collected since the manifest was read: the session was just evicted
+
+        bundled = [datatype for datatype in datatypes
+                   if datatype in manifest["entries"] and manifest["entries"][datatype]["blob"] in blobs]
+        result = session_bundle.unpack_many(manifest, blobs, bundled)
+        for datatype in bundled:
+            record_cache_lookup("joblib", datatype, hit=True)
+            record_cache_bytes("joblib", datatype, "read", blobs[manifest["entries"][datatype]["blob"]].nbytes)
+
+        for datatype in datatypes:
+            if datatype in result:
+                continue
+            path = self._get_path(id, datatype)
+            try:
+                result[datatype] = joblib.load(path)
+            except FileNotFoundError:
+                record_cache_lookup("joblib", datatype, hit=False)
+                raise
+            record_cache_lookup("joblib", datatype, hit=True)
+            record_cache_bytes("joblib", datatype, "read", os.path.getsize(path))
+        self.index.touch(id)
+        return {datatype: result[datatype] for datatype in datatypes}
 
     def exists(self, id: str, datatype: str) -> bool:
-        return os.path.exists(self._get_path(id, datatype))
+        found = self.index.file_of(id, datatype) is not None
+        record_cache_lookup("joblib", datatype, hit=found)
+        return found
 
     def delete(self, id: str, datatype: str) -> None:
         path = self._get_path(id, datatype)
         if os.path.exists(path):
             os.remove(path)
+            self.index.remove_file(id, os.path.basename(path))
+        self._delete_from_manifest(id, datatype)
+
+    def _delete_from_manifest(self, id: str, datatype: str) -> None:
+        path = self._get_manifest_path(id)
+        with self._bundle_lock:
+            manifest = session_bundle.read_manifest_file(path)
+            if manifest is None or datatype not in manifest["entries"]:
+                return
+            digest = manifest["entries"].pop(datatype)["blob"]
+            if manifest["entries"]:
+                session_bundle.write_manifest_file(path, manifest)
+                self.index.add(id, os.path.basename(path), list(manifest["entries"]), os.path.getsize(path))
+            else:
+                os.remove(path)
+                self.index.remove_file(id, os.path.basename(path))
+        if all(entry["blob"] != digest for entry in manifest["entries"].values()):
+            self.index.release_blobs(id, [digest])
+            self._collect_blobs()
+
+    def _collect_blobs(self) -> None:
+        """Removes the blob files no session references any more."""
+        def remove(digest: str) -> None:
+            try:
+                os.remove(self._get_blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+        self.index.collect_blobs(remove)
+
+    # --- Index and eviction ---
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """Every id held by the cache with its size on disk, creation and last access time."""
+        return self.index.sessions()
+
+    def touch(self, id: str) -> None:
+        self.index.touch(id)
+
+    def add_evict_listener(self, listener: Callable[[str], None]) -> None:
+        """Calls `listener(id)` after each eviction, e.g. to drop copies held in memory."""
+        self._evict_listeners.append(listener)
+
+    def evict(self, id: str) -> None:
+        """Removes every file of an id, and the blobs no other id references."""
+        for file in self.index.files(id):
+            try:
+                os.remove(os.path.join(self.cache_dir, file))
+            except FileNotFoundError:
+                pass
+            self.index.remove_file(id, file)
+        self.index.release_blobs(id)
+        self._collect_blobs()
+        for listener in self._evict_listeners:
+            try:
+                listener(id)
+            except Exception as e:
+                logger.warning("Joblib cache evict listener failed", id=id, error=str(e))
+
+    def sweep(self) -> List[str]:
+        """
+        Evicts the sessions past their TTL, then the least recently read ones until the
+        cache fits its byte budget. Runs in one process at a time.
+
+        Returns:
+            List[str]: The evicted ids.
+        """
+        lock = self.get_lock()
+        token = lock.acquire("joblib_cache_sweep", self.sweep_interval or 60)
+        if token is None:
+            return []  # Another worker is sweeping
+        try:
+            expire_before = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else None
+            candidates = self.index.eviction_candidates(expire_before, self.max_bytes or None)
+            for candidate in candidates:
+                self.evict(candidate["id"])
+                SESSION_CACHE_EVICTIONS.labels("joblib", candidate["reason"]).inc()
+            SESSION_CACHE_DISK_BYTES.set(self.index.total_bytes())
+        finally:
+            lock.release("joblib_cache_sweep", token)
+        if candidates:
+            logger.info("Evicted sessions from the joblib cache", count=len(candidates),
+                        ids=[candidate["id"] for candidate in candidates])
+        return [candidate["id"] for candidate in candidates]
+
+    def _after_write(self) -> None:
+        # Wakes the sweeper early rather than letting the volume fill until its next run
+        if self._sweeper is not None and self.max_bytes > 0 and self.index.total_bytes() > self.max_bytes:
+            self._sweep_wakeup.set()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            self._sweep_wakeup.wait(self.sweep_interval)
+            self._sweep_wakeup.clear()
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.warning("Joblib cache sweep failed", error=str(e))
+
+    def _rebuild_index(self) -> None:
+        """Indexes the files of a cache directory written before it had an index."""
+        for id, file, datatypes, digests in self._scan():
+            stat = os.stat(os.path.join(self.cache_dir, file))
+            self.index.add(id, file, datatypes, stat.st_size, created=stat.st_mtime)
+            self.index.acquire_blobs(id, digests)
+        for file in os.listdir(os.path.join(self.cache_dir, BLOB_DIR)):
+            if file.endswith(".bin"):
+                self.index.set_blob_bytes(file[:-len(".bin")], os.path.getsize(os.path.join(self.cache_dir, BLOB_DIR, file)))
+        # Blobs left behind by a process that died between writing them and their manifest
+        self._collect_blobs()
+
+    def _scan(self) -> Iterable[Tuple[str, str, List[str], List[str]]]:
+        """The id, file name, datatypes and referenced blobs of every file of the cache."""
+        for file in os.listdir(self.cache_dir):
+            if file.endswith(f"_{MANIFEST_DATATYPE}.json"):
+                manifest = session_bundle.read_manifest_file(os.path.join(self.cache_dir, file))
+                if manifest is not None:
+                    digests = {entry["blob"] for entry in manifest["entries"].values()}
+                    yield file[:-len(f"_{MANIFEST_DATATYPE}.json")], file, list(manifest["entries"]), sorted(digests)
+                continue
+            if file.endswith(f"_{BUNDLE_DATATYPE}.bin"):
+                manifest = session_bundle.read_bundle_manifest(os.path.join(self.cache_dir, file))
+                if manifest is not None:
+                    yield file[:-len(f"_{BUNDLE_DATATYPE}.bin")], file, list(manifest["entries"]), []
+                continue
+            match = _FILE_NAME.match(file) or re.match(r"^(?P<id>[^_]+)_(?P<datatype>.+)\.pkl$", file)
+            if match:
+                yield match["id"], file, [match["datatype"]], []
@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.cache.distributed_lock import DistributedLock
+from app.cache.session_cache_manager import SessionCacheManager
+
+
+class MemoizedSessionCache(SessionCacheManager):
+    """
+    Read-through memo over another SessionCacheManager.
+
+    Meant to be short-lived (one request or batch): every datatype is loaded from the
+    backend at most once and the same object is handed to every caller afterwards, so
+    callers must treat loaded objects as read-only.
+    """
+
+    def __init__(self, backend: SessionCacheManager):
+        self.backend = backend
+        self._loaded: Dict[Tuple[str, str], object] = {}
+
+    def save(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        self.backend.save(id, datatype, data, ttl)
+        self._loaded[(id, datatype)] = data
+
+    def load(self, id: str, datatype: str) -> object:
+        key = (id, datatype)
+        if key not in self._loaded:
+            self._loaded[key] = self.backend.load(id, datatype)
+        return self._loaded[key]
+
+    def save_many(self, id: str, items: Dict[str, object]) -> None:
+        self.backend.save_many(id, items)
+        for datatype, data in items.items():
+            self._loaded[(id, datatype)] = data
+
+    def load_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        datatypes = list(datatypes)
+        missing = [datatype for datatype in datatypes if (id, datatype) not in self._loaded]
+        if missing:
+            for datatype, data in self.backend.load_many(id, missing).items():
+                self._loaded[(id, datatype)] = data
+        return {datatype: self._loaded[(id, datatype)] for datatype in datatypes}
+
+    def exists(self, id: str, datatype: str) -> bool:
+        return (id, datatype) in self._loaded or self.backend.exists(id, datatype)
+
+    def expire(self, id: str, datatypes: Iterable[str], ttl: int) -> bool:
+        return self.backend.expire(id, datatypes, ttl)
+
+    async def asave(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        await self.backend.asave(id, datatype, data, ttl)
+        self._loaded[(id, datatype)] = data
+
+    async def aload(self, id: str, datatype: str) -> object:
+        key = (id, datatype)
+        if key not in self._loaded:
+            self._loaded[key] = await self.backend.aload(id, datatype)
+        return self._loaded[key]
+
+    async def aexists(self, id: str, datatype: str) -> bool:
+        return (id, datatype) in self._loaded or await self.backend.aexists(id, datatype)
+
+    async def adelete(self, id: str, datatype: str) -> None:
+        self._loaded.pop((id, datatype), None)
+        await self.backend.adelete(id, datatype)
+
+    async def asave_many(self, id: str, items: Dict[str, object]) -> None:
+        await self.backend.asave_many(id, items)
+        for datatype, data in items.items():
+            self._loaded[(id, datatype)] = data
+
+    async def aload_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        datatypes = list(datatypes)
+        missing = [datatype for datatype in datatypes if (id, datatype) not in self._loaded]
+        if missing:
+            for datatype, data in (await self.backend.aload_many(id, missing)).items():
+                self._loaded[(id, datatype)] = data
+        return {datatype: self._loaded[(id, datatype)] for datatype in datatypes}
+
+    def get_lock(self) -> DistributedLock:
+        return self.backend.get_lock()
+
+    def delete(self, id: str, datatype: str) -> None:
+        self._loaded.pop((id, datatype), None)
+        self.backend.delete(id, datatype)
@@ -0,0 +1,462 @@
+import json
+import os
+import pickle
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+
+from app.cache.distributed_lock import DistributedLock
+from app.cache.session_cache_manager import SessionCacheManager
+from app.core.metrics import (
+    NEAR_CACHE_BYTES,
+    NEAR_CACHE_EVICTIONS,
+    NEAR_CACHE_ITEMS,
+    NEAR_CACHE_LOOKUPS,
+    datatype_label,
+)
+from app.core.worker_pool import WorkerPool, WorkerPoolFullError
+
+logger = structlog.get_logger(__name__)
+
+INVALIDATION_CHANNEL = "session-cache-invalidate"
+# Ids whose last forwarded touch is remembered, to throttle touches per id
+MAX_TOUCHED_IDS = 10000
+
+
+@dataclass(frozen=True)
+class NearCachePolicy:
+    """
+    How the near cache treats one datatype.
+
+    cache: Keep loaded and saved objects in memory.
+    ttl_seconds: Drop entries older than this (None: kept until evicted or invalidated).
+    max_item_bytes: Objects estimated larger than this are not kept (None: no limit).
+    """
+    cache: bool = True
+    ttl_seconds: Optional[float] = None
+    max_item_bytes: Optional[int] = None
+
+
+# Session artifacts are content-addressed and never change once written. Conversation
+# segments are rewritten under a lock by any pod, so they are always read from the backend.
+DEFAULT_POLICIES: Dict[str, NearCachePolicy] = {
+    "conversation": NearCachePolicy(cache=False),
+    "conversation_meta": NearCachePolicy(cache=False),
+    "artifact": NearCachePolicy(max_item_bytes=5 * 1024 * 1024),
+}
+
+
+class _ByteCounter:
+    def __init__(self):
+        self.count = 0
+
+    def write(self, data) -> int:
+        self.count += len(data)
+        return len(data)
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Approximate in-memory size of a cached object, for budgeting the cache. Arrays
+    and frames report their buffer sizes; anything else (models, SHAP explanations,
+    dicts) is measured by pickling it into a byte counter, with array buffers counted
+    out of band rather than copied.
+    """
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(obj, "memory_usage") and hasattr(obj, "dtypes"):
+        try:
+            return int(obj.memory_usage(index=True, deep=False).sum())
+        except Exception:
+            pass
+
+    counter = _ByteCounter()
+
+    def count_buffer(buffer: pickle.PickleBuffer) -> bool:
+        counter.count += buffer.raw().nbytes
+        return False
+
+    try:
+        pickle.Pickler(counter, protocol=5, buffer_callback=count_buffer).dump(obj)
+        return counter.count
+    except Exception:
+        return sys.getsizeof(obj)
+
+
+class NearSessionCache(SessionCacheManager):
+    """
+    In-process LRU in front of another SessionCacheManager (joblib or Redis), so the
+    session getters hand back already deserialized objects instead of unpickling and
+    decompressing them on every tool call.
+
+    The LRU is bounded by the estimated size of the objects it holds. Reads go to the
+    backend on a miss and fill the cache; writes go to the backend and then to the
+    cache. What is cached, and for how long, is decided per datatype (see
+    NearCachePolicy). Like MemoizedSessionCache, every caller gets the same object, so
+    loaded objects must be treated as read-only.
+
+    Across pods, saves and deletes are published on a Redis channel and every other
+    pod drops its copy. This is on by default when the backend is Redis. Ids the
+    backend evicts (joblib) are dropped here and published the same way.
+
+    Hits are reported to the backend with `touch`, at most once per
+    NEAR_CACHE_TOUCH_INTERVAL_SECONDS (default 60) per id, so a session served from
+    memory is not evicted from the backend as unused.
+
+    `exists` always asks the backend, which may have evicted or expired a session this
+    process still holds part of. When the backend no longer has a datatype, the other
+    local entries of its id are dropped as well, so callers never get a mix of stale and
+    missing artifacts.
+
+    Configuration (environment):
+        NEAR_CACHE_MAX_BYTES: Budget for cached objects (default 256 MiB).
+        NEAR_CACHE_POLICIES: JSON object of datatype -> policy fields, merged over the
+            defaults, e.g. '{"shap": {"ttl_seconds": 600}, "model": {"cache": false}}'.
+        NEAR_CACHE_INVALIDATION: "auto" (Redis backend only, default), "redis" (always,
+            on the shared client of app.cache.redis_connection) or "off".
+    """
+
+    _instances: Dict[str, "NearSessionCache"] = {}
+    _lock = Lock()
+
+    @classmethod
+    def get_instance(cls, backend: SessionCacheManager) -> "NearSessionCache":
+        """The near cache in front of `backend`, one per backend class per process."""
+        key = type(backend).__name__
+        if key not in cls._instances:
+            with cls._lock:
+                if key not in cls._instances:
+                    obj = super().__new__(cls)
+                    obj._initialize(backend)
+                    cls._instances[key] = obj
+        return cls._instances[key]
+
+    def _initialize(self, backend: SessionCacheManager):
+        self.backend = backend
+        self.max_bytes = int(os.getenv("NEAR_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        self.policies = dict(DEFAULT_POLICIES)
+        for datatype, fields in json.loads(os.getenv("NEAR_CACHE_POLICIES") or "{}").items():
+            self.policies[datatype] = NearCachePolicy(**fields)
+
+        # (id, datatype) -> (object, estimated bytes, time stored)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, int, float]]" = OrderedDict()
+        self._entries_lock = Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.touch_interval = float(os.getenv("NEAR_CACHE_TOUCH_INTERVAL_SECONDS", 60))
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+
+        self.node_id = uuid.uuid4().hex
+        self._publisher = None
+        self._subscriber = None
+        mode = os.getenv("NEAR_CACHE_INVALIDATION", "auto").lower()
+        if mode == "redis" or (mode == "auto" and getattr(backend, "redis", None) is not None):
+            self._start_invalidation(getattr(backend, "redis", None))
+        add_evict_listener = getattr(backend, "add_evict_listener", None)
+        if add_evict_listener is not None:
+            add_evict_listener(self._on_backend_evict)
+
+    def policy(self, datatype: str) -> NearCachePolicy:
+        return self.policies.get(datatype) or self.policies.get(datatype_label(datatype)) or NearCachePolicy()
+
+    # --- SessionCacheManager ---
+
+    def save(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        self.backend.save(id, datatype, data, ttl)
+        self._put(id, datatype, data)
+        self._publish(id, datatype)
+
+    def load(self, id: str, datatype: str) -> object:
+        found, data = self._get(id, datatype)
+        if found:
+            self._touch(id)
+            return data
+        try:
+            data = self.backend.load(id, datatype)
+        except FileNotFoundError:
+            self.invalidate_id(id)
+            raise
+        self._fill(id, {datatype: data})
+        return data
+
+    def save_many(self, id: str, items: Dict[str, object]) -> None:
+        self.backend.save_many(id, items)
+        for datatype, data in items.items():
+            self._put(id, datatype, data)
+            self._publish(id, datatype)
+
+    def load_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        datatypes = list(datatypes)
+        result = {}
+        missing = []
+        for datatype in datatypes:
+            found, data = self._get(id, datatype)
+            if found:
+                result[datatype] = data
+            else:
+                missing.append(datatype)
+        if result:
+            self._touch(id)
+        if missing:
+            try:
+                loaded = self.backend.load_many(id, missing)
+            except FileNotFoundError:
+                self.invalidate_id(id)
+                raise
+            if not self._fill(id, loaded):
+                return dict.fromkeys(datatypes)
+            result.update(loaded)
+        return {datatype: result[datatype] for datatype in datatypes}
+
+    def exists(self, id: str, datatype: str) -> bool:
+        return self.backend.exists(id, datatype)
+
+    def expire(self, id: str, datatypes: Iterable[str], ttl: int) -> bool:
+        return self.backend.expire(id, datatypes, ttl)
+
+    def touch(self, id: str) -> None:
+        self.backend.touch(id)
+
+    def delete(self, id: str, datatype: str) -> None:
+        self.backend.delete(id, datatype)
+        self.invalidate(id, datatype)
+        self._publish(id, datatype)
+
+    async def asave(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        await self.backend.asave(id, datatype, data, ttl)
+        self._put(id, datatype, data)
+        await self._apublish(id, [datatype])
+
+    async def aload(self, id: str, datatype: str) -> object:
+        found, data = self._get(id, datatype)
+        if found:
+            await self._atouch(id)
+            return data
+        try:
+            data = await self.backend.aload(id, datatype)
+        except FileNotFoundError:
+            self.invalidate_id(id)
+            raise
+        self._fill(id, {datatype: data})
+        return data
+
+    async def aexists(self, id: str, datatype: str) -> bool:
+        return await self.backend.aexists(id, datatype)
+
+    async def adelete(self, id: str, datatype: str) -> None:
+        await self.backend.adelete(id, datatype)
+        self.invalidate(id, datatype)
+        await self._apublish(id, [datatype])
+
+    async def asave_many(self, id: str, items: Dict[str, object]) -> None:
+        await self.backend.asave_many(id, items)
+        for datatype, data in items.items():
+            self._put(id, datatype, data)
+        await self._apublish(id, list(items))
+
+    async def aload_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        datatypes = list(datatypes)
+        result = {}
+        missing = []
+        for datatype in datatypes:
+            found, data = self._get(id, datatype)
+            if found:
+                result[datatype] = data
+            else:
+                missing.append(datatype)
+        if result:
+            await self._atouch(id)
+        if missing:
+            try:
+                loaded = await self.backend.aload_many(id, missing)
+            except FileNotFoundError:
+                self.invalidate_id(id)
+                raise
+            if not self._fill(id, loaded):
+                return dict.fromkeys(datatypes)
+            result.update(loaded)
+        return {datatype: result[datatype] for datatype in datatypes}
+
+    def get_lock(self) -> DistributedLock:
+        return self.backend.get_lock()
+
+    def _fill(self, id: str, loaded: Dict[str, object]) -> bool:
+        """
+        Caches what was loaded from the backend. If the backend missed any datatype (Redis
+        returns None for an expired id), the id is gone: its other local entries are dropped
+        and False is returned so the caller reports every datatype missing.
+        """
+        if any(data is None for data in loaded.values()):
+            self.invalidate_id(id)
+            return False
+        for datatype, data in loaded.items():
+            self._put(id, datatype, data)
+        return True
+
+    def _touch_due(self, id: str) -> bool:
+        now = time.monotonic()
+        with self._entries_lock:
+            if id in self._touched and now - self._touched[id] < self.touch_interval:
+                return False
+            self._touched[id] = now
+            self._touched.move_to_end(id)
+            while len(self._touched) > MAX_TOUCHED_IDS:
+                self._touched.popitem(last=False)
+            return True
+
+    def _touch(self, id: str) -> None:
+        if self._touch_due(id):
+            self.backend.touch(id)
+
+    async def _atouch(self, id: str) -> None:
+        if self._touch_due(id):
+            try:
+                await WorkerPool.get_instance().run_io(self.backend.touch, id)
+            except WorkerPoolFullError:
+                pass  # A missed touch only makes the id look idle a little earlier
+
+    # --- LRU ---
+
+    def _get(self, id: str, datatype: str, count: bool = True) -> Tuple[bool, Any]:
+        policy = self.policy(datatype)
+        if not policy.cache:
+            return False, None
+        key = (id, datatype)
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is not None and policy.ttl_seconds is not None and time.monotonic() - entry[2] > policy.ttl_seconds:
+                self._remove(key, "expired")
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if count:
+                if entry is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        if count:
+            NEAR_CACHE_LOOKUPS.labels(datatype_label(datatype), "hit" if entry is not None else "miss").inc()
+        return (True, entry[0]) if entry is not None else (False, None)
+
+    def _put(self, id: str, datatype: str, data: object) -> None:
+        policy = self.policy(datatype)
+        if not policy.cache:
+            return
+        size = estimate_size(data)
+        if size > self.max_bytes or (policy.max_item_bytes is not None and size > policy.max_item_bytes):
+            return
+        key = (id, datatype)
+        with self._entries_lock:
+            if key in self._entries:
+                self._remove(key, None)
+            self._entries[key] = (data, size, time.monotonic())
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)), "size")
+            self._update_gauges()
+
+    def _remove(self, key: Tuple[str, str], reason: Optional[str]) -> None:
+        # Caller holds _entries_lock
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+        if reason is not None:
+            NEAR_CACHE_EVICTIONS.labels(reason).inc()
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        NEAR_CACHE_BYTES.set(self.current_bytes)
+        NEAR_CACHE_ITEMS.set(len(self._entries))
+
+    def invalidate(self, id: str, datatype: str) -> None:
+        """Drops the local copy of an entry, if any (the backend is left alone)."""
+        with self._entries_lock:
+            if (id, datatype) in self._entries:
+                self._remove((id, datatype), "invalidated")
+
+    def invalidate_id(self, id: str) -> None:
+        """Drops the local copies of every datatype of an id."""
+        with self._entries_lock:
+            for key in [key for key in self._entries if key[0] == id]:
+                self._remove(key, "invalidated")
+            self._touched.pop(id, None)
+
+    def clear(self) -> None:
+        with self._entries_lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self._update_gauges()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._entries_lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidation": self._subscriber is not None,
+            }
+
+    # --- Cross-pod invalidation ---
+
+    def _start_invalidation(self, client) -> None:
+        try:
+            if client is None:
+                from app.cache.redis_connection import get_redis
+
+                client = get_redis()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+            self._subscriber = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=self._on_subscriber_error)
+            self._publisher = client
+        except Exception as e:
+            # Without invalidation a pod can keep serving an entry another pod replaced;
+            # session artifacts are content-addressed, so in practice only deletes are missed
+            logger.warning("Near cache invalidation disabled", error=str(e))
+
+    def _publish(self, id: str, datatype: Optional[str]) -> None:
+        # A datatype of None stands for every datatype of the id
+        if self._publisher is None or (datatype is not None and not self.policy(datatype).cache):
+            return
+        try:
+            self._publisher.publish(INVALIDATION_CHANNEL, json.dumps({"node": self.node_id, "id": id, "datatype": datatype}))
+        except Exception as e:
+            logger.warning("Could not publish near cache invalidation", id=id, datatype=datatype, error=str(e))
+
+    async def _apublish(self, id: str, datatypes: List[str]) -> None:
+        # The publisher is a blocking client, so publishing is left to the I/O pool
+        if self._publisher is not None:
+            for datatype in datatypes:
+                await WorkerPool.get_instance().run_io(self._publish, id, datatype)
+
+    def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError, KeyError):
+            return
+        if payload.get("node") == self.node_id:
+            return
+        if payload.get("datatype") is None:
+            self.invalidate_id(payload["id"])
+        else:
+            self.invalidate(payload["id"], payload["datatype"])
+
+    def _on_backend_evict(self, id: str) -> None:
+        self.invalidate_id(id)
+        self._publish(id, None)
+
+    def _on_subscriber_error(self, error: Exception, pubsub, thread) -> None:
+        # Entries may have changed while the subscription was down
+        logger.warning("Near cache invalidation listener error, clearing the cache", error=str(error))
+        self.clear()
+        time.sleep(1.0)
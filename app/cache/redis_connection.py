@@ -0,0 +1,86 @@
+import os
+from threading import Lock
+from typing import Any, Dict
+
+_client = None
+_client_lock = Lock()
+
+
+def cluster_enabled() -> bool:
+    return os.getenv("REDIS_CLUSTER", "false").lower() == "true"
+
+
+def connection_kwargs() -> Dict[str, Any]:
+    """
+    Connection settings shared by every Redis client of the process: the address and
+    credentials from app.core.config (REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_USER,
+    REDIS_PASSWORD), and the timeouts from the environment.
+    """
+    from app.core.config import settings
+
+    return dict(
+        host=settings.REDIS_HOST,
+        port=int(settings.REDIS_PORT),
+        db=int(settings.REDIS_DB or 0),
+        username=settings.REDIS_USER or None,
+        password=settings.REDIS_PASSWORD or None,
+        socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", 30)),
+        socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", 5)),
+        health_check_interval=30,
+        decode_responses=False,  # binary mode
+    )
+
+
+def get_redis():
+    """
+    The process-wide blocking Redis client. Its connections come from one bounded pool
+    (REDIS_MAX_CONNECTIONS, default 32) that callers wait on for up to
+    REDIS_POOL_TIMEOUT_SECONDS when every connection is in use. With REDIS_CLUSTER=true
+    it is a RedisCluster client, which keeps a pool per node.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def _create_client():
+    import redis
+
+    kwargs = connection_kwargs()
+    max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", 32))
+    if cluster_enabled():
+        from redis.cluster import RedisCluster
+
+        kwargs.pop("db")
+        return RedisCluster(max_connections=max_connections, **kwargs)
+    pool = redis.BlockingConnectionPool(
+        max_connections=max_connections,
+        timeout=float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", 5)),
+        **kwargs,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+def create_async_redis():
+    """
+    A new redis.asyncio client with its own bounded pool. Its connections belong to the
+    event loop it is first used on, so callers keep one per loop.
+    """
+    import redis.asyncio
+
+    kwargs = connection_kwargs()
+    max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", 32))
+    if cluster_enabled():
+        from redis.asyncio.cluster import RedisCluster
+
+        kwargs.pop("db")
+        return RedisCluster(max_connections=max_connections, **kwargs)
+    pool = redis.asyncio.BlockingConnectionPool(
+        max_connections=max_connections,
+        timeout=float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", 5)),
+        **kwargs,
+    )
+    return redis.asyncio.Redis(connection_pool=pool)
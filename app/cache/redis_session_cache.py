@@ -1,12 +1,129 @@
-import redis
+import asyncio
+import json
+import math
+import os
 import pickle
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
+from app.cache import codecs, session_bundle
+from app.cache.distributed_lock import RedisLock
+from app.cache.redis_connection import cluster_enabled, create_async_redis, get_redis
 from app.cache.session_cache_manager import SessionCacheManager
+from app.core.metrics import SESSION_CACHE_BLOB_WRITES, record_cache_bytes, record_cache_lookup
+
+# Each script touches a single key, so they also run on Redis Cluster. They are sent with
+# EVAL rather than registered, as they are short and EVALSHA cannot be pipelined safely
+# across a script cache flush.
+
+# KEYS[1]: a blob hash. ARGV[1]: TTL. Takes a reference to the blob if it is stored, and
+# keeps it at least as long as the session taking it. Returns the new count, 0 if absent.
+_ACQUIRE_BLOB_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'data') == 0 then
+    return 0
+end
+if redis.call('TTL', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return redis.call('HINCRBY', KEYS[1], 'refs', 1)
+"""
+
+# As above, first storing the blob (ARGV[2..]: field, value, ...) unless another writer did
+_PUT_BLOB_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], 'data') == 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+end
+if redis.call('TTL', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return redis.call('HINCRBY', KEYS[1], 'refs', 1)
+"""
+
+# KEYS[1]: a blob hash. Drops a reference; the last one deletes the blob with its chunks.
+_RELEASE_BLOB_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local refs = redis.call('HINCRBY', KEYS[1], 'refs', -1)
+if refs <= 0 then
+    redis.call('UNLINK', KEYS[1])
+end
+return refs
+"""
+
+# KEYS[1]: a session manifest. ARGV[1]: TTL, then field/value pairs. Replaces the manifest
+# and returns the digests the previous one pointed to.
+_SAVE_MANIFEST_SCRIPT = """
+local previous = redis.call('HVALS', KEYS[1])
+redis.call('DEL', KEYS[1])
+if #ARGV > 1 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return previous
+"""
+
+# KEYS[1]: a session manifest. ARGV[1]: a datatype. Removes its entry and returns its
+# digest when no other entry points to it (so the session's reference can be dropped).
+_DELETE_ENTRY_SCRIPT = """
+local digest = redis.call('HGET', KEYS[1], 'entry:' .. ARGV[1])
+if not digest then
+    return false
+end
+redis.call('HDEL', KEYS[1], 'entry:' .. ARGV[1])
+for _, other in ipairs(redis.call('HVALS', KEYS[1])) do
+    if other == digest then
+        return false
+    end
+end
+return digest
+"""
+
+_BLOB_FIELDS = ("data", "codec", "buffers")
+
+
+class _BlobRead(NamedTuple):
+    """Blobs being read: their stream and codec, and the chunks of their buffers still to fetch."""
+    streams: Dict[str, Tuple[bytes, str]]        # digest -> (compressed pickle stream, codec)
+    chunks: Dict[str, List[List[Tuple[str, str]]]]  # digest -> (key, field) of each chunk of each buffer
+
+    @property
+    def chunk_fetches(self) -> List[Tuple[str, str]]:
+        return [fetch for buffers in self.chunks.values() for fetches in buffers for fetch in fetches]
 
 
 class RedisSessionCache(SessionCacheManager):
+    """
+    Session cache on Redis, shared by every pod.
+
+    Single datatypes are stored one key each. Sessions saved with `save_many` are a
+    small manifest hash (datatype -> digest) pointing to content-addressed blob hashes
+    (see session_bundle), so artifacts identical across sessions (the same model
+    analysed by many users) are stored once. Each blob counts the sessions referencing
+    it and is deleted with the last one; it expires no earlier than the latest of them,
+    which also reclaims references left by sessions that expired rather than being
+    deleted.
+
+    Array buffers of at least REDIS_CHUNK_MIN_BYTES are kept out of the pickle stream,
+    split into REDIS_CHUNK_BYTES fields of the blob hash and fetched in parallel, so no
+    single value grows to the size of a SHAP matrix. Values are compressed with the
+    REDIS_CODEC codec.
+
+    With hash tags (on by default with REDIS_CLUSTER=true, or REDIS_HASH_TAGS=true) the
+    keys of a session share one cluster slot, as does a blob with its chunks.
+
+    Configuration (environment):
+        REDIS_DEFAULT_TTL: Seconds a session is kept (default 3600).
+        REDIS_CODEC: "zlib" (default), "none", "lz4" or "zstd" (the latter two need
+            their packages), or any codec added with codecs.register_codec.
+        REDIS_CHUNK_MIN_BYTES: Array buffers from this size are chunked (default 1 MiB).
+        REDIS_CHUNK_BYTES: Chunk size (default 4 MiB).
+        REDIS_FETCH_CONCURRENCY: Connections used to fetch chunks in parallel (default 4).
+    Connection settings are in app.cache.redis_connection.
+    """
+
     _instance = None
     _lock = Lock()
 
@@ -20,32 +137,325 @@ class RedisSessionCache(SessionCacheManager):
                     cls._instance = obj
         return cls._instance
 
-    def _initialize(self):
-        self.redis = redis.Redis(
-            host=os.getenv("REDIS_HOST", "localhost"),
-            port=int(os.getenv("REDIS_PORT", 6379)),
-            db=int(os.getenv("REDIS_DB", 0)),
-            decode_responses=False  # binary mode
-        )
+    def _initialize(self, client=None, async_client_factory: Optional[Callable[[], Any]] = None):
+        self.redis = client if client is not None else get_redis()
+        self._async_client_factory = async_client_factory or create_async_redis
         self.default_ttl = int(os.getenv("REDIS_DEFAULT_TTL", 3600))  # 1 hour default
+        self.codec = codecs.get_codec(os.getenv("REDIS_CODEC", "zlib"))
+        self.chunk_min_bytes = int(os.getenv("REDIS_CHUNK_MIN_BYTES", 1024 * 1024))
+        self.chunk_bytes = int(os.getenv("REDIS_CHUNK_BYTES", 4 * 1024 * 1024))
+        self.fetch_concurrency = max(1, int(os.getenv("REDIS_FETCH_CONCURRENCY", 4)))
+        self.hash_tags = os.getenv("REDIS_HASH_TAGS", str(cluster_enabled())).lower() == "true"
+        self._distributed_lock = RedisLock(self.redis)
+        self._fetch_executor: Optional[ThreadPoolExecutor] = None
+        self._fetch_executor_lock = Lock()
+        # redis.asyncio connections belong to the event loop they were opened on
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+    def _async_client(self):
+        """The redis.asyncio client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._async_client_factory()
+        return client
+
+    # --- Keys ---
+
+    def _tag(self, id: str) -> str:
+        return f"{{{id}}}" if self.hash_tags else id
 
     def _get_key(self, id: str, datatype: str) -> str:
-        return f"{datatype}:{id}"
+        return f"{datatype}:{self._tag(id)}"
+
+    def _get_manifest_key(self, id: str) -> str:
+        # A hash of "entry:<datatype>" -> blob digest
+        return f"manifest:{self._tag(id)}"
+
+    def _get_blob_key(self, digest: str) -> str:
+        # A hash with the blob's "data" (compressed pickle stream), "codec", "refs" and,
+        # when it has out-of-band buffers, their "buffers" layout and "chunk:<buffer>:<n>"
+        return f"blob:{self._tag(digest)}"
+
+    # --- Encoding, shared by the blocking and async methods ---
+
+    def _encode_value(self, datatype: str, data: object) -> bytes:
+        value = codecs.frame(self.codec, pickle.dumps(data, protocol=5))
+        record_cache_bytes("redis", datatype, "write", len(value))
+        return value
+
+    def _decode_value(self, datatype: str, value: Optional[bytes]) -> Optional[object]:
+        record_cache_lookup("redis", datatype, hit=value is not None)
+        if value is None:
+            return None
+        record_cache_bytes("redis", datatype, "read", len(value))
+        return pickle.loads(codecs.unframe(value))
+
+    def _queue_acquire_blobs(self, pipe, digests: Iterable[str], ttl: int) -> None:
+        for digest in digests:
+            pipe.eval(_ACQUIRE_BLOB_SCRIPT, 1, self._get_blob_key(digest), ttl)
+
+    def _queue_put_blob(self, pipe, digest: str, blob: session_bundle.Blob, ttl: int) -> None:
+        key = self._get_blob_key(digest)
+        fields = {"data": blob.data, "codec": blob.codec}
+        layout = []
+        for buffer_index, buffer in enumerate(blob.buffers):
+            count = max(1, math.ceil(buffer.nbytes / self.chunk_bytes))
+            layout.append([buffer.nbytes, count])
+            for chunk_index in range(count):
+                chunk = buffer[chunk_index * self.chunk_bytes:(chunk_index + 1) * self.chunk_bytes]
+                pipe.hset(key, f"chunk:{buffer_index}:{chunk_index}", codecs.frame(self.codec, chunk))
+        if layout:
+            fields["buffers"] = json.dumps(layout)
+            # The chunks of a writer that dies before the put below expire as well
+            pipe.expire(key, ttl, nx=True)
+        pipe.eval(_PUT_BLOB_SCRIPT, 1, key, ttl, *(item for pair in fields.items() for item in pair))
+
+    def _queue_release_blobs(self, pipe, digests: Iterable[str]) -> None:
+        for digest in digests:
+            pipe.eval(_RELEASE_BLOB_SCRIPT, 1, self._get_blob_key(digest))
+
+    def _manifest_args(self, ttl: int, manifest: Dict[str, Any]) -> List[Any]:
+        args = [ttl]
+        for datatype, entry in manifest["entries"].items():
+            args += [f"entry:{datatype}", entry["blob"]]
+        return args
+
+    def _record_save(self, manifest: Dict[str, Any], blobs: Dict[str, session_bundle.Blob], stored: int) -> None:
+        SESSION_CACHE_BLOB_WRITES.labels("redis", "stored").inc(stored)
+        SESSION_CACHE_BLOB_WRITES.labels("redis", "reused").inc(len(blobs) - stored)
+        for datatype, entry in manifest["entries"].items():
+            record_cache_bytes("redis", datatype, "write", blobs[entry["blob"]].nbytes)
+
+    def _start_blob_read(self, digests: List[str], rows: List[List[Optional[bytes]]]) -> _BlobRead:
+        streams = {}
+        chunks = {}
+        for digest, (data, codec, layout) in zip(digests, rows):
+            if data is None:
+                continue  # Evicted by Redis under memory pressure: the datatypes are missing
+            key = self._get_blob_key(digest)
+            streams[digest] = (data, codec.decode() if codec else "zlib")
+            chunks[digest] = [
+                [(key, f"chunk:{buffer_index}:{chunk_index}") for chunk_index in range(count)]
+                for buffer_index, (_, count) in enumerate(json.loads(layout) if layout else [])
+            ]
+        return _BlobRead(streams, chunks)
+
+    def _finish_blob_read(self, entries: Dict[str, str], read: _BlobRead,
+                          chunks: Dict[Tuple[str, str], Optional[bytes]]) -> Dict[str, object]:
+        """The datatypes whose blob and chunks were all found, deserialized."""
+        blobs = {}
+        for digest, (stream, codec) in read.streams.items():
+            buffers = []
+            for fetches in read.chunks[digest]:
+                values = [chunks.get(fetch) for fetch in fetches]
+                if any(value is None for value in values):
+                    break
+                # A bytearray, so the arrays come back writable as from a plain pickle
+                buffers.append(memoryview(bytearray().join(codecs.unframe(value) for value in values)))
+            else:
+                blobs[digest] = session_bundle.Blob(stream, tuple(buffers), codec)
+        found = {datatype: {"blob": digest} for datatype, digest in entries.items() if digest in blobs}
+        result = session_bundle.unpack_many({"entries": found}, blobs, found)
+        for datatype, entry in found.items():
+            record_cache_lookup("redis", datatype, hit=True)
+            record_cache_bytes("redis", datatype, "read", blobs[entry["blob"]].nbytes)
+        return result
+
+    def _fetch_groups(self, fetches: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        size = math.ceil(len(fetches) / min(self.fetch_concurrency, len(fetches)))
+        return [fetches[i:i + size] for i in range(0, len(fetches), size)]
+
+    def _fetch_group(self, group: List[Tuple[str, str]]) -> List[Optional[bytes]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for key, field in group:
+            pipe.hget(key, field)
+        return pipe.execute()
+
+    def _fetch_chunks(self, fetches: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[bytes]]:
+        """Fetches the chunks in up to REDIS_FETCH_CONCURRENCY pipelines, each on its own connection."""
+        if not fetches:
+            return {}
+        groups = self._fetch_groups(fetches)
+        if len(groups) == 1:
+            return dict(zip(fetches, self._fetch_group(groups[0])))
+        if self._fetch_executor is None:
+            with self._fetch_executor_lock:
+                if self._fetch_executor is None:
+                    self._fetch_executor = ThreadPoolExecutor(self.fetch_concurrency, thread_name_prefix="redis-fetch")
+        values = [value for group in self._fetch_executor.map(self._fetch_group, groups) for value in group]
+        return dict(zip(fetches, values))
+
+    async def _afetch_chunks(self, aredis, fetches: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[bytes]]:
+        if not fetches:
+            return {}
+
+        async def fetch_group(group: List[Tuple[str, str]]) -> List[Optional[bytes]]:
+            async with aredis.pipeline(transaction=False) as pipe:
+                for key, field in group:
+                    pipe.hget(key, field)
+                return await pipe.execute()
+
+        groups = await asyncio.gather(*(fetch_group(group) for group in self._fetch_groups(fetches)))
+        return dict(zip(fetches, (value for group in groups for value in group)))
+
+    @staticmethod
+    def _entries(datatypes: List[str], digests: List[Optional[bytes]]) -> Dict[str, str]:
+        return {datatype: digest.decode() for datatype, digest in zip(datatypes, digests) if digest}
+
+    # --- SessionCacheManager ---
 
     def save(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
-        key = self._get_key(id, datatype)
-        value = pickle.dumps(data)
-        self.redis.setex(key, ttl or self.default_ttl, value)
+        self.redis.set(self._get_key(id, datatype), self._encode_value(datatype, data), ex=ttl or self.default_ttl)
+
+    def save_many(self, id: str, items: Dict[str, object], ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.default_ttl
+        manifest, blobs = session_bundle.pack(items, codec=self.codec, mmap_min_bytes=self.chunk_min_bytes)
+        # Blobs another session already stored are only referenced, not uploaded again
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_acquire_blobs(pipe, blobs, ttl)
+        missing = [digest for digest, refs in zip(blobs, pipe.execute()) if not refs]
+        if missing:
+            pipe = self.redis.pipeline(transaction=False)
+            for digest in missing:
+                self._queue_put_blob(pipe, digest, blobs[digest], ttl)
+            pipe.execute()
+        # Readers see the previous manifest or the new one, whose blobs are all stored. The
+        # previous manifest's references are dropped only then, including those to blobs
+        # the new one shares, which were just taken again.
+        previous = self.redis.eval(_SAVE_MANIFEST_SCRIPT, 1, self._get_manifest_key(id), *self._manifest_args(ttl, manifest))
+        released = {digest.decode() for digest in previous}
+        if released:
+            pipe = self.redis.pipeline(transaction=False)
+            self._queue_release_blobs(pipe, released)
+            pipe.execute()
+        self._record_save(manifest, blobs, len(missing))
 
     def load(self, id: str, datatype: str) -> Optional[object]:
-        key = self._get_key(id, datatype)
-        value = self.redis.get(key)
-        return pickle.loads(value) if value is not None else None
+        value = self.redis.get(self._get_key(id, datatype))
+        if value is None:
+            # Not saved on its own: it may be part of the id's manifest
+            return self.load_many(id, [datatype])[datatype]
+        return self._decode_value(datatype, value)
+
+    def load_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, Optional[object]]:
+        datatypes = list(datatypes)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hmget(self._get_manifest_key(id), [f"entry:{datatype}" for datatype in datatypes])
+        pipe.mget([self._get_key(id, datatype) for datatype in datatypes])
+        digests, values = pipe.execute()
+        entries = self._entries(datatypes, digests)
+
+        distinct = list(dict.fromkeys(entries.values()))
+        rows = []
+        if distinct:
+            pipe = self.redis.pipeline(transaction=False)
+            for digest in distinct:
+                pipe.hmget(self._get_blob_key(digest), _BLOB_FIELDS)
+            rows = pipe.execute()
+        read = self._start_blob_read(distinct, rows)
+        result = self._finish_blob_read(entries, read, self._fetch_chunks(read.chunk_fetches))
+        for datatype, value in zip(datatypes, values):
+            if datatype not in result:
+                result[datatype] = self._decode_value(datatype, value)
+        return {datatype: result[datatype] for datatype in datatypes}
 
     def exists(self, id: str, datatype: str) -> bool:
-        key = self._get_key(id, datatype)
-        return self.redis.exists(key) == 1
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.exists(self._get_key(id, datatype))
+        pipe.hexists(self._get_manifest_key(id), f"entry:{datatype}")
+        found = any(pipe.execute())
+        record_cache_lookup("redis", datatype, hit=found)
+        return found
+
+    def expire(self, id: str, datatypes: Iterable[str], ttl: int) -> bool:
+        pipe = self.redis.pipeline(transaction=False)
+        for datatype in datatypes:
+            pipe.expire(self._get_key(id, datatype), ttl)
+        return all(pipe.execute())
 
     def delete(self, id: str, datatype: str) -> None:
-        key = self._get_key(id, datatype)
-        self.redis.delete(key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(self._get_key(id, datatype))
+        pipe.eval(_DELETE_ENTRY_SCRIPT, 1, self._get_manifest_key(id), datatype)
+        _, digest = pipe.execute()
+        if digest:
+            pipe = self.redis.pipeline(transaction=False)
+            self._queue_release_blobs(pipe, [digest.decode()])
+            pipe.execute()
+
+    # --- Async, on redis.asyncio ---
+
+    async def asave(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        aredis = self._async_client()
+        await aredis.set(self._get_key(id, datatype), self._encode_value(datatype, data), ex=ttl or self.default_ttl)
+
+    async def asave_many(self, id: str, items: Dict[str, object], ttl: Optional[int] = None) -> None:
+        aredis = self._async_client()
+        ttl = ttl or self.default_ttl
+        manifest, blobs = session_bundle.pack(items, codec=self.codec, mmap_min_bytes=self.chunk_min_bytes)
+        async with aredis.pipeline(transaction=False) as pipe:
+            self._queue_acquire_blobs(pipe, blobs, ttl)
+            missing = [digest for digest, refs in zip(blobs, await pipe.execute()) if not refs]
+        if missing:
+            async with aredis.pipeline(transaction=False) as pipe:
+                for digest in missing:
+                    self._queue_put_blob(pipe, digest, blobs[digest], ttl)
+                await pipe.execute()
+        previous = await aredis.eval(_SAVE_MANIFEST_SCRIPT, 1, self._get_manifest_key(id), *self._manifest_args(ttl, manifest))
+        released = {digest.decode() for digest in previous}
+        if released:
+            async with aredis.pipeline(transaction=False) as pipe:
+                self._queue_release_blobs(pipe, released)
+                await pipe.execute()
+        self._record_save(manifest, blobs, len(missing))
+
+    async def aload(self, id: str, datatype: str) -> Optional[object]:
+        aredis = self._async_client()
+        value = await aredis.get(self._get_key(id, datatype))
+        if value is None:
+            return (await self.aload_many(id, [datatype]))[datatype]
+        return self._decode_value(datatype, value)
+
+    async def aload_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, Optional[object]]:
+        aredis = self._async_client()
+        datatypes = list(datatypes)
+        async with aredis.pipeline(transaction=False) as pipe:
+            pipe.hmget(self._get_manifest_key(id), [f"entry:{datatype}" for datatype in datatypes])
+            pipe.mget([self._get_key(id, datatype) for datatype in datatypes])
+            digests, values = await pipe.execute()
+        entries = self._entries(datatypes, digests)
+
+        distinct = list(dict.fromkeys(entries.values()))
+        rows = []
+        if distinct:
+            async with aredis.pipeline(transaction=False) as pipe:
+                for digest in distinct:
+                    pipe.hmget(self._get_blob_key(digest), _BLOB_FIELDS)
+                rows = await pipe.execute()
+        read = self._start_blob_read(distinct, rows)
+        result = self._finish_blob_read(entries, read, await self._afetch_chunks(aredis, read.chunk_fetches))
+        for datatype, value in zip(datatypes, values):
+            if datatype not in result:
+                result[datatype] = self._decode_value(datatype, value)
+        return {datatype: result[datatype] for datatype in datatypes}
+
+    async def aexists(self, id: str, datatype: str) -> bool:
+        aredis = self._async_client()
+        async with aredis.pipeline(transaction=False) as pipe:
+            pipe.exists(self._get_key(id, datatype))
+            pipe.hexists(self._get_manifest_key(id), f"entry:{datatype}")
+            found = any(await pipe.execute())
+        record_cache_lookup("redis", datatype, hit=found)
+        return found
+
+    async def adelete(self, id: str, datatype: str) -> None:
+        aredis = self._async_client()
+        async with aredis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._get_key(id, datatype))
+            pipe.eval(_DELETE_ENTRY_SCRIPT, 1, self._get_manifest_key(id), datatype)
+            _, digest = await pipe.execute()
+        if digest:
+            async with aredis.pipeline(transaction=False) as pipe:
+                self._queue_release_blobs(pipe, [digest.decode()])
+                await pipe.execute()
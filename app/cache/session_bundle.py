@@ -0,0 +1,220 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import uuid
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from app.cache.codecs import Codec, get_codec
+
+# File layout: MAGIC, manifest length (8 bytes, big-endian), manifest JSON, then the blobs
+MAGIC = b"SESSBNDL"
+BUNDLE_FORMAT_VERSION = 2
+_HEADER = struct.Struct(">8sQ")
+# Raw array buffers start at a multiple of this, which satisfies any numpy dtype alignment
+_BUFFER_ALIGNMENT = 64
+
+
+class Blob(NamedTuple):
+    """One serialized object: its compressed pickle stream and out-of-band array buffers."""
+    data: bytes
+    buffers: Tuple[memoryview, ...] = ()
+    codec: str = "zlib"
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + sum(buffer.nbytes for buffer in self.buffers)
+
+
+def pack(items: Dict[str, Any], codec: Optional[Codec] = None,
+         mmap_min_bytes: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Blob]]:
+    """
+    Serializes several datatypes of one session in one pass, storing identical content
+    once (e.g. `X_test_transformed` when it is just `X_test`).
+
+    Args:
+        items (Dict[str, Any]): The objects to serialize, keyed by datatype.
+        codec (Codec, optional): Compression for the pickle streams (zlib by default).
+        mmap_min_bytes (int, optional): Contiguous array buffers (numpy arrays, and the
+            blocks of DataFrames) of at least this size are kept out of the pickle stream,
+            uncompressed, so a bundle file can be memory-mapped when read. None keeps
+            everything in the stream.
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Blob]]: The manifest, mapping each datatype to
+        its blob digest and uncompressed size, and the blobs keyed by digest.
+    """
+    codec = codec or get_codec("zlib")
+    manifest: Dict[str, Any] = {"version": BUNDLE_FORMAT_VERSION, "codec": codec.name, "entries": {}}
+    blobs: Dict[str, Blob] = {}
+    digest_by_object: Dict[int, Tuple[str, int]] = {}
+    for datatype, data in items.items():
+        if id(data) not in digest_by_object:
+            buffers = []
+
+            def keep_in_band(buffer: pickle.PickleBuffer) -> bool:
+                raw = buffer.raw()
+                if mmap_min_bytes is None or raw.nbytes < mmap_min_bytes:
+                    return True
+                buffers.append(raw)
+                return False
+
+            raw = pickle.dumps(data, protocol=5, buffer_callback=keep_in_band)
+            digest = hashlib.sha256(raw)
+            for buffer in buffers:
+                digest.update(buffer)
+            digest = digest.hexdigest()[:32]
+            if digest not in blobs:
+                blobs[digest] = Blob(codec.compress(raw), tuple(buffers), codec.name)
+            digest_by_object[id(data)] = (digest, len(raw) + sum(buffer.nbytes for buffer in buffers))
+        digest, size = digest_by_object[id(data)]
+        manifest["entries"][datatype] = {"blob": digest, "bytes": size}
+    return manifest, blobs
+
+
+def unpack(blob: Blob) -> Any:
+    return pickle.loads(get_codec(blob.codec).decompress(blob.data), buffers=blob.buffers)
+
+
+def unpack_many(manifest: Dict[str, Any], blobs: Dict[str, Blob], datatypes: Iterable[str]) -> Dict[str, Any]:
+    """Deserializes the requested datatypes; datatypes sharing a blob get the same object."""
+    objects: Dict[str, Any] = {}
+    result = {}
+    for datatype in datatypes:
+        digest = manifest["entries"][datatype]["blob"]
+        if digest not in objects:
+            objects[digest] = unpack(blobs[digest])
+        result[datatype] = objects[digest]
+    return result
+
+
+def write_bundle_file(path: str, manifest: Dict[str, Any], blobs: Dict[str, Blob]) -> None:
+    """
+    Writes a bundle file atomically: readers see either the previous bundle or the
+    complete new one, never a partial write. Readers that mapped the previous file
+    keep their views, as it is replaced rather than overwritten.
+    """
+    # Offsets are relative to the end of the header. The pickle streams come first, then
+    # the raw buffers, each aligned.
+    offset = 0
+    locations = {}
+    for digest, blob in blobs.items():
+        locations[digest] = {"offset": offset, "length": len(blob.data), "buffers": []}
+        offset += len(blob.data)
+    for digest, blob in blobs.items():
+        for buffer in blob.buffers:
+            offset += -offset % _BUFFER_ALIGNMENT
+            locations[digest]["buffers"].append([offset, buffer.nbytes])
+            offset += buffer.nbytes
+    header = json.dumps({**manifest, "blobs": locations}).encode("utf-8")
+    # Padded with spaces (valid trailing JSON whitespace) so the data starts aligned in the file
+    header += b" " * (-(_HEADER.size + len(header)) % _BUFFER_ALIGNMENT)
+    data_start = _HEADER.size + len(header)
+
+    with _atomic_file(path) as f:
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for blob in blobs.values():
+            f.write(blob.data)
+        for digest, blob in blobs.items():
+            for (buffer_offset, _), buffer in zip(locations[digest]["buffers"], blob.buffers):
+                f.write(b"\0" * (data_start + buffer_offset - f.tell()))
+                f.write(buffer)
+
+
+@contextmanager
+def _atomic_file(path: str) -> Iterator[BinaryIO]:
+    """A file that replaces `path` once completely written, or is removed on error."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_header(f: BinaryIO) -> Tuple[Dict[str, Any], int]:
+    magic, length = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a session bundle")
+    manifest = json.loads(f.read(length))
+    if manifest.get("version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported session bundle version: {manifest.get('version')}")
+    return manifest, _HEADER.size + length
+
+
+def read_bundle_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """The manifest of a bundle file, or None when there is no bundle."""
+    try:
+        with open(path, "rb") as f:
+            return _read_header(f)[0]
+    except FileNotFoundError:
+        return None
+
+
+def read_bundle_file(path: str, datatypes: Iterable[str]) -> Tuple[Dict[str, Any], Dict[str, Blob]]:
+    """
+    Reads the manifest and the blobs of the requested datatypes with a single open.
+
+    The raw array buffers are not read but memory-mapped: arrays unpacked from them are
+    read-only views on the page cache, shared by every process that maps the same file.
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Blob]]: The manifest and the blobs keyed by
+        digest (only those of requested datatypes present in the bundle).
+    """
+    with open(path, "rb") as f:
+        manifest, data_start = _read_header(f)
+        blobs = {}
+        mapped = None
+        for datatype in datatypes:
+            entry = manifest["entries"].get(datatype)
+            if entry is None or entry["blob"] in blobs:
+                continue
+            location = manifest["blobs"][entry["blob"]]
+            f.seek(data_start + location["offset"])
+            data = f.read(location["length"])
+            if location["buffers"] and mapped is None:
+                # The views keep the mapping alive after the file is closed, replaced or removed
+                mapped = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            buffers = tuple(mapped[data_start + offset:data_start + offset + length]
+                            for offset, length in location["buffers"])
+            blobs[entry["blob"]] = Blob(data, buffers, manifest.get("codec", "zlib"))
+    return manifest, blobs
+
+
+# Blobs shared between sessions are stored once each, in a bundle file holding just that
+# blob (so its buffers are memory-mapped as well), and a session is a manifest pointing
+# to them.
+
+def write_blob_file(path: str, digest: str, blob: Blob) -> None:
+    manifest = {"version": BUNDLE_FORMAT_VERSION, "codec": blob.codec, "entries": {digest: {"blob": digest, "bytes": blob.nbytes}}}
+    write_bundle_file(path, manifest, {digest: blob})
+
+
+def read_blob_file(path: str, digest: str) -> Blob:
+    return read_bundle_file(path, [digest])[1][digest]
+
+
+def write_manifest_file(path: str, manifest: Dict[str, Any]) -> None:
+    """Writes a session manifest (the "entries" of `pack`, without the blobs) atomically."""
+    with _atomic_file(path) as f:
+        f.write(json.dumps({"version": BUNDLE_FORMAT_VERSION, "entries": manifest["entries"]}).encode("utf-8"))
+
+
+def read_manifest_file(path: str) -> Optional[Dict[str, Any]]:
+    """A session manifest, or None when the session has none."""
+    try:
+        with open(path, "rb") as f:
+            manifest = json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported session manifest version: {manifest.get('version')}")
+    return manifest
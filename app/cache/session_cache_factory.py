@@ -2,6 +2,7 @@ import os
 from app.cache.session_cache_manager import SessionCacheManager
 from app.cache.joblib_session_cache import JoblibSessionCache
 from app.cache.redis_session_cache import RedisSessionCache
+from app.cache.near_session_cache import NearSessionCache
 # from app.cache.s3_session_cache import S3SessionCache  # Optional: add later
 
 
@@ -10,22 +11,28 @@ class SessionCacheFactory:
     Factory to instantiate a SessionCacheManager backend.
 
     Supports:
-    - joblib: in-memory or file-based
+    - joblib: file-based, in JOBLIB_CACHE_DIR
     - redis: remote Redis server
     - (optional) s3: S3-based object cache
+
+    Unless NEAR_CACHE_ENABLED is "false", the backend is fronted by the process-wide
+    in-memory NearSessionCache.
     """
 
     @staticmethod
     def get_cache_manager() -> SessionCacheManager:
+        backend_cache = SessionCacheFactory.get_backend()
+        if os.getenv("NEAR_CACHE_ENABLED", "true").lower() == "false":
+            return backend_cache
+        return NearSessionCache.get_instance(backend_cache)
+
+    @staticmethod
+    def get_backend() -> SessionCacheManager:
+        """The configured backend itself, without the in-memory near cache."""
         backend = os.getenv("SESSION_CACHE_BACKEND", "joblib").lower()
 
         if backend == "joblib":
-            location_mode = os.getenv("JOBLIB_CACHE_LOCATION", "file").lower()
-            if location_mode == "memory":
-                return JoblibSessionCache.get_instance(location=None)
-            else:
-                path = os.getenv("JOBLIB_CACHE_DIR", "./cache_data")
-                return JoblibSessionCache.get_instance(location=path)
+            return JoblibSessionCache.get_instance()
 
         elif backend == "redis":
             return RedisSessionCache.get_instance()
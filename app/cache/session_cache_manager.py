@@ -1,8 +1,16 @@
 from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+
+from app.cache.distributed_lock import DistributedLock, LocalLock
+from app.core.worker_pool import WorkerPool
 
 class SessionCacheManager(ABC):
     @abstractmethod
-    def save(self, id: str, datatype: str, data: object) -> None:
+    def save(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        """
+        Saves one datatype of an id. Backends that expire entries keep it `ttl` seconds
+        (their default when None); the others keep it until it is deleted or evicted.
+        """
         pass
 
     @abstractmethod
@@ -16,3 +24,70 @@ class SessionCacheManager(ABC):
     @abstractmethod
     def delete(self, id: str, datatype: str) -> None:
         pass
+
+    def save_many(self, id: str, items: Dict[str, object]) -> None:
+        """
+        Saves several datatypes of one id. Backends that can, write them in one pass
+        as a single bundle that becomes visible all at once; the default saves them one
+        by one, in the order given.
+        """
+        for datatype, data in items.items():
+            self.save(id, datatype, data)
+
+    def load_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        """
+        Loads several datatypes of one id, keyed by datatype. Backends that can, fetch
+        them in one round trip; a missing datatype is handled as `load` handles it.
+        """
+        return {datatype: self.load(id, datatype) for datatype in datatypes}
+
+    def expire(self, id: str, datatypes: Iterable[str], ttl: int) -> bool:
+        """
+        Keeps already saved datatypes of an id for another `ttl` seconds, so entries saved
+        at different times expire together. Backends that expire entries one by one
+        override this; the others keep entries until deleted or evicted, so the default
+        only checks that they are still there.
+
+        Returns:
+            bool: False if any of the datatypes is no longer stored.
+        """
+        return all(self.exists(id, datatype) for datatype in datatypes)
+
+    def touch(self, id: str) -> None:
+        """
+        Records a read of an id that was served without the backend (e.g. by a near
+        cache). Backends that evict the least recently read ids override this; the
+        default does nothing.
+        """
+        pass
+
+    # Async variants, for code running on the event loop. The defaults run the blocking
+    # methods in the I/O worker pool (so they may raise WorkerPoolFullError); backends
+    # with an async client override them.
+
+    async def asave(self, id: str, datatype: str, data: object, ttl: Optional[int] = None) -> None:
+        await WorkerPool.get_instance().run_io(self.save, id, datatype, data, ttl)
+
+    async def aload(self, id: str, datatype: str) -> object:
+        return await WorkerPool.get_instance().run_io(self.load, id, datatype)
+
+    async def aexists(self, id: str, datatype: str) -> bool:
+        return await WorkerPool.get_instance().run_io(self.exists, id, datatype)
+
+    async def adelete(self, id: str, datatype: str) -> None:
+        await WorkerPool.get_instance().run_io(self.delete, id, datatype)
+
+    async def asave_many(self, id: str, items: Dict[str, object]) -> None:
+        await WorkerPool.get_instance().run_io(self.save_many, id, items)
+
+    async def aload_many(self, id: str, datatypes: Iterable[str]) -> Dict[str, object]:
+        return await WorkerPool.get_instance().run_io(self.load_many, id, list(datatypes))
+
+    def get_lock(self) -> DistributedLock:
+        """
+        Returns the lock shared by every process using this cache. Backends shared
+        between processes override this; the default only excludes within this process.
+        """
+        if getattr(self, "_distributed_lock", None) is None:
+            self._distributed_lock = LocalLock()
+        return self._distributed_lock
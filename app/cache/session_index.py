@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id TEXT NOT NULL,
+    file TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (id, file)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id TEXT NOT NULL,
+    datatype TEXT NOT NULL,
+    file TEXT NOT NULL,
+    PRIMARY KEY (id, datatype)
+);
+CREATE INDEX IF NOT EXISTS files_last_access ON files (last_access);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    refs INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (id, digest)
+);
+CREATE INDEX IF NOT EXISTS blobs_refs ON blobs (refs);
+"""
+
+
+class SessionIndex:
+    """
+    SQLite index of the files of a joblib session cache: which file holds each
+    (id, datatype), and the size, creation and last access time of every file. It also
+    counts the references to each shared blob (one per id whose manifest points to it),
+    so a blob is removed with the last session using it.
+
+    It answers `exists` without touching the cache directory, lists the sessions held,
+    and picks the sessions to evict. The database lives in the cache directory and is
+    shared by every process using it (WAL mode, one connection per thread).
+
+    Last access times are written at most once per `touch_interval` seconds per id, so
+    reads do not turn into a database write each. The time of the last write is kept for
+    the `max_touched` most recently read ids, and dropped when an id's files are removed.
+    """
+
+    def __init__(self, path: str, touch_interval: float = 60.0, max_touched: int = 10000):
+        self.path = path
+        self.touch_interval = touch_interval
+        self.max_touched = max_touched
+        self._local = threading.local()
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        self._touched_lock = threading.Lock()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def add(self, id: str, file: str, datatypes: Iterable[str], size: int, created: Optional[float] = None) -> None:
+        """Records that `file` (replacing any previous version of it) holds `datatypes` of `id`."""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries WHERE id = ? AND file = ?", (id, file))
+            db.execute(
+                "INSERT INTO files (id, file, bytes, created, last_access) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id, file) DO UPDATE SET bytes = excluded.bytes, last_access = excluded.last_access",
+                (id, file, size, created or now, created or now),
+            )
+            db.executemany("INSERT OR REPLACE INTO entries (id, datatype, file) VALUES (?, ?, ?)",
+                           [(id, datatype, file) for datatype in datatypes])
+
+    def remove(self, id: str, datatype: str) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries WHERE id = ? AND datatype = ?", (id, datatype))
+
+    def remove_file(self, id: str, file: str) -> None:
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries WHERE id = ? AND file = ?", (id, file))
+            db.execute("DELETE FROM files WHERE id = ? AND file = ?", (id, file))
+        with self._touched_lock:
+            self._touched.pop(id, None)
+
+    def file_of(self, id: str, datatype: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT file FROM entries WHERE id = ? AND datatype = ?", (id, datatype)).fetchone()
+        return row[0] if row else None
+
+    def files(self, id: str) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT file FROM files WHERE id = ?", (id,))]
+
+    def touch(self, id: str) -> None:
+        now = time.time()
+        with self._touched_lock:
+            if now - self._touched.get(id, 0.0) < self.touch_interval:
+                return
+            self._touched[id] = now
+            self._touched.move_to_end(id)
+            while len(self._touched) > self.max_touched:
+                self._touched.popitem(last=False)
+        with self._transaction() as db:
+            db.execute("UPDATE files SET last_access = ? WHERE id = ?", (now, id))
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """
+        Every id in the cache with its creation and last access time, most recent first,
+        and the bytes of its files and of the blobs it references (shared blobs are
+        counted for each id).
+        """
+        rows = self._connection().execute(
+            "SELECT f.id, f.bytes + COALESCE(b.bytes, 0), f.created, f.last_access FROM "
+            "(SELECT id, SUM(bytes) AS bytes, MIN(created) AS created, MAX(last_access) AS last_access "
+            " FROM files GROUP BY id) AS f "
+            "LEFT JOIN (SELECT r.id, SUM(blobs.bytes) AS bytes FROM blob_refs AS r JOIN blobs USING (digest) "
+            " GROUP BY r.id) AS b USING (id) "
+            "ORDER BY f.last_access DESC")
+        return [{"id": id, "bytes": size, "created": created, "last_access": last_access}
+                for id, size, created, last_access in rows]
+
+    def total_bytes(self) -> int:
+        return self._connection().execute(
+            "SELECT (SELECT COALESCE(SUM(bytes), 0) FROM files) + (SELECT COALESCE(SUM(bytes), 0) FROM blobs)").fetchone()[0]
+
+    # --- Shared blobs ---
+
+    def acquire_blobs(self, id: str, digests: Iterable[str]) -> None:
+        """Adds a reference from `id` to each blob it does not reference yet."""
+        with self._transaction() as db:
+            for digest in digests:
+                if db.execute("INSERT OR IGNORE INTO blob_refs (id, digest) VALUES (?, ?)", (id, digest)).rowcount:
+                    db.execute("INSERT INTO blobs (digest, bytes, refs) VALUES (?, 0, 1) "
+                               "ON CONFLICT (digest) DO UPDATE SET refs = refs + 1", (digest,))
+
+    def release_blobs(self, id: str, digests: Optional[Iterable[str]] = None) -> None:
+        """Drops the references from `id` to `digests` (all of its blobs when None)."""
+        with self._transaction() as db:
+            if digests is None:
+                digests = [row[0] for row in db.execute("SELECT digest FROM blob_refs WHERE id = ?", (id,))]
+            for digest in digests:
+                if db.execute("DELETE FROM blob_refs WHERE id = ? AND digest = ?", (id, digest)).rowcount:
+                    db.execute("UPDATE blobs SET refs = refs - 1 WHERE digest = ?", (digest,))
+
+    def blobs_of(self, id: str) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT digest FROM blob_refs WHERE id = ?", (id,))]
+
+    def set_blob_bytes(self, digest: str, size: int) -> None:
+        """Records the size of a blob's file; a blob not referenced yet is recorded with no references."""
+        with self._transaction() as db:
+            db.execute("INSERT INTO blobs (digest, bytes, refs) VALUES (?, ?, 0) "
+                       "ON CONFLICT (digest) DO UPDATE SET bytes = excluded.bytes", (digest, size))
+
+    def collect_blobs(self, remove: Callable[[str], None]) -> List[str]:
+        """
+        Calls `remove` for every blob no id references any more and forgets them. It runs
+        inside the write transaction, so a writer taking a new reference to one of these
+        blobs waits until its file is gone, then writes it again.
+
+        Returns:
+            List[str]: The digests removed.
+        """
+        with self._transaction() as db:
+            digests = [row[0] for row in db.execute("SELECT digest FROM blobs WHERE refs <= 0")]
+            for digest in digests:
+                remove(digest)
+                db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        return digests
+
+    def is_empty(self) -> bool:
+        return self._connection().execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def eviction_candidates(self, expire_before: Optional[float], max_bytes: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        The ids to evict, each with the reason: "ttl" when last accessed before
+        `expire_before`, then "size" for the least recently accessed of the rest until
+        the remaining total fits in `max_bytes`. Evicting an id frees its files and the
+        blobs no other id still references.
+        """
+        db = self._connection()
+        refs = {}
+        blob_bytes = {}
+        for digest, size, count in db.execute("SELECT digest, bytes, refs FROM blobs"):
+            refs[digest], blob_bytes[digest] = count, size
+        blobs_by_id: Dict[str, List[str]] = {}
+        for id, digest in db.execute("SELECT id, digest FROM blob_refs"):
+            blobs_by_id.setdefault(id, []).append(digest)
+
+        candidates = []
+        total = self.total_bytes()
+        for id, size, last_access in db.execute(
+                "SELECT id, SUM(bytes), MAX(last_access) FROM files GROUP BY id ORDER BY MAX(last_access)").fetchall():
+            if expire_before is not None and last_access < expire_before:
+                reason = "ttl"
+            elif max_bytes is not None and total > max_bytes:
+                reason = "size"
+            else:
+                continue
+            candidates.append({"id": id, "reason": reason})
+            total -= size
+            for digest in blobs_by_id.get(id, []):
+                refs[digest] -= 1
+                if refs[digest] == 0:
+                    total -= blob_bytes[digest]
+        return candidates
+
+    def close(self) -> None:
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
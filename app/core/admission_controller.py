@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import time
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, AsyncIterator, Dict
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a request cannot be admitted: the wait queue is full or the wait timed out."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Too many concurrent agent requests ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds concurrent agent runs globally and per API key.
+
+    A request first takes a slot of its API key, then a global slot, so a single
+    client flooding the service queues on its own limit without holding global
+    slots. Requests that cannot be admitted right away wait in a bounded queue;
+    once the queue is full, or a request waited too long, it is rejected so the
+    caller can answer 429 with Retry-After instead of piling up work.
+
+    Configuration (environment):
+        AGENT_MAX_CONCURRENCY: Agent runs executing at once across all keys (default 16).
+        AGENT_MAX_CONCURRENCY_PER_KEY: Agent runs executing at once per API key (default 4).
+        AGENT_MAX_QUEUE: Requests allowed to wait for a slot (default 32).
+        AGENT_QUEUE_TIMEOUT_SECONDS: Longest a request waits for a slot (default 10).
+        AGENT_RETRY_AFTER_SECONDS: Retry-After hint for rejected requests (default 5).
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    @classmethod
+    def get_instance(cls) -> "AdmissionController":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    obj = super().__new__(cls)
+                    obj._initialize()
+                    cls._instance = obj
+        return cls._instance
+
+    def _initialize(self):
+        self.max_concurrency = int(os.getenv("AGENT_MAX_CONCURRENCY", 16))
+        self.max_concurrency_per_key = int(os.getenv("AGENT_MAX_CONCURRENCY_PER_KEY", 4))
+        self.max_queue = int(os.getenv("AGENT_MAX_QUEUE", 32))
+        self.queue_timeout = float(os.getenv("AGENT_QUEUE_TIMEOUT_SECONDS", 10))
+        self.retry_after = int(os.getenv("AGENT_RETRY_AFTER_SECONDS", 5))
+
+        self._global_slots = asyncio.Semaphore(self.max_concurrency)
+        self._key_slots: Dict[str, asyncio.Semaphore] = {}
+        self._active: Dict[str, int] = {}
+        self._waiting = 0
+        self._admitted = 0
+        self._rejected: Dict[str, int] = {"queue_full": 0, "timeout": 0}
+        self._queue_time_total = 0.0
+        self._queue_time_max = 0.0
+
+    @staticmethod
+    def _key_label(api_key: str) -> str:
+        # Never keep raw API keys in stats or logs
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+    def _reject(self, reason: str, key_label: str) -> AdmissionRejectedError:
+        self._rejected[reason] += 1
+        logger.warning("Agent request rejected", reason=reason, api_key=key_label, waiting=self._waiting)
+        return AdmissionRejectedError(reason, self.retry_after)
+
+    async def _acquire(self, key_slots: asyncio.Semaphore) -> None:
+        await key_slots.acquire()
+        try:
+            await self._global_slots.acquire()
+        except BaseException:
+            key_slots.release()
+            raise
+
+    @asynccontextmanager
+    async def admit(self, api_key: str) -> AsyncIterator[float]:
+        """
+        Holds a global and a per-key slot for the duration of the block.
+
+        Yields:
+            float: Seconds the request waited for its slots.
+
+        Raises:
+            AdmissionRejectedError: If the wait queue is full or the wait timed out.
+        """
+        key_label = self._key_label(api_key)
+        key_slots = self._key_slots.setdefault(key_label, asyncio.Semaphore(self.max_concurrency_per_key))
+
+        queued_at = time.perf_counter()
+        if not key_slots.locked() and not self._global_slots.locked():
+            await self._acquire(key_slots)  # Free slots: acquired without suspending
+        else:
+            if self._waiting >= self.max_queue:
+                raise self._reject("queue_full", key_label)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._acquire(key_slots), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("timeout", key_label)
+            finally:
+                self._waiting -= 1
+
+        queue_time = time.perf_counter() - queued_at
+        self._admitted += 1
+        self._queue_time_total += queue_time
+        self._queue_time_max = max(self._queue_time_max, queue_time)
+        self._active[key_label] = self._active.get(key_label, 0) + 1
+        try:
+            yield queue_time
+        finally:
+            self._active[key_label] -= 1
+            self._global_slots.release()
+            key_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_concurrency_per_key": self.max_concurrency_per_key,
+            "max_queue": self.max_queue,
+            "active": sum(self._active.values()),
+            "active_per_key": {label: count for label, count in self._active.items() if count},
+            "waiting": self._waiting,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "queue_time_seconds": {
+                "total": round(self._queue_time_total, 3),
+                "max": round(self._queue_time_max, 3),
+                "avg": round(self._queue_time_total / self._admitted, 3) if self._admitted else 0.0,
+            },
+        }
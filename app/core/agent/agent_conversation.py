@@ -0,0 +1,53 @@
+import uuid
+from typing import Any, List, Optional
+
+from llama_index.core.llms import ChatMessage
+from llama_index.core.memory import BaseMemory
+from llama_index.core.workflow.handler import WorkflowHandler
+
+from app.core.agent.kernel.savant_agent_kernel import SavantFunctionAgentKernel
+
+
+class AgentConversation:
+    """
+    An agent conversation kept alive across turns, e.g. for the lifetime of a WebSocket.
+
+    The Context is created once and every turn runs on it, so the chat memory, the
+    scratchpad and whatever is bound into the context (session id, loaded session)
+    carry over: a turn only supplies the new user message, not the whole history.
+    Turns must not overlap; run the next one after the previous handler has finished.
+
+    Example:
+        >>> conversation = AgentConversation(kernel, chat_history=previous_messages)
+        >>> await conversation.bind(session_id=session_id, model_analyzer_session=session)
+        >>> response = await conversation.run("Which features matter most?")
+        >>> response = await conversation.run("And for the negative class?")
+    """
+
+    def __init__(self, kernel: SavantFunctionAgentKernel, chat_history: Optional[List[ChatMessage]] = None,
+                 conversation_id: Optional[str] = None):
+        self.kernel = kernel
+        self.context = kernel.new_context()
+        self.conversation_id = conversation_id or str(uuid.uuid4())
+        self.turns = 0
+        # Seeds the memory on the first turn only; later turns read it from the context
+        self._initial_history = list(chat_history or [])
+
+    async def bind(self, **values: Any) -> None:
+        """Stores values in the conversation's context, alongside its `conversation_id`."""
+        await self.context.set("conversation_id", self.conversation_id)
+        for key, value in values.items():
+            await self.context.set(key, value)
+
+    def run(self, user_msg: str) -> WorkflowHandler:
+        """Starts the next turn and returns its handler (await it, or stream its events)."""
+        chat_history, self._initial_history = self._initial_history, []
+        self.turns += 1
+        return self.kernel.run(user_msg=user_msg, chat_history=chat_history, ctx=self.context)
+
+    async def history(self) -> List[ChatMessage]:
+        """The messages remembered so far."""
+        memory: Optional[BaseMemory] = await self.context.get("memory", default=None)
+        if memory is None:
+            return list(self._initial_history)
+        return await memory.aget_all()
@@ -1,7 +1,7 @@
 
 
 from abc import ABCMeta, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 from app.core.agent.kernel.workflow_agent.multi_agent_workflow import AgentWorkflow, AgentWorkflowMeta
 from llama_index.core.agent.workflow.base_agent import (
     BaseWorkflowAgent
@@ -54,9 +54,32 @@ class SavantFunctionAgentKernel(AgentWorkflow, metaclass=SavantAgentKernelMeta):
         timeout: Optional[float] = None,
         **workflow_kwargs: Any,
     ):
+        self._cached_steps: Optional[Dict[str, Callable]] = None
         super().__init__(agents=[savant_agent], timeout=timeout, **workflow_kwargs)
         self.savant_agent = savant_agent
 
+    def _get_steps(self) -> Dict[str, Callable]:
+        """Returns all the steps, discovered once per kernel instance."""
+        if self._cached_steps is None:
+            self._cached_steps = super()._get_steps()
+        return self._cached_steps
+
+    def prepare_for_reuse(self) -> "SavantFunctionAgentKernel":
+        """
+        Validate the kernel once and skip validation on every later run.
+
+        A prepared kernel holds no per-run state, so a single instance can serve
+        concurrent runs as long as each run gets its own Context.
+        """
+        self._validate()
+        self._disable_validation = True
+        self._get_steps()
+        return self
+
+    def new_context(self) -> Context:
+        """Create a fresh per-run Context bound to this kernel's steps."""
+        return Context(workflow=self)
+
     @abstractmethod
     @step
     async def savant_init_agent(self, ctx: Context, ev: AgentInput) -> SaventAgentSetup:
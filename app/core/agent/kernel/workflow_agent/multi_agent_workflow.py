@@ -1,3 +1,4 @@
+import time
 from abc import ABCMeta
 from typing import Any, Callable, Dict, List, Optional, Sequence, Union, cast
 
@@ -38,6 +39,8 @@ from llama_index.core.workflow import (
 )
 from llama_index.core.workflow.checkpointer import CheckpointCallback
 from llama_index.core.workflow.handler import WorkflowHandler
+
+from app.core.metrics import TOOL_CALL_SECONDS
 from llama_index.core.workflow.workflow import WorkflowMeta
 from llama_index.core.settings import Settings
 
@@ -287,6 +290,7 @@ class AgentWorkflow(Workflow, PromptMixin, metaclass=AgentWorkflowMeta):
         tool_input: dict,
     ) -> ToolOutput:
         """Call the given tool with the given input."""
+        start_time = time.perf_counter()
         try:
             if isinstance(tool, FunctionTool) and tool.requires_context:
                 tool_output = await tool.acall(ctx=ctx, **tool_input)
@@ -301,6 +305,9 @@ class AgentWorkflow(Workflow, PromptMixin, metaclass=AgentWorkflowMeta):
                 is_error=True,
             )
 
+        TOOL_CALL_SECONDS.labels(
+            getattr(tool.metadata.name, "value", tool.metadata.name), "error" if tool_output.is_error else "ok"
+        ).observe(time.perf_counter() - start_time)
         return tool_output
 
     @step
@@ -0,0 +1,124 @@
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple, Type, Union
+
+import structlog
+from llama_index.core.tools import BaseTool
+
+from app.core.agent.kernel.savant_agent_kernel import DefaultSavantAgentWorkflow, SavantFunctionAgentKernel
+from app.core.agent.savant_function_agent import SavantFunctionAgent
+from app.llms.llm_manager import LLMManager
+
+logger = structlog.get_logger(__name__)
+
+PoolKey = Tuple[type, Tuple[str, ...], str, type]
+
+
+class SavantAgentPool:
+    """
+    Process-wide pool of agents and their workflow kernels.
+
+    Each (agent class, tool set, LLM alias, kernel class) combination is built,
+    validated and step-discovered once, then shared by every request. Pooled
+    kernels keep no per-request state: conversation memory, scratchpad and
+    session ids all live in the Context created per run via `new_context()`.
+
+    Example:
+        >>> kernel = SavantAgentPool.get_instance().get_kernel(
+        ...     PharmaModelAnalyzerAgent,
+        ...     tools=[shap_summary_plot_image_tool],
+        ...     llm_alias="40-mini",
+        ...     kernel_cls=ModelAnalyzerKernel,
+        ... )
+        >>> ctx = kernel.new_context()
+        >>> await ctx.set("session_id", session_id)
+        >>> response = await kernel.run(user_msg="...", ctx=ctx)
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    @classmethod
+    def get_instance(cls) -> "SavantAgentPool":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    obj = super().__new__(cls)
+                    obj._initialize()
+                    cls._instance = obj
+        return cls._instance
+
+    def _initialize(self):
+        self._kernels: Dict[PoolKey, SavantFunctionAgentKernel] = {}
+        self._build_lock = Lock()
+
+    @staticmethod
+    def _tool_name(tool: Union[BaseTool, Callable]) -> str:
+        if isinstance(tool, BaseTool):
+            return tool.metadata.get_name()
+        return getattr(tool, "__name__", repr(tool))
+
+    def _pool_key(
+        self,
+        agent_cls: Type[SavantFunctionAgent],
+        tools: Sequence[Union[BaseTool, Callable]],
+        llm_alias: str,
+        kernel_cls: Type[SavantFunctionAgentKernel],
+    ) -> PoolKey:
+        tool_names = tuple(sorted(self._tool_name(tool) for tool in tools))
+        return (agent_cls, tool_names, llm_alias, kernel_cls)
+
+    def get_kernel(
+        self,
+        agent_cls: Type[SavantFunctionAgent],
+        tools: Sequence[Union[BaseTool, Callable]],
+        llm_alias: str = "40-mini",
+        kernel_cls: Type[SavantFunctionAgentKernel] = DefaultSavantAgentWorkflow,
+    ) -> SavantFunctionAgentKernel:
+        """
+        Return the shared kernel for the given agent configuration, building it on first use.
+
+        Args:
+            agent_cls: Agent class, instantiated as `agent_cls(tools=..., llm=...)`.
+            tools: Tools handed to the agent. Pooling is keyed by tool name, so two
+                tool lists with the same names share a kernel.
+            llm_alias: Alias resolved through `LLMManager.get_llm`.
+            kernel_cls: Kernel (workflow) class that drives the agent.
+
+        Returns:
+            SavantFunctionAgentKernel: A validated kernel whose agent is `kernel.savant_agent`.
+        """
+        if not issubclass(kernel_cls, SavantFunctionAgentKernel):
+            raise TypeError("kernel_cls must be a subclass of SavantFunctionAgentKernel")
+
+        key = self._pool_key(agent_cls, tools, llm_alias, kernel_cls)
+        kernel = self._kernels.get(key)
+        if kernel is None:
+            with self._build_lock:
+                kernel = self._kernels.get(key)
+                if kernel is None:
+                    kernel = self._build_kernel(agent_cls, list(tools), llm_alias, kernel_cls)
+                    self._kernels[key] = kernel
+        return kernel
+
+    def _build_kernel(
+        self,
+        agent_cls: Type[SavantFunctionAgent],
+        tools: List[Union[BaseTool, Callable]],
+        llm_alias: str,
+        kernel_cls: Type[SavantFunctionAgentKernel],
+    ) -> SavantFunctionAgentKernel:
+        logger.info(
+            "Building pooled agent kernel",
+            agent=agent_cls.__name__,
+            kernel=kernel_cls.__name__,
+            llm_alias=llm_alias,
+            tools=[self._tool_name(tool) for tool in tools],
+        )
+        llm = LLMManager.get_llm(model_name=llm_alias)
+        agent = agent_cls(tools=tools, llm=llm)
+        return kernel_cls(savant_agent=agent).prepare_for_reuse()
+
+    def clear(self) -> None:
+        """Drop every pooled kernel, e.g. after an LLM or prompt template change."""
+        with self._build_lock:
+            self._kernels.clear()
@@ -0,0 +1,246 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+# Agent runs and session builds take tens of seconds, well past the client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request, until the last body chunk is sent.",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+WORKFLOW_STEP_SECONDS = Histogram(
+    "workflow_step_duration_seconds", "Time spent in a workflow @step.",
+    ["workflow", "step", "outcome"], buckets=LATENCY_BUCKETS,
+)
+TOOL_CALL_SECONDS = Histogram(
+    "agent_tool_call_duration_seconds", "Time spent in an agent tool call.",
+    ["tool", "outcome"], buckets=LATENCY_BUCKETS,
+)
+SESSION_CACHE_LOOKUPS = Counter(
+    "session_cache_lookups_total", "Session cache lookups (exists and load) by result.",
+    ["backend", "datatype", "result"],
+)
+SESSION_CACHE_BYTES = Counter(
+    "session_cache_bytes_total", "Serialized bytes read from or written to the session cache.",
+    ["backend", "datatype", "direction"],
+)
+SESSION_CACHE_EVICTIONS = Counter(
+    "session_cache_evictions_total", "Sessions evicted from the session cache, by reason (ttl or size).",
+    ["backend", "reason"],
+)
+SESSION_CACHE_BLOB_WRITES = Counter(
+    "session_cache_blob_writes_total",
+    "Session artifact blobs saved, by whether their content was already stored for another session (reused) or not (stored).",
+    ["backend", "result"],
+)
+SESSION_CACHE_DISK_BYTES = Gauge(
+    "session_cache_disk_bytes", "Bytes on disk held by the joblib session cache, as of the last sweep.",
+    multiprocess_mode="max",
+)
+NEAR_CACHE_LOOKUPS = Counter(
+    "near_cache_lookups_total", "In-process session cache lookups by datatype and result (hit or miss).",
+    ["datatype", "result"],
+)
+NEAR_CACHE_EVICTIONS = Counter(
+    "near_cache_evictions_total", "Entries removed from the in-process session cache, by reason.", ["reason"],
+)
+NEAR_CACHE_BYTES = Gauge("near_cache_bytes", "Estimated bytes held by the in-process session cache.", multiprocess_mode="livesum")
+NEAR_CACHE_ITEMS = Gauge("near_cache_items", "Entries held by the in-process session cache.", multiprocess_mode="livesum")
+S3_DOWNLOAD_BYTES = Counter("s3_download_bytes_total", "Bytes downloaded from S3.")
+S3_DOWNLOAD_SECONDS = Histogram("s3_download_duration_seconds", "Time to download an object from S3.", buckets=LATENCY_BUCKETS)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Time from sending an LLM request to its complete response.",
+    ["model", "outcome"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used, by model alias and kind (prompt or completion).", ["model", "kind"])
+
+# Datatypes such as `artifact_<hash>` and `conversation_<n>` would make a label per object
+_DATATYPE_SUFFIX = re.compile(r"_(?:[0-9a-f]{32}|\d+)$")
+
+
+def datatype_label(datatype: str) -> str:
+    return _DATATYPE_SUFFIX.sub("", datatype)
+
+
+def record_cache_lookup(backend: str, datatype: str, hit: bool) -> None:
+    SESSION_CACHE_LOOKUPS.labels(backend, datatype_label(datatype), "hit" if hit else "miss").inc()
+
+
+def record_cache_bytes(backend: str, datatype: str, direction: str, size: int) -> None:
+    SESSION_CACHE_BYTES.labels(backend, datatype_label(datatype), direction).inc(size)
+
+
+def record_s3_download(size: int, seconds: float) -> None:
+    S3_DOWNLOAD_BYTES.inc(size)
+    S3_DOWNLOAD_SECONDS.observe(seconds)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    The metrics in the Prometheus text format, with their content type. When
+    PROMETHEUS_MULTIPROC_DIR is set (several worker processes), the samples of every
+    process are aggregated.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def model_alias(model_dict: Dict[str, Any]) -> str:
+    """The LLMManager alias of the model an LLM event came from, else its model or class name."""
+    from app.llms.llm_manager import LLMManager, model_configs
+
+    model = model_dict.get("model")
+    for alias, llm in list(LLMManager._instances.items()):
+        if model is not None and getattr(llm, "model", None) == model:
+            return alias
+        if model is None and llm.class_name() == model_dict.get("class_name"):
+            return alias
+    for alias, config in model_configs.items():
+        if config["model"] == model:
+            return alias
+    return model or model_dict.get("class_name") or "unknown"
+
+
+def token_usage(response: Any) -> Dict[str, int]:
+    """Prompt and completion token counts of an LLM response, when the provider reports them."""
+    usage = dict(getattr(response, "additional_kwargs", None) or {})
+    if "prompt_tokens" not in usage:
+        raw = getattr(response, "raw", None)
+        raw_usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+        if raw_usage is not None:
+            usage = raw_usage if isinstance(raw_usage, dict) else {
+                "prompt_tokens": getattr(raw_usage, "prompt_tokens", None),
+                "completion_tokens": getattr(raw_usage, "completion_tokens", None),
+            }
+    return {kind: int(usage[f"{kind}_tokens"]) for kind in ("prompt", "completion") if usage.get(f"{kind}_tokens") is not None}
+
+
+# Span of the LLM call in progress, so the inner call of e.g. a chat implemented on top of
+# complete is not counted a second time
+_llm_call_span: ContextVar[Optional[str]] = ContextVar("llm_call_span", default=None)
+
+_installed = False
+_install_lock = Lock()
+
+
+def install_llama_index_metrics() -> None:
+    """
+    Registers handlers on the llama-index root dispatcher that time every workflow
+    @step and every LLM call. Safe to call more than once.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        from llama_index.core.instrumentation import get_dispatcher
+
+        dispatcher = get_dispatcher()
+        dispatcher.add_span_handler(_step_span_handler())
+        dispatcher.add_event_handler(_llm_event_handler())
+        _installed = True
+
+
+def _step_span_handler():
+    from llama_index.core.instrumentation.span.base import BaseSpan
+    from llama_index.core.instrumentation.span_handlers import BaseSpanHandler
+    from llama_index.core.workflow import Workflow
+    from pydantic import Field
+
+    class StepSpan(BaseSpan):
+        workflow: str
+        step: str
+        started: float = Field(default_factory=time.perf_counter)
+
+    class StepMetricsSpanHandler(BaseSpanHandler[StepSpan]):
+        """Observes WORKFLOW_STEP_SECONDS for spans opened around workflow steps."""
+
+        @classmethod
+        def class_name(cls) -> str:
+            return "StepMetricsSpanHandler"
+
+        def new_span(self, id_: str, bound_args: Any, instance: Optional[Any] = None,
+                     parent_span_id: Optional[str] = None, tags: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[StepSpan]:
+            if not isinstance(instance, Workflow):
+                return None
+            # Span ids are "<qualname>-<uuid>"; the workflow's own internal steps start with "_"
+            name = id_.partition("-")[0].rpartition(".")[2]
+            if name.startswith("_") or not hasattr(getattr(type(instance), name, None), "__step_config"):
+                return None
+            return StepSpan(id_=id_, parent_id=parent_span_id, workflow=type(instance).__name__, step=name)
+
+        def _observe(self, id_: str, outcome: str) -> Optional[StepSpan]:
+            span = self.open_spans.get(id_)
+            if span is not None:
+                WORKFLOW_STEP_SECONDS.labels(span.workflow, span.step, outcome).observe(time.perf_counter() - span.started)
+            return span
+
+        def prepare_to_exit_span(self, id_: str, bound_args: Any, instance: Optional[Any] = None,
+                                 result: Optional[Any] = None, **kwargs: Any) -> Optional[StepSpan]:
+            return self._observe(id_, "ok")
+
+        def prepare_to_drop_span(self, id_: str, bound_args: Any, instance: Optional[Any] = None,
+                                 err: Optional[BaseException] = None, **kwargs: Any) -> Optional[StepSpan]:
+            return self._observe(id_, "error")
+
+    return StepMetricsSpanHandler()
+
+
+def _llm_event_handler():
+    from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+    from llama_index.core.instrumentation.events.llm import (
+        LLMChatEndEvent,
+        LLMChatStartEvent,
+        LLMCompletionEndEvent,
+        LLMCompletionStartEvent,
+    )
+    from llama_index.core.instrumentation.events.span import SpanDropEvent
+    from pydantic import PrivateAttr
+
+    class LLMMetricsEventHandler(BaseEventHandler):
+        """Observes LLM_REQUEST_SECONDS and LLM_TOKENS from the LLM start and end events."""
+
+        # span id -> (alias, start time); bounded in case an end event never comes
+        _started: "OrderedDict[str, Tuple[str, float]]" = PrivateAttr(default_factory=OrderedDict)
+        _lock: Any = PrivateAttr(default_factory=Lock)
+
+        @classmethod
+        def class_name(cls) -> str:
+            return "LLMMetricsEventHandler"
+
+        def handle(self, event: Any, **kwargs: Any) -> None:
+            if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+                with self._lock:
+                    if _llm_call_span.get() in self._started:
+                        return
+                    self._started[event.span_id] = (model_alias(event.model_dict), time.perf_counter())
+                    if len(self._started) > 1000:
+                        self._started.popitem(last=False)
+                _llm_call_span.set(event.span_id)
+            elif isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+                with self._lock:
+                    started = self._started.pop(event.span_id, None)
+                if started is None:
+                    return
+                alias, start = started
+                LLM_REQUEST_SECONDS.labels(alias, "ok").observe(time.perf_counter() - start)
+                for kind, count in token_usage(event.response).items():
+                    LLM_TOKENS.labels(alias, kind).inc(count)
+            elif isinstance(event, SpanDropEvent):
+                with self._lock:
+                    started = self._started.pop(event.span_id, None)
+                if started is not None:
+                    LLM_REQUEST_SECONDS.labels(started[0], "error").observe(time.perf_counter() - started[1])
+
+    return LLMMetricsEventHandler()
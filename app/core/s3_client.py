@@ -1,16 +1,25 @@
 import boto3
+from threading import Lock
 from app.core.config import settings
 from botocore.exceptions import ClientError
+
+_s3_client = None
+_s3_client_lock = Lock()
+
 def get_s3_client():
     """
-    Create and return a boto3 S3 client using credentials from environment variables.
+    Return the process-wide boto3 S3 client, created on first use with credentials from
+    environment variables. boto3 clients are thread-safe, so one is shared by all requests.
     """
-    session = boto3.Session(
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.S3_REGION
-    )
-
-    s3_client = session.client('s3')
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                session = boto3.Session(
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.S3_REGION
+                )
+                _s3_client = session.client('s3')
 
-    return s3_client
+    return _s3_client
@@ -0,0 +1,80 @@
+from typing import Any, Dict, Optional, Tuple
+
+import pydantic_core
+from llama_index.core.agent.workflow.workflow_events import (
+    AgentInput,
+    AgentOutput,
+    AgentStream,
+    ToolCall,
+    ToolCallResult,
+)
+from llama_index.core.workflow import Event
+
+
+class AgentEventStream:
+    """Utility methods for turning agent workflow stream events into client-facing messages."""
+
+    @staticmethod
+    def to_message(ev: Event) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Map a workflow stream event to an (event name, payload) pair.
+
+        Only what a client needs to render progress is forwarded: prompts sent to the
+        LLM and raw provider payloads stay on the server. Events with nothing to show
+        (empty token deltas, StopEvent, custom events) map to None.
+
+        Returns:
+            Optional[Tuple[str, Dict[str, Any]]]: One of `agent_input`, `delta`, `tool_call`,
+            `tool_result` or `agent_output` with its payload, or None.
+        """
+        if isinstance(ev, AgentStream):
+            if not ev.delta:
+                return None
+            return "delta", {"agent": ev.current_agent_name, "delta": ev.delta}
+
+        if isinstance(ev, ToolCallResult):
+            tool_output = ev.tool_output
+            return "tool_result", {
+                "tool_id": ev.tool_id,
+                "tool_name": ev.tool_name,
+                "is_error": tool_output.is_error,
+                "content": tool_output.content,
+            }
+
+        if isinstance(ev, ToolCall):
+            return "tool_call", {
+                "tool_id": ev.tool_id,
+                "tool_name": ev.tool_name,
+                "tool_kwargs": ev.tool_kwargs,
+            }
+
+        if isinstance(ev, AgentOutput):
+            return "agent_output", {
+                "agent": ev.current_agent_name,
+                "content": ev.response.content,
+                "tool_calls": [tool_call.tool_name for tool_call in ev.tool_calls],
+            }
+
+        if isinstance(ev, AgentInput):
+            return "agent_input", {"agent": ev.current_agent_name}
+
+        return None
+
+    @staticmethod
+    def format_sse(event: str, data: Any) -> str:
+        """Format a payload as a single Server-Sent Events frame."""
+        payload = pydantic_core.to_json(data, fallback=str).decode("utf-8")
+        return f"event: {event}\ndata: {payload}\n\n"
+
+    @staticmethod
+    def format_json(event: str, data: Any) -> str:
+        """Format a payload as a single JSON message (`{"event": ..., "data": ...}`), e.g. for a WebSocket."""
+        return pydantic_core.to_json({"event": event, "data": data}, fallback=str).decode("utf-8")
+
+    @staticmethod
+    def to_sse(ev: Event) -> Optional[str]:
+        """Format a workflow stream event as an SSE frame, or None if it is not forwarded."""
+        message = AgentEventStream.to_message(ev)
+        if message is None:
+            return None
+        return AgentEventStream.format_sse(*message)
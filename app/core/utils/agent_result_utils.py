@@ -39,7 +39,8 @@ class AgentResultUtils:
             tools_results.append(tools_result)
             
         
-        return SavantAgentOutput(response=message, tools_results=tools_results)
+        return SavantAgentOutput(response=message, tools_results=tools_results, session_id=session_id,
+                                 conversation_id=conversation_id)
 
 
 
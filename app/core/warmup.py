@@ -0,0 +1,137 @@
+import inspect
+import io
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+import structlog
+
+from app.core.worker_pool import WorkerPool
+
+logger = structlog.get_logger(__name__)
+
+# A warm-up step receives the `warmup` section of the app metadata
+WarmupStep = Callable[[Dict[str, Any]], Any]
+
+
+class StartupWarmup:
+    """
+    Runs the warm-up steps a pod needs before it should take traffic, and tracks
+    whether it is ready (see `GET /health/ready`).
+
+    Steps are named callables registered by the modules that own the cold paths (the
+    model analyzer registers "agents" and "models"). Blocking steps run in the worker
+    pool's I/O threads, async steps on the event loop, one after the other. A failing
+    step is logged and reported, and only keeps the pod unready with `"strict": true`.
+
+    Config (the `warmup` section of app/app_metadata.json):
+        enabled: Run the warm-up at startup (default true); when disabled the pod is ready at once.
+        steps: Names of the steps to run, in order (default: every registered step).
+        llms: LLM aliases to construct for the "llms" step.
+        models: `{"bucket_name", "file_key"}` objects whose sessions the "models" step pre-builds.
+        strict: Stay unready when a step fails (default false).
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    @classmethod
+    def get_instance(cls) -> "StartupWarmup":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    obj = super().__new__(cls)
+                    obj._initialize()
+                    cls._instance = obj
+        return cls._instance
+
+    def _initialize(self):
+        self._steps: Dict[str, WarmupStep] = {}
+        self.status = "pending"  # pending, running, ready or failed
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.register("prompts", warm_up_prompts)
+        self.register("plotting", warm_up_plotting)
+        self.register("s3", warm_up_s3)
+        self.register("llms", warm_up_llms)
+
+    def register(self, name: str, step: WarmupStep) -> None:
+        self._steps[name] = step
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    async def run(self, config: Optional[Dict[str, Any]] = None) -> bool:
+        """Runs the configured steps and returns whether the pod is ready afterwards."""
+        config = config or {}
+        if not config.get("enabled", True):
+            self.status = "ready"
+            logger.info("Startup warm-up disabled")
+            return True
+
+        self.status = "running"
+        self.started_at = time.time()
+        failed = False
+        for name in config.get("steps") or list(self._steps):
+            step = self._steps.get(name)
+            start = time.perf_counter()
+            try:
+                if step is None:
+                    raise ValueError(f"Unknown warm-up step '{name}'")
+                if inspect.iscoroutinefunction(step):
+                    await step(config)
+                else:
+                    await WorkerPool.get_instance().run_io(step, config)
+                self.results[name] = {"status": "done", "seconds": round(time.perf_counter() - start, 3)}
+            except Exception as e:
+                failed = True
+                logger.exception("Warm-up step failed", step=name, error=str(e))
+                self.results[name] = {"status": "failed", "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+
+        self.finished_at = time.time()
+        self.status = "failed" if failed and config.get("strict", False) else "ready"
+        logger.info("Startup warm-up finished", status=self.status,
+                    seconds=round(self.finished_at - self.started_at, 3), steps=self.results)
+        return self.ready
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "steps": dict(self.results),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def warm_up_prompts(config: Dict[str, Any]) -> None:
+    from app.core.prompts.prompt_template_registry import PromptTemplateRegistry
+    PromptTemplateRegistry._initialize()
+
+
+def warm_up_plotting(config: Dict[str, Any]) -> None:
+    """Imports the plotting stack and renders a throwaway figure, which builds the font cache."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import shap  # noqa: F401
+
+    fig, ax = plt.subplots(figsize=(2, 2))
+    sns.heatmap([[1, 2], [3, 4]], annot=True, ax=ax)
+    ax.set_title("warm-up")
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def warm_up_s3(config: Dict[str, Any]) -> None:
+    from app.core.s3_client import get_s3_client
+    get_s3_client()
+
+
+def warm_up_llms(config: Dict[str, Any]) -> None:
+    from app.llms.llm_manager import LLMManager
+    for alias in config.get("llms", []):
+        LLMManager.get_llm(model_name=alias)
@@ -0,0 +1,159 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerPoolFullError(RuntimeError):
+    """Raised when a worker pool already has its maximum number of pending tasks."""
+
+    def __init__(self, kind: str, pending: int):
+        super().__init__(f"The {kind} worker pool is saturated ({pending} pending tasks)")
+        self.kind = kind
+        self.pending = pending
+
+
+class WorkerPool:
+    """
+    Bounded executors that keep blocking work off the event loop.
+
+    - `run_io` dispatches blocking I/O (S3 downloads, cache reads and writes) to a thread pool.
+    - `run_cpu` dispatches CPU-bound work (unpickling, SHAP) to a process pool, so it
+      neither blocks the event loop nor contends for the GIL with request handling.
+
+    Each pool accepts at most `WORKER_POOL_MAX_PENDING` queued + running tasks. Further
+    submissions fail fast with `WorkerPoolFullError` instead of queueing without bound.
+
+    Configuration (environment):
+        WORKER_POOL_IO_WORKERS: Threads for blocking I/O (default 8).
+        WORKER_POOL_CPU_WORKERS: Processes for CPU-bound work (default half the cores, at least 1).
+        WORKER_POOL_CPU_MODE: "process" (default) or "thread" to run CPU work in threads.
+        WORKER_POOL_START_METHOD: multiprocessing start method for CPU workers (default "spawn").
+        WORKER_POOL_MAX_PENDING: Max queued + running tasks per pool (default 32).
+    """
+
+    _instance = None
+    _lock = Lock()
+
+    @classmethod
+    def get_instance(cls) -> "WorkerPool":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    obj = super().__new__(cls)
+                    obj._initialize()
+                    cls._instance = obj
+        return cls._instance
+
+    def _initialize(self):
+        self.io_workers = int(os.getenv("WORKER_POOL_IO_WORKERS", 8))
+        self.cpu_workers = int(os.getenv("WORKER_POOL_CPU_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+        self.cpu_mode = os.getenv("WORKER_POOL_CPU_MODE", "process").lower()
+        self.start_method = os.getenv("WORKER_POOL_START_METHOD", "spawn")
+        self.max_pending = int(os.getenv("WORKER_POOL_MAX_PENDING", 32))
+
+        self._io_executor: Optional[Executor] = None
+        self._cpu_executor: Optional[Executor] = None
+        self._executor_lock = Lock()
+        self._stats_lock = Lock()
+        self._pending: Dict[str, int] = {"io": 0, "cpu": 0}
+        self._completed: Dict[str, int] = {"io": 0, "cpu": 0}
+        self._rejected: Dict[str, int] = {"io": 0, "cpu": 0}
+
+    def _get_executor(self, kind: str) -> Executor:
+        with self._executor_lock:
+            if kind == "io":
+                if self._io_executor is None:
+                    self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="io-worker")
+                return self._io_executor
+
+            if self._cpu_executor is None:
+                if self.cpu_mode == "thread":
+                    self._cpu_executor = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="cpu-worker")
+                else:
+                    self._cpu_executor = ProcessPoolExecutor(
+                        max_workers=self.cpu_workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                    )
+            return self._cpu_executor
+
+    def _reset_cpu_executor(self, broken: Executor) -> None:
+        with self._executor_lock:
+            if self._cpu_executor is broken:
+                self._cpu_executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run_io(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking I/O callable in the I/O thread pool."""
+        return await self._submit("io", fn, *args, **kwargs)
+
+    async def run_cpu(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a CPU-bound callable in the CPU pool. With the default process mode the
+        callable must be a module-level function and its arguments and result picklable.
+        """
+        return await self._submit("cpu", fn, *args, **kwargs)
+
+    async def _submit(self, kind: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._stats_lock:
+            if self._pending[kind] >= self.max_pending:
+                self._rejected[kind] += 1
+                logger.warning("Worker pool saturated", pool=kind, pending=self._pending[kind])
+                raise WorkerPoolFullError(kind, self._pending[kind])
+            self._pending[kind] += 1
+
+        executor = self._get_executor(kind)
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            if isinstance(executor, ThreadPoolExecutor):
+                # Carry the request's logging context into the worker thread
+                call = functools.partial(contextvars.copy_context().run, call)
+            return await loop.run_in_executor(executor, call)
+        except BrokenProcessPool:
+            logger.error("CPU worker process died, recreating the pool")
+            self._reset_cpu_executor(executor)
+            raise
+        finally:
+            with self._stats_lock:
+                self._pending[kind] -= 1
+                self._completed[kind] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Queue-depth snapshot per pool: `pending` counts queued + running tasks,
+        `queued` the ones waiting for a free worker.
+        """
+        workers = {"io": self.io_workers, "cpu": self.cpu_workers}
+        with self._stats_lock:
+            return {
+                kind: {
+                    "workers": workers[kind],
+                    "pending": self._pending[kind],
+                    "queued": max(0, self._pending[kind] - workers[kind]),
+                    "completed": self._completed[kind],
+                    "rejected": self._rejected[kind],
+                    "max_pending": self.max_pending,
+                }
+                for kind in ("io", "cpu")
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._executor_lock:
+            executors = [self._io_executor, self._cpu_executor]
+            self._io_executor = None
+            self._cpu_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=wait)
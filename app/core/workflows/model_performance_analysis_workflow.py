@@ -12,7 +12,7 @@ from app.core.config import settings
 from typing import Literal,Optional,List,Dict, Any
 from app.models.llm_models import LLMTokenCount
 from app.tools.model_performance_query import a_queryResponse
-from app.llms.open_ai import  llm_openAI
+from app.llms.open_ai import get_openai_llm
 import asyncio
 
 
@@ -28,7 +28,10 @@ class ModelPerformedResponse(BaseModel):
 
 
 class ModelPerformanceWorkflow(Workflow):
-    llm = llm_openAI
+
+    @property
+    def llm(self):
+        return get_openai_llm()
 
     @step()
     async def model_performance (self, ctx: Context, ev: StartEvent) -> ModelPerformanceEvent:
@@ -1,5 +1,3 @@
-from llama_index.llms.openai import OpenAI
-
 # Map model aliases to actual models (you can expand this)
 model_configs = {
         "40-mini": {"model": "gpt-4o-mini"},  # example
@@ -21,6 +19,9 @@ class LLMManager:
             if model_name not in model_configs:
                 raise ValueError(f"Unknown model name '{model_name}' requested in LLMManager.")
 
+            # The OpenAI integration pulls in the openai SDK; import it only when a client is built
+            from llama_index.llms.openai import OpenAI
+
             config = model_configs[model_name]
             print(f"🔵 Initializing LLM instance for model '{model_name}' ({config['model']})...")
             cls._instances[model_name] = OpenAI(
@@ -1,3 +1,22 @@
-from llama_index.llms.openai import OpenAI
+from threading import Lock
 
-llm_openAI = OpenAI()
\ No newline at end of file
+_llm_openAI = None
+_lock = Lock()
+
+
+def get_openai_llm():
+    """The shared default OpenAI LLM, created on first use rather than at import time."""
+    global _llm_openAI
+    if _llm_openAI is None:
+        with _lock:
+            if _llm_openAI is None:
+                from llama_index.llms.openai import OpenAI
+                _llm_openAI = OpenAI()
+    return _llm_openAI
+
+
+def __getattr__(name):
+    # Keeps `from app.llms.open_ai import llm_openAI` working without building the client at import
+    if name == "llm_openAI":
+        return get_openai_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
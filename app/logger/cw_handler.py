@@ -1,21 +1,101 @@
-import watchtower
-import boto3
-from app.core.config import settings
+import logging
+import sys
+from collections import deque
+from threading import Lock, Thread
+from typing import List, Optional, Tuple
 
+from app.core.config import settings
 
-session = boto3.Session(
-    aws_access_key_id = settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key = settings.AWS_SECRET_ACCESS_KEY,
-    region_name = settings.AWS_CLOUDWATCH_REGION
-)
-boto3_client = session.client('logs', region_name = settings.AWS_CLOUDWATCH_REGION)
 
-boto3_client = session.client('logs', region_name = settings.AWS_CLOUDWATCH_REGION)
-response = boto3_client.describe_log_groups()
+def create_cloud_handler() -> logging.Handler:
+    """Builds the watchtower CloudWatch handler; this creates the boto3 logs client and the log group if needed."""
+    import boto3
+    import watchtower
 
-cloud_handler = watchtower.CloudWatchLogHandler(
-    boto3_client = boto3_client,
-    log_group_name = settings.AWS_CLOUDWATCH_LOG_GROUP,
-    log_stream_name = settings.AWS_CLOUDWATCH_LOG_STREAM
+    session = boto3.Session(
+        aws_access_key_id = settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key = settings.AWS_SECRET_ACCESS_KEY,
+        region_name = settings.AWS_CLOUDWATCH_REGION
     )
-	
\ No newline at end of file
+    boto3_client = session.client('logs', region_name = settings.AWS_CLOUDWATCH_REGION)
+
+    return watchtower.CloudWatchLogHandler(
+        boto3_client = boto3_client,
+        log_group_name = settings.AWS_CLOUDWATCH_LOG_GROUP,
+        log_stream_name = settings.AWS_CLOUDWATCH_LOG_STREAM
+        )
+
+
+class LazyCloudWatchHandler(logging.Handler):
+    """
+    Sends records to CloudWatch through a watchtower handler that is created on the
+    first record instead of at import, so importing the app makes no AWS calls.
+
+    The handler is created on its own thread, so a slow or unreachable endpoint never
+    holds up the thread doing the logging; up to `pending_limit` records are kept
+    meanwhile and sent once it is ready. If it cannot be created (no credentials, no
+    network), CloudWatch logging is disabled with a message on stderr and the other
+    handlers keep working.
+    """
+
+    def __init__(self, level: int = logging.NOTSET, pending_limit: int = 1000):
+        super().__init__(level)
+        self._handler = None
+        self._disabled = False
+        self._setup_thread: Optional[Thread] = None
+        self._pending: deque = deque(maxlen=pending_limit)
+        self._state_lock = Lock()
+
+    def _create(self) -> None:
+        try:
+            handler = create_cloud_handler()
+        except Exception as e:
+            with self._state_lock:
+                self._disabled = True
+                self._pending.clear()
+            sys.stderr.write(f"CloudWatch logging disabled: {e}\n")
+            return
+        with self._state_lock:
+            self._handler = handler
+
+    def _take_ready(self) -> Tuple[Optional[logging.Handler], List[logging.LogRecord]]:
+        """Starts creating the handler if needed; returns it with the records held back so far."""
+        with self._state_lock:
+            if self._handler is None:
+                if self._setup_thread is None and not self._disabled:
+                    self._setup_thread = Thread(target=self._create, name="cloudwatch-handler-setup", daemon=True)
+                    self._setup_thread.start()
+                return None, []
+            pending = list(self._pending)
+            self._pending.clear()
+            return self._handler, pending
+
+    def _send(self, handler: logging.Handler, records: List[logging.LogRecord]) -> None:
+        if handler.formatter is not self.formatter:
+            handler.setFormatter(self.formatter)
+        for record in records:
+            handler.handle(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        handler, pending = self._take_ready()
+        if handler is None:
+            with self._state_lock:
+                if not self._disabled:
+                    self._pending.append(record)
+            return
+        self._send(handler, pending + [record])
+
+    def flush(self) -> None:
+        handler, pending = self._take_ready() if self._setup_thread is not None else (None, [])
+        if handler is not None:
+            self._send(handler, pending)
+            handler.flush()
+
+    def close(self) -> None:
+        if self._handler is not None:
+            self.flush()
+            self._handler.close()
+        super().close()
+
+
+cloud_handler = LazyCloudWatchHandler()
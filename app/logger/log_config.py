@@ -1,12 +1,22 @@
 # app/logger/log_config.py
 
+import atexit
 import logging
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import orjson
 import structlog
 from app.logger.cw_handler import cloud_handler
-from pythonjsonlogger import json
+from app.logger.log_queue import BatchedFileHandler, BatchedStreamHandler, BatchingQueueListener, BoundedQueueHandler
+from pythonjsonlogger.orjson import OrjsonFormatter
 import uuid
 
-class SourceAwareJsonFormatter(json.JsonFormatter):
+_listener: Optional[BatchingQueueListener] = None
+
+
+class SourceAwareJsonFormatter(OrjsonFormatter):
     def add_fields(self, log_record, record, message_dict):
         super().add_fields(log_record, record, message_dict)
         log_record['logger'] = record.name
@@ -17,43 +27,83 @@ class SourceAwareJsonFormatter(json.JsonFormatter):
 
 class RequestIDFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
-        context = structlog.threadlocal.get_threadlocal()
-        record.request_id = context.get('request_id', f'{__name__}+{uuid.uuid4()}')
+        context = structlog.contextvars.get_contextvars()
+        record.request_id = context.get('request_id') or f'{__name__}+{uuid.uuid4()}'
         return True
 
 
-def configure_logging():
+def orjson_dumps(obj, default=None, **kwargs) -> str:
+    """structlog JSONRenderer serializer backed by orjson."""
+    return orjson.dumps(obj, default=default or str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def merge_record_context(logger, method_name, event_dict):
+    """
+    foreign_pre_chain step for third-party records. They are rendered on the listener
+    thread, so the context variables and time are taken from what was captured on the
+    record when it was logged.
+    """
+    record = event_dict.get("_record")
+    for key, value in (getattr(record, "_context", None) or {}).items():
+        event_dict.setdefault(key, value)
+    if record is not None:
+        event_dict.setdefault("timestamp", datetime.fromtimestamp(record.created, timezone.utc).isoformat().replace("+00:00", "Z"))
+    return event_dict
+
+
+def build_handlers(log_file: str = 'app.log') -> List[logging.Handler]:
+    """The handlers the log listener writes to: console, log file and CloudWatch."""
     # === Stdlib formatter (used by third-party logs) ===
     stdlib_formatter = SourceAwareJsonFormatter()
 
     # === Structlog formatter (used by structlog logs only) ===
     structlog_formatter = structlog.stdlib.ProcessorFormatter(
-        processor=structlog.processors.JSONRenderer(),
+        processor=structlog.processors.JSONRenderer(serializer=orjson_dumps),
         foreign_pre_chain=[
-            structlog.threadlocal.merge_threadlocal,
-            structlog.processors.TimeStamper(fmt="iso"),
+            merge_record_context,
             structlog.processors.add_log_level,
             structlog.processors.format_exc_info,
         ]
     )
 
     # === Handlers ===
-    stream_handler = logging.StreamHandler()
+    stream_handler = BatchedStreamHandler()
     stream_handler.setFormatter(structlog_formatter)   # for structlog logs
-    stream_handler.addFilter(RequestIDFilter())
 
-    file_handler = logging.FileHandler('app.log', mode='a')
+    file_handler = BatchedFileHandler(log_file, mode='a', delay=True)
     file_handler.setFormatter(stdlib_formatter)        # for third-party logs
-    file_handler.addFilter(RequestIDFilter())
 
     cloud_handler.setFormatter(stdlib_formatter)       # for third-party logs
-    cloud_handler.addFilter(RequestIDFilter())
+
+    return [stream_handler, file_handler, cloud_handler]
+
+
+def configure_logging():
+    """
+    Routes all logging through a bounded queue to a background listener thread, which
+    formats records and writes them to the handlers in batches. Logging a record on a
+    request thread only captures its context and enqueues it.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    queue_handler = BoundedQueueHandler.from_env()
+    queue_handler.addFilter(RequestIDFilter())
+    _listener = BatchingQueueListener(
+        queue_handler,
+        build_handlers(),
+        batch_size = int(os.getenv("LOG_BATCH_SIZE", 500)),
+        flush_interval = float(os.getenv("LOG_FLUSH_INTERVAL_SECONDS", 0.05)),
+        report_interval = float(os.getenv("LOG_DROP_REPORT_SECONDS", 10)),
+    )
+    _listener.start()
+    atexit.unregister(stop_logging)
+    atexit.register(stop_logging)
 
     logging.root.handlers = []
     logging.root.setLevel(logging.INFO)
-    logging.root.addHandler(stream_handler)
-    logging.root.addHandler(file_handler)
-    logging.root.addHandler(cloud_handler)
+    logging.root.addHandler(queue_handler)
 
     # 🎯 Uvicorn loggers (important)
     # for uvicorn_logger in ("uvicorn", "uvicorn.error", "uvicorn.access"):
@@ -69,13 +119,21 @@ def configure_logging():
             structlog.stdlib.filter_by_level,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
-            structlog.threadlocal.merge_threadlocal,
+            structlog.contextvars.merge_contextvars,
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.format_exc_info,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,  # 🔑 only wrap for structlog logs
         ],
-        context_class=structlog.threadlocal.wrap_dict(dict),
+        context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
         cache_logger_on_first_use=True,
-    )
\ No newline at end of file
+    )
+
+
+def stop_logging():
+    """Writes out the records still queued and stops the log listener (called at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
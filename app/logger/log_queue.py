@@ -0,0 +1,207 @@
+# app/logger/log_queue.py
+
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler
+from threading import Event, Lock, Thread
+from typing import List, Optional, Tuple
+
+import structlog
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+_STOP = object()
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the log listener thread through a bounded queue, so the request
+    thread never formats, writes or ships a record itself.
+
+    When the queue fills past `sample_above` (a fraction of `maxsize`), only one in
+    `sample_rate` records below WARNING is kept. When it is full, the newest record is
+    dropped (`drop_newest`) or the oldest queued record makes room for it (`drop_oldest`).
+    Dropped and sampled-out records are counted and reported by the listener.
+    """
+
+    def __init__(self, maxsize: int = 10000, policy: str = DROP_NEWEST, sample_above: float = 0.8, sample_rate: int = 10):
+        if policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown log queue policy: {policy}")
+        # SimpleQueue is implemented in C and much cheaper to put to than queue.Queue;
+        # the bound is enforced here, so it may be overshot by a few concurrent puts
+        super().__init__(queue.SimpleQueue())
+        self.maxsize = maxsize
+        self.policy = policy
+        self.sample_at = max(1, int(maxsize * sample_above))
+        self.sample_rate = max(1, sample_rate)
+        self._counts_lock = Lock()
+        self._seen_under_load = 0
+        self.dropped = 0
+        self.sampled = 0
+
+    @classmethod
+    def from_env(cls) -> "BoundedQueueHandler":
+        return cls(
+            maxsize = int(os.getenv("LOG_QUEUE_MAX_SIZE", 10000)),
+            policy = os.getenv("LOG_QUEUE_POLICY", DROP_NEWEST),
+            sample_above = float(os.getenv("LOG_SAMPLE_ABOVE", 0.8)),
+            sample_rate = int(os.getenv("LOG_SAMPLE_RATE", 10)),
+        )
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the base class this neither formats nor copies the record: formatting
+        # happens on the listener thread, and resolving the message in place does not
+        # change what other handlers see. Only what depends on the calling thread is
+        # captured here.
+        if not isinstance(record.msg, dict):
+            record.msg = record.getMessage()
+            record.args = None
+            record._context = structlog.contextvars.get_contextvars()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        size = self.queue.qsize()
+        if size < self.sample_at:
+            self.queue.put_nowait(record)
+            return
+
+        if size < self.maxsize:
+            if record.levelno < logging.WARNING:
+                with self._counts_lock:
+                    self._seen_under_load += 1
+                    if self._seen_under_load % self.sample_rate:
+                        self.sampled += 1
+                        return
+            self.queue.put_nowait(record)
+            return
+
+        if self.policy == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(record)
+        with self._counts_lock:
+            self.dropped += 1
+
+    def take_counts(self) -> Tuple[int, int]:
+        """Returns and resets the (dropped, sampled) counts."""
+        with self._counts_lock:
+            counts = (self.dropped, self.sampled)
+            self.dropped = self.sampled = 0
+        return counts
+
+
+class BatchingQueueListener:
+    """
+    Background thread that drains the log queue in batches of up to `batch_size`
+    records, passes each record to the handlers and flushes them once per batch. After
+    a batch it waits `flush_interval` seconds for the next records to accumulate, which
+    keeps it from competing with request threads for the GIL on every record.
+
+    Handlers are only ever called from this thread, so slow sinks (file writes,
+    CloudWatch) never hold up a request.
+    """
+
+    def __init__(self, queue_handler: BoundedQueueHandler, handlers: List[logging.Handler],
+                 batch_size: int = 500, flush_interval: float = 0.05, report_interval: float = 10.0):
+        self.queue_handler = queue_handler
+        self.queue = queue_handler.queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._stopping = Event()
+        self.report_interval = report_interval
+        self._thread: Optional[Thread] = None
+        self._last_report = 0.0
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Processes the records already queued, flushes the handlers and stops the thread."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            for record in batch:
+                if record is _STOP:
+                    stop = True
+                else:
+                    self.handle(record)
+            self._report_drops(force=stop)
+            self._flush()
+            if stop:
+                return
+            if len(batch) < self.batch_size:
+                self._stopping.wait(self.flush_interval)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                try:
+                    handler.handle(record)
+                except Exception as e:
+                    sys.stderr.write(f"Log handler {handler!r} failed: {e}\n")
+
+    def _flush(self) -> None:
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception as e:
+                sys.stderr.write(f"Log handler {handler!r} failed to flush: {e}\n")
+
+    def _report_drops(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_report < self.report_interval:
+            return
+        dropped, sampled = self.queue_handler.take_counts()
+        if not dropped and not sampled:
+            return
+        self._last_report = now
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Log records dropped under load: %d dropped, %d sampled out", (dropped, sampled), None,
+        )
+        record.request_id = None
+        self.handle(record)
+
+
+class BatchedStreamHandler(logging.StreamHandler):
+    """StreamHandler that leaves flushing to the listener, which flushes once per batch."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class BatchedFileHandler(logging.FileHandler):
+    """FileHandler that leaves flushing to the listener, which flushes once per batch."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is None:
+            self.stream = self._open()
+        BatchedStreamHandler.emit(self, record)
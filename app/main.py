@@ -1,26 +1,35 @@
+import asyncio
 import structlog
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.logger.log_config import configure_logging
 from app.api.api_router import api_router
+from app.core.warmup import StartupWarmup
+from app.core.metrics import install_llama_index_metrics, render_metrics
 from app.utils.errors_handling import (
     http_exception_handler,
     validation_exception_handler,
     unhandled_exception_handler,
 )
-# from app.middlewares.standard_response_middleware import CustomResponseMiddleware
+from app.middlewares.standard_response_middleware import CustomResponseMiddleware
 from app.middlewares.request_id_middleware import RequestIDMiddleware
 from app.middlewares.exception_logging_middleware import ExceptionLoggingMiddleware
+from app.middlewares.compression_middleware import CompressionMiddleware
+from app.middlewares.metrics_middleware import MetricsMiddleware
 
 # ---------- Setup Logging ----------
 configure_logging()
 logger = structlog.get_logger()
 
+# ---------- Metrics ----------
+install_llama_index_metrics()
+
 # ---------- Load App Metadata ----------
 metadata_path = Path("app/app_metadata.json")
 app_config = json.loads(metadata_path.read_text(encoding="utf-8"))
@@ -32,13 +41,26 @@ fastapi_keys = {
 }
 fastapi_metadata = {k: v for k, v in app_config.items() if k in fastapi_keys}
 
+# ---------- Startup Warm-up ----------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: the pod answers liveness probes right away and
+    # reports ready (GET /api/v1/health/ready) once the warm-up has finished
+    warmup_task = asyncio.create_task(StartupWarmup.get_instance().run(app_config.get("warmup")))
+    yield
+    warmup_task.cancel()
+
 # ---------- Initialize FastAPI ----------
-app = FastAPI(**fastapi_metadata)
+app = FastAPI(**fastapi_metadata, lifespan=lifespan)
 
 # ---------- Middleware ----------
-app.add_middleware(RequestIDMiddleware)
+# Added last of the two, so it is the outer one: the request id is still bound when the
+# exception logger logs an error on its way out
 app.add_middleware(ExceptionLoggingMiddleware)
-# app.add_middleware(CustomResponseMiddleware)
+app.add_middleware(RequestIDMiddleware)
+app.add_middleware(CustomResponseMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # ---------- CORS Handling ----------
 allowed_origins = app_config.get("allowed_origins") or ["*"]
@@ -64,3 +86,9 @@ app.include_router(api_router, prefix="/api/v1")
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Agentic Apps"}
+
+# ---------- Prometheus Metrics ----------
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,145 @@
+# compression_middleware.py
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Event streams must reach the client frame by frame; images and archives are already compressed
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a chunk and flushes it, so streamed chunks are not held back."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI response compression, negotiated from Accept-Encoding (brotli when the
+    `brotli` package is installed, otherwise gzip).
+
+    Responses smaller than COMPRESSION_MIN_SIZE bytes, responses that already carry a
+    Content-Encoding, and excluded content types (server-sent events, images) are passed
+    through untouched. Streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self, encoding)(scope, receive, send)
+
+    @staticmethod
+    def _negotiate(accept_encoding: str) -> Optional[str]:
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(name.strip())
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.middleware.app(scope, receive, self.send_with_compression)
+
+    def _should_skip(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return "content-encoding" in headers or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+
+    def _start_compressing(self, headers: MutableHeaders) -> None:
+        self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # The ETag describes the uncompressed representation
+        if headers.get("etag", "").startswith('"'):
+            headers["ETag"] = "W/" + headers["etag"]
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the headers back until the first body chunk shows whether to compress
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+            if self._should_skip(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send(message)
+                return
+
+            self._start_compressing(headers)
+            if more_body:
+                del headers["content-length"]
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+                return
+
+            compressed = self.compressor.compress(body) + self.compressor.finish()
+            headers["Content-Length"] = str(len(compressed))
+            await self.send(start_message)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if more_body:
+            await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.compress(body) + self.compressor.finish()})
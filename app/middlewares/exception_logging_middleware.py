@@ -1,15 +1,23 @@
 # exception_logging_middleware.py
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
 import structlog
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 logger = structlog.get_logger("error_logger")
 
-class ExceptionLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+
+class ExceptionLoggingMiddleware:
+    """Logs unhandled exceptions (with the request context bound by RequestIDMiddleware) and re-raises them."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send)
         except Exception as e:
             logger.exception("Unhandled exception occurred", error=str(e))
             raise  # Re-raise so FastAPI returns 500
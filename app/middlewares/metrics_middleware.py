@@ -0,0 +1,58 @@
+# middlewares/metrics_middleware.py
+
+import time
+
+from starlette.routing import replace_params
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_SECONDS
+
+
+def route_template(scope: Scope) -> str:
+    """
+    The full path template of the route that served the request. Routes of included
+    routers only know their own part of the path, so the prefix is taken from the
+    request path.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    rendered, _ = replace_params(path_format, route.param_convertors, dict(scope.get("path_params", {})))
+    path = scope["path"]
+    prefix = path[:-len(rendered)] if rendered and path.endswith(rendered) else ""
+    return prefix + path_format
+
+
+class MetricsMiddleware:
+    """
+    Observes `http_request_duration_seconds` per method, route template and status.
+
+    The route label is the matched path template (e.g. `/api/v1/session/jobs/{job_id}`),
+    read from the scope after routing, so path parameters never become label values.
+    Requests that match no route are counted under `unmatched`.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], route_template(scope), str(status_code)
+            ).observe(time.perf_counter() - start_time)
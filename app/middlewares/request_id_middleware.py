@@ -1,40 +1,60 @@
 # middlewares/request_id_middleware.py
 
-import uuid
-import structlog
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 import uuid
 
+import structlog
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
 logger = structlog.get_logger("request_logger")
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # request_id = request.headers.get("request_id", str(uuid.uuid4()))
+
+class RequestIDMiddleware:
+    """
+    Binds the request id to the structlog context for the whole request, echoes it in
+    the `request_id` response header and logs completed requests.
+
+    Pure ASGI: the response, streamed or not, passes straight through. The context lives
+    in contextvars, so concurrent requests on the event loop never see each other's ids.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
         request_id = (
-            request.headers.get('request_id') 
-            or request.headers.get('x-request-id') 
+            headers.get('request_id')
+            or headers.get('x-request-id')
             or f'{__name__}+{uuid.uuid4()}'
         )
+        tokens = structlog.contextvars.bind_contextvars(request_id=request_id)
+        start_time = time.perf_counter()
+        status_code = None
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["request_id"] = request_id
+            await send(message)
 
-        structlog.threadlocal.bind_threadlocal(request_id=request_id)
-
-        start_time = time.time()
-        response = await call_next(request)  # Let exceptions propagate to handler
-        duration = time.time() - start_time
-        message = "HTTP request completed"
-        if response.status_code < 400:
-            logger.info(
-                event = message,
-                message = message,
-                method=request.method,
-                path=request.url.path,
-                status=response.status_code,
-                duration=f"{duration:.3f}s"
-            )
-
-        response.headers["request_id"] = request_id
-        structlog.threadlocal.clear_threadlocal()
-
-        return response
+        try:
+            await self.app(scope, receive, send_with_request_id)  # Let exceptions propagate to handler
+        finally:
+            if status_code is not None and status_code < 400:
+                message = "HTTP request completed"
+                logger.info(
+                    event = message,
+                    message = message,
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status_code,
+                    duration=f"{time.perf_counter() - start_time:.3f}s"
+                )
+            structlog.contextvars.reset_contextvars(**tokens)
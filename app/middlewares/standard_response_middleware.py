@@ -1,71 +1,83 @@
 # app/middlewares/standard_response_middleware.py
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from typing import Any
-import json
-
-class CustomizedResponse(BaseModel):
-    status_code: int
-    code: str
-    message: str
-    data: Any
-
-class CustomResponseMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-
-        # Exclude specific paths from middleware processing
-        included_paths = ["/agentic-network/api/v1/workflows/dialogue", '/agents/apps/', "/agents/apps/warning"]
-        if not request.url.path in included_paths:
-            return await call_next(request)
-
-        # Proceed with the normal response
-        response = await call_next(request)
-
-        # Initialize default response code and message
-        response_code = "SUCCESS"
-        response_message = "Request processed successfully."
-        status_code = response.status_code
-
-        # If there’s an error (4xx or 5xx), modify response code and message
-        if status_code >= 500:
-            response_code = "ERROR"
-            response_message = "An error occurred."
-        elif status_code >= 400:
-            response_code = "WARNING"
-            response_message = "Something is wrong with request"
-
-        # Prepare the actual data from the response
-        if isinstance(response, StreamingResponse.__base__): # type: ignore
-            body = b"".join([chunk async for chunk in response.body_iterator]) # type: ignore
-            data = json.loads(body.decode())
-
-            # Instead of returning data directly, we can keep the response type intact
-            custom_response = JSONResponse(content={
-                "status_code": status_code,
-                "code": response_code,
-                "message": response_message,
-                "data": data  # Include raw data here
-            }, 
-            status_code = status_code
-            )
-            
-            return custom_response
-
-        elif isinstance(response, JSONResponse):
-            data = response  # Get the JSON object directly
-            # Do not serialize again, because data is already a Python dict
-        else:
-            data = None  # Handle other response types if necessary
-
-        # Construct the custom response
-        custom_response = CustomizedResponse(
-            status_code=status_code,
-            code=response_code,
-            message=response_message,
-            data=data  # Here, data should be a dict or list, not a string
-        )
-
-        return JSONResponse(content=custom_response.model_dump(), status_code=status_code)  # Return the custom response
+from typing import Iterable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.response_envelope import ENVELOPE_HEADER, ENVELOPE_SUFFIX, envelope_prefix
+
+DEFAULT_INCLUDED_PATHS = ("/agentic-network/api/v1/workflows/dialogue", "/agents/apps/", "/agents/apps/warning")
+
+
+class CustomResponseMiddleware:
+    """
+    Wraps JSON responses of the included paths in the standard envelope
+    (`status_code`, `code`, `message`, `data`).
+
+    The envelope is streamed around the body rather than built from it: the envelope
+    prefix goes out with the first body chunk, the body chunks are forwarded as they
+    arrive and the closing brace follows the last one. The body is never buffered or
+    re-parsed, so large and streamed JSON responses keep their memory profile.
+    Non-JSON responses (server-sent events, images) and responses already enveloped by
+    the route pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, included_paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self.included_paths = frozenset(included_paths if included_paths is not None else DEFAULT_INCLUDED_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.included_paths:
+            await self.app(scope, receive, send)
+            return
+
+        await _EnvelopeResponder(self.app)(scope, receive, send)
+
+
+class _EnvelopeResponder:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.send: Send = None
+        self.prefix: Optional[bytes] = None
+        self.has_data = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_envelope)
+
+    async def send_with_envelope(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            if ENVELOPE_HEADER in headers:
+                # Already enveloped by the route (see `envelope_response`)
+                del headers[ENVELOPE_HEADER]
+                self.passthrough = True
+            elif not headers.get("content-type", "").startswith("application/json"):
+                self.passthrough = True
+            else:
+                self.prefix = envelope_prefix(message["status"])
+                if "content-length" in headers:
+                    length = int(headers["content-length"]) or len(b"null")
+                    headers["content-length"] = str(len(self.prefix) + length + len(ENVELOPE_SUFFIX))
+            await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        chunk = b""
+        if self.prefix is not None:
+            chunk, self.prefix = self.prefix, None
+        if body:
+            self.has_data = True
+            chunk += body
+        if not more_body:
+            if not self.has_data:
+                chunk += b"null"
+            chunk += ENVELOPE_SUFFIX
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -32,6 +32,8 @@ class SavantAgentOutput(BaseModel):
 
     response: SavantChatMessage
     tools_results: list[ToolResult]  
+    session_id: Optional[str] = None
+    conversation_id: Optional[str] = None # Send it back to continue the conversation without resending chat_history
 
     def __str__(self) -> str:
         return self.response.content or ""  
\ No newline at end of file
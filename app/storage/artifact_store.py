@@ -0,0 +1,73 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from app.cache.session_cache_manager import SessionCacheManager
+
+ARTIFACT_REF_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass(frozen=True)
+class Artifact:
+    ref: str
+    media_type: str
+    data: bytes
+
+
+class ArtifactStore:
+    """
+    Stores rendered tool outputs (e.g. PNG plots) next to the session they were built
+    from, so responses can carry a short reference instead of the inline bytes.
+
+    Artifacts are content-addressed: the reference is a hash of the bytes, so storing
+    the same plot twice is a no-op and a reference never changes meaning, which lets
+    clients cache them indefinitely.
+    """
+
+    def __init__(self, session_cache: SessionCacheManager):
+        self.session_cache = session_cache
+
+    @staticmethod
+    def ref_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    @staticmethod
+    def is_valid_ref(ref: str) -> bool:
+        return bool(ARTIFACT_REF_PATTERN.match(ref))
+
+    @staticmethod
+    def _datatype(ref: str) -> str:
+        return f"artifact_{ref}"
+
+    def put(self, session_id: str, data: bytes, media_type: str = "image/png") -> str:
+        """
+        Stores artifact bytes under a session.
+
+        Returns:
+            str: The artifact reference to hand out as `output_ref`.
+        """
+        ref = self.ref_for(data)
+        if not self.session_cache.exists(session_id, self._datatype(ref)):
+            self.session_cache.save(session_id, self._datatype(ref), {"media_type": media_type, "data": data})
+        return ref
+
+    def get(self, session_id: str, ref: str) -> Optional[Artifact]:
+        if not self.is_valid_ref(ref) or not self.session_cache.exists(session_id, self._datatype(ref)):
+            return None
+        stored = self.session_cache.load(session_id, self._datatype(ref))
+        return Artifact(ref=ref, media_type=stored["media_type"], data=stored["data"])
+
+    async def aput(self, session_id: str, data: bytes, media_type: str = "image/png") -> str:
+        """Async variant of `put`."""
+        ref = self.ref_for(data)
+        if not await self.session_cache.aexists(session_id, self._datatype(ref)):
+            await self.session_cache.asave(session_id, self._datatype(ref), {"media_type": media_type, "data": data})
+        return ref
+
+    async def aget(self, session_id: str, ref: str) -> Optional[Artifact]:
+        """Async variant of `get`."""
+        if not self.is_valid_ref(ref) or not await self.session_cache.aexists(session_id, self._datatype(ref)):
+            return None
+        stored = await self.session_cache.aload(session_id, self._datatype(ref))
+        return Artifact(ref=ref, media_type=stored["media_type"], data=stored["data"])
@@ -0,0 +1,156 @@
+import bisect
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from llama_index.core.llms import ChatMessage
+
+from app.cache.session_cache_manager import SessionCacheManager
+
+CONVERSATION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+META_DATATYPE = "conversation_meta"
+
+
+class ConversationBusyError(Exception):
+    """Another request is appending to the same conversation."""
+
+    def __init__(self, conversation_id: str):
+        super().__init__(f"Conversation {conversation_id} is being updated by another request")
+        self.conversation_id = conversation_id
+
+
+class ConversationStore:
+    """
+    Chat history kept on the server per conversation, so a client continues a
+    conversation by sending its `conversation_id` and the new message only.
+
+    Each conversation is an append-only log in the session cache: every append writes
+    one new segment holding just the new messages, plus a small meta record with the
+    segment sizes. Appending never rewrites earlier messages, and `load(..., start=n)`
+    reads only the segments from message `n` on.
+
+    Every write keeps all the segments and the meta record for another
+    CONVERSATION_TTL_SECONDS (default 3600), so they expire together. A conversation
+    with a segment missing anyway (e.g. evicted) is treated as expired: it loads as
+    unknown, and the next write starts it over.
+    """
+
+    def __init__(self, session_cache: SessionCacheManager):
+        self.session_cache = session_cache
+        self.ttl = int(os.getenv("CONVERSATION_TTL_SECONDS", 3600))
+        self.lock_ttl = float(os.getenv("CONVERSATION_LOCK_TTL_SECONDS", 10))
+        self.lock_wait = float(os.getenv("CONVERSATION_LOCK_WAIT_SECONDS", 5))
+
+    @staticmethod
+    def is_valid_id(conversation_id: str) -> bool:
+        return bool(CONVERSATION_ID_PATTERN.match(conversation_id))
+
+    @staticmethod
+    def _segment_datatype(index: int) -> str:
+        return f"conversation_{index}"
+
+    def _meta(self, conversation_id: str) -> Dict[str, List[int]]:
+        if not self.session_cache.exists(conversation_id, META_DATATYPE):
+            return {"segments": []}
+        return self.session_cache.load(conversation_id, META_DATATYPE)
+
+    def _load_segment(self, conversation_id: str, index: int) -> Optional[List[dict]]:
+        try:
+            return self.session_cache.load(conversation_id, self._segment_datatype(index))
+        except FileNotFoundError:
+            return None
+
+    def exists(self, conversation_id: str) -> bool:
+        return self.is_valid_id(conversation_id) and self.session_cache.exists(conversation_id, META_DATATYPE)
+
+    def count(self, conversation_id: str) -> int:
+        """Number of messages stored for the conversation."""
+        return sum(self._meta(conversation_id)["segments"])
+
+    def load(self, conversation_id: str, start: int = 0) -> List[ChatMessage]:
+        """
+        Returns the conversation's messages from index `start` on (all of them by default),
+        or an empty list for an unknown or expired conversation.
+        """
+        if not self.is_valid_id(conversation_id):
+            return []
+        segments = self._meta(conversation_id)["segments"]
+        offsets = [0]
+        for size in segments:
+            offsets.append(offsets[-1] + size)
+
+        messages: List[ChatMessage] = []
+        first = max(bisect.bisect_right(offsets, start) - 1, 0)
+        for index in range(first, len(segments)):
+            stored = self._load_segment(conversation_id, index)
+            if stored is None:
+                return []
+            skip = max(start - offsets[index], 0)
+            messages.extend(ChatMessage.model_validate(message) for message in stored[skip:])
+        return messages
+
+    def append(self, conversation_id: str, messages: List[ChatMessage]) -> int:
+        """
+        Appends messages to the conversation, creating it if needed.
+
+        Returns:
+            int: The number of messages stored for the conversation afterwards.
+
+        Raises:
+            ValueError: If the conversation id is not a safe cache key.
+            ConversationBusyError: If another append holds the conversation for longer
+                than CONVERSATION_LOCK_WAIT_SECONDS.
+        """
+        return self._write(conversation_id, messages, stored_prefix=False)
+
+    def sync(self, conversation_id: str, history: List[ChatMessage]) -> int:
+        """
+        Stores a conversation's full history (e.g. an agent's memory after a run) by
+        appending only the messages past those already stored. Raises like `append`.
+        """
+        return self._write(conversation_id, history, stored_prefix=True)
+
+    def _write(self, conversation_id: str, messages: List[ChatMessage], stored_prefix: bool) -> int:
+        if not self.is_valid_id(conversation_id):
+            raise ValueError(f"Invalid conversation id: {conversation_id}")
+
+        lock = self.session_cache.get_lock()
+        lock_name = f"conversation_{conversation_id}"
+        deadline = time.monotonic() + self.lock_wait
+        token = lock.acquire(lock_name, self.lock_ttl)
+        while token is None:
+            if time.monotonic() > deadline:
+                raise ConversationBusyError(conversation_id)
+            time.sleep(0.05)
+            token = lock.acquire(lock_name, self.lock_ttl)
+
+        try:
+            segments = list(self._meta(conversation_id)["segments"])
+            stored = [self._segment_datatype(index) for index in range(len(segments))]
+            if not self.session_cache.expire(conversation_id, stored, self.ttl):
+                # A segment expired or was evicted: start the conversation over
+                self._delete(conversation_id, len(segments))
+                segments = []
+            if stored_prefix:
+                messages = messages[sum(segments):]
+            if not messages:
+                return sum(segments)
+            self.session_cache.save(conversation_id, self._segment_datatype(len(segments)),
+                                    [message.model_dump() for message in messages], self.ttl)
+            # The meta record is written last, so readers never see a segment that is not there yet
+            segments.append(len(messages))
+            self.session_cache.save(conversation_id, META_DATATYPE, {"segments": segments}, self.ttl)
+            return sum(segments)
+        finally:
+            lock.release(lock_name, token)
+
+    def delete(self, conversation_id: str) -> None:
+        if not self.is_valid_id(conversation_id):
+            return
+        self._delete(conversation_id, len(self._meta(conversation_id)["segments"]))
+
+    def _delete(self, conversation_id: str, segment_count: int) -> None:
+        for index in range(segment_count):
+            self.session_cache.delete(conversation_id, self._segment_datatype(index))
+        self.session_cache.delete(conversation_id, META_DATATYPE)
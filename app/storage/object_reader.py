@@ -1,3 +1,4 @@
+import hashlib
 from abc import ABC, abstractmethod
 from typing import BinaryIO
 
@@ -9,3 +10,15 @@ class ObjectReader(ABC):
         Should return an open stream (e.g., from open(file, 'rb') or BytesIO).
         """
         pass
+
+    def identity(self) -> str:
+        """
+        Returns a stable identity of the underlying object, used to derive
+        content-addressed session ids. Defaults to a SHA-256 of the content;
+        readers with cheaper version metadata (e.g. S3 ETags) should override it.
+        """
+        digest = hashlib.sha256()
+        with self.read() as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return f"sha256:{digest.hexdigest()}"
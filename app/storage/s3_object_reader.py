@@ -1,7 +1,10 @@
 from app.storage.object_reader import ObjectReader
+import time
 import boto3
 from io import BytesIO
 
+from app.core.metrics import record_s3_download
+
 class S3ObjectReader(ObjectReader):
     def __init__(self, bucket: str, key: str, s3_client=None):
         self.bucket = bucket
@@ -9,5 +12,13 @@ class S3ObjectReader(ObjectReader):
         self.s3_client = s3_client or boto3.client("s3")
 
     def read(self):
+        start_time = time.perf_counter()
         response = self.s3_client.get_object(Bucket=self.bucket, Key=self.key)
-        return BytesIO(response["Body"].read())
+        body = response["Body"].read()
+        record_s3_download(len(body), time.perf_counter() - start_time)
+        return BytesIO(body)
+
+    def identity(self) -> str:
+        response = self.s3_client.head_object(Bucket=self.bucket, Key=self.key)
+        etag = response["ETag"].strip('"')
+        return f"s3://{self.bucket}/{self.key}@{etag}"
@@ -3,14 +3,13 @@ load_dotenv()
 import os, sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
-from llama_index.llms.openai import OpenAI
 from llama_index.core.prompts import PromptTemplate
 from llama_index.core.tools import FunctionTool
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any, Tuple
 from app.models.llm_models import LLMTokenCount
 from app.llms.llm_token_program import LLMTextCompletionProgramWithToken
-from app.llms.open_ai import  llm_openAI
+from app.llms.open_ai import get_openai_llm
 
 class userMessagePromptResponse(BaseModel):
     """Data model for a User Message Response."""
@@ -34,7 +33,7 @@ async def a_queryResponse(user_query:str) -> Tuple[str,LLMTokenCount]:
     """
     program = LLMTextCompletionProgramWithToken.from_defaults(
         output_cls=userMessagePromptResponse,
-        llm=llm_openAI,
+        llm=get_openai_llm(),
         prompt_template_str=dialogue_handling_str,
         verbose=True,
     )
@@ -52,7 +51,7 @@ async def queryResponse(user_query:str) -> Tuple[str,LLMTokenCount]:
     """
     program = LLMTextCompletionProgramWithToken.from_defaults(
         output_cls=userMessagePromptResponse,
-        llm=llm_openAI,
+        llm=get_openai_llm(),
         prompt_template_str=dialogue_handling_str,
         verbose=True,
     )
@@ -0,0 +1,32 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    # Pydantic models serialize themselves straight to JSON bytes in pydantic-core;
+    # Fragment embeds those bytes as-is instead of walking an intermediate dict.
+    if isinstance(obj, BaseModel):
+        return orjson.Fragment(obj.model_dump_json())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes response content with orjson (dataclasses, numpy arrays and pydantic models included)."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Returning it from an endpoint also skips FastAPI's `jsonable_encoder` pass, which
+    otherwise rebuilds the whole payload as plain dicts before it is serialized.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,48 @@
+# utils/response_envelope.py
+
+from typing import Any, Tuple
+
+from pydantic import BaseModel
+
+from app.utils.fast_json_response import FastJSONResponse, dumps
+
+ENVELOPE_SUFFIX = b"}"
+# Marks responses already enveloped at the route; CustomResponseMiddleware strips it
+ENVELOPE_HEADER = "x-response-envelope"
+
+
+class CustomizedResponse(BaseModel):
+    status_code: int
+    code: str
+    message: str
+    data: Any
+
+
+def envelope_code(status_code: int) -> Tuple[str, str]:
+    """The envelope `code` and `message` for a response status."""
+    if status_code >= 500:
+        return "ERROR", "An error occurred."
+    if status_code >= 400:
+        return "WARNING", "Something is wrong with request"
+    return "SUCCESS", "Request processed successfully."
+
+
+def envelope_prefix(status_code: int) -> bytes:
+    """
+    The envelope up to and including the `"data":` key. Writing this prefix, then the
+    response's own JSON body, then ENVELOPE_SUFFIX yields the complete envelope without
+    parsing the body.
+    """
+    code, message = envelope_code(status_code)
+    head = dumps({"status_code": status_code, "code": code, "message": message})
+    return head[:-1] + b',"data":'
+
+
+def envelope_response(data: Any = None, status_code: int = 200) -> FastJSONResponse:
+    """Builds the enveloped response at the route, serializing `data` once."""
+    code, message = envelope_code(status_code)
+    return FastJSONResponse(
+        content=CustomizedResponse(status_code=status_code, code=code, message=message, data=data),
+        status_code=status_code,
+        headers={ENVELOPE_HEADER: "standard"},
+    )
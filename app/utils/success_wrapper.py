@@ -1,12 +1,13 @@
 # utils/success_response.py
 
-from fastapi.responses import JSONResponse
-from typing import Any, Optional
+from typing import Any, Dict, Optional
+
+from app.utils.fast_json_response import FastJSONResponse
 
 class SuccessResponse:
     @staticmethod
-    # def ok(data: Any = None, message: str = "OK", status_code: int = 200):
-    def ok(request_id: str, message: str = "OK", status_code: int = 200, data: Optional[Any] = None):
+    def envelope(request_id: str, message: str = "OK", data: Optional[Any] = None) -> Dict[str, Any]:
+        """The success body as a dict, for payloads that are not sent as a response of their own (e.g. SSE frames)."""
         return {
                     'request_id': request_id,
                     "message": message,
@@ -14,6 +15,16 @@ class SuccessResponse:
                     "data": data,
                 }
 
+    @staticmethod
+    # def ok(data: Any = None, message: str = "OK", status_code: int = 200):
+    def ok(request_id: str, message: str = "OK", status_code: int = 200, data: Optional[Any] = None,
+           headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+        return FastJSONResponse(
+            content=SuccessResponse.envelope(request_id, message=message, data=data),
+            status_code=status_code,
+            headers=headers,
+        )
+
     @staticmethod
     def created(request_id: str, message: str = "Created", status_code = 201, data: Any = None, ):
         return SuccessResponse.ok(request_id, data = data, message = message, status_code = status_code)
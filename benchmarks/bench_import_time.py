@@ -0,0 +1,64 @@
+"""
+Cold-start import time benchmark.
+
+Imports a module in a fresh interpreter with `python -X importtime`, reports the total
+and the slowest imports by cumulative time, and lists which of the heavy libraries
+(shap, matplotlib, sklearn, ...) were pulled in at import. These should only load
+when a tool or session build first needs them.
+
+Set IMPORT_TIME_BUDGET_MS to fail (exit status 1) when the total exceeds the budget,
+e.g. in CI.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time [module] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+HEAVY_MODULES = ("shap", "matplotlib", "seaborn", "sklearn", "pandas", "openai", "watchtower")
+
+
+def measure(module: str) -> Tuple[List[Tuple[int, str]], List[str]]:
+    """Returns the (cumulative microseconds, module) entries and the heavy modules that were loaded."""
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), name.rstrip()))
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return entries, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("module", nargs="?", default="app.api.api_router")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    entries, loaded = measure(args.module)
+    total_ms = next(us for us, name in entries if name.strip() == args.module) / 1000
+
+    print(f"{args.module}: {total_ms:.0f} ms")
+    print(f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+    print(f"\n{'cumulative ms':>14}  module")
+    for us, name in sorted(entries, reverse=True)[:args.top]:
+        print(f"{us / 1000:>14.1f}  {name.strip()}")
+
+    budget = os.getenv("IMPORT_TIME_BUDGET_MS")
+    if budget and total_ms > float(budget):
+        print(f"\nimport time {total_ms:.0f} ms exceeds budget {budget} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
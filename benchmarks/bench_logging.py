@@ -0,0 +1,154 @@
+"""
+Per-log-call latency benchmark.
+
+Measures how long a structlog `logger.info(...)` call takes on the calling thread with
+the previous logging setup (handlers attached to the root logger, formatting with the
+stdlib json module on every call) and with the queued pipeline from
+`app.logger.log_config` (context captured, record enqueued, formatting and writing
+done by the listener thread with orjson). Output goes to os.devnull and a temporary
+file; an in-memory handler stands in for CloudWatch. The `slow sink` rows add a sink
+that blocks 1 ms every 100 records, as a network call would.
+
+Run from the repository root:
+    python -m benchmarks.bench_logging
+"""
+import logging
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import structlog
+from pythonjsonlogger import json
+
+from app.logger.log_config import RequestIDFilter, SourceAwareJsonFormatter, build_handlers
+from app.logger.log_queue import BatchingQueueListener, BoundedQueueHandler
+
+CALLS = 5000
+
+
+class MemorySink(logging.Handler):
+    """Stands in for the CloudWatch handler: formats the record and keeps it in memory."""
+
+    def __init__(self, block_every: int = 0):
+        super().__init__()
+        self.block_every = block_every
+        self.records: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(self.format(record))
+        if self.block_every and len(self.records) % self.block_every == 0:
+            time.sleep(0.001)
+
+
+class LegacyJsonFormatter(json.JsonFormatter):
+    def add_fields(self, log_record, record, message_dict):
+        super().add_fields(log_record, record, message_dict)
+        log_record['logger'] = record.name
+        log_record['level'] = record.levelname
+        log_record['timestamp'] = self.formatTime(record, self.datefmt)
+        return log_record
+
+
+def _configure_structlog() -> None:
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        cache_logger_on_first_use=True,
+    )
+
+
+def _legacy_handlers(log_file: str, sink: logging.Handler) -> List[logging.Handler]:
+    stream_handler = logging.StreamHandler(open(os.devnull, "w"))
+    stream_handler.setFormatter(structlog.stdlib.ProcessorFormatter(
+        processor=structlog.processors.JSONRenderer(),
+        foreign_pre_chain=[structlog.contextvars.merge_contextvars, structlog.processors.add_log_level],
+    ))
+    file_handler = logging.FileHandler(log_file, mode='a')
+    file_handler.setFormatter(LegacyJsonFormatter())
+    sink.setFormatter(LegacyJsonFormatter())
+    for handler in (stream_handler, file_handler, sink):
+        handler.addFilter(RequestIDFilter())
+    return [stream_handler, file_handler, sink]
+
+
+def _queued_handlers(log_file: str, sink: logging.Handler) -> List[logging.Handler]:
+    stream_handler, file_handler, _ = build_handlers(log_file)
+    stream_handler.setStream(open(os.devnull, "w"))
+    sink.setFormatter(SourceAwareJsonFormatter())
+    return [stream_handler, file_handler, sink]
+
+
+def _time_calls(logger) -> List[float]:
+    timings = []
+    for i in range(CALLS):
+        start = time.perf_counter()
+        logger.info("Model query completed", session_id="abc123", tool="shap_summary_plot", elapsed_ms=i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(mode: str, block_every: int = 0) -> Dict[str, float]:
+    log_file = os.path.join(tempfile.mkdtemp(), "bench.log")
+    sink = MemorySink(block_every)
+    listener = None
+    if mode == "legacy":
+        handlers = _legacy_handlers(log_file, sink)
+    else:
+        queue_handler = BoundedQueueHandler(maxsize=CALLS * 2)
+        queue_handler.addFilter(RequestIDFilter())
+        listener = BatchingQueueListener(queue_handler, _queued_handlers(log_file, sink))
+        listener.start()
+        handlers = [queue_handler]
+
+    logging.root.handlers = handlers
+    logging.root.setLevel(logging.INFO)
+    _configure_structlog()
+    structlog.contextvars.bind_contextvars(request_id="bench")
+    logger = structlog.get_logger("bench")
+
+    timings = _time_calls(logger)
+    start = time.perf_counter()
+    if listener is not None:
+        listener.stop(timeout=60)
+    drain = time.perf_counter() - start
+    logging.root.handlers = []
+    structlog.contextvars.clear_contextvars()
+
+    timings.sort()
+    return {
+        "mean": statistics.fmean(timings) * 1e6,
+        "p50": timings[len(timings) // 2] * 1e6,
+        "p99": timings[int(len(timings) * 0.99)] * 1e6,
+        "max": timings[-1] * 1e6,
+        "drain": drain * 1e3,
+        "written": len(sink.records),
+    }
+
+
+def main() -> None:
+    print(f"{CALLS} calls per run, latency on the calling thread in microseconds")
+    print(f"{'setup':<20}{'mean':>9}{'p50':>9}{'p99':>9}{'max':>10}{'drain ms':>10}{'written':>9}")
+    for label, mode, block_every in (
+        ("legacy", "legacy", 0),
+        ("queued", "queued", 0),
+        ("legacy, slow sink", "legacy", 100),
+        ("queued, slow sink", "queued", 100),
+    ):
+        r = run(mode, block_every)
+        print(f"{label:<20}{r['mean']:>9.1f}{r['p50']:>9.1f}{r['p99']:>9.1f}{r['max']:>10.1f}{r['drain']:>10.1f}{r['written']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Per-request middleware overhead benchmark.
+
+Drives a small Starlette app directly over ASGI (no server, no client library) with the
+request-id and exception-logging middleware installed, and compares the current pure
+ASGI middleware against the previous BaseHTTPMiddleware implementation, plus the cost
+of the streamed response envelope on top. For each route it reports the mean time per
+request and the time until the first body chunk reaches the server, which shows
+whether the middleware buffers.
+
+Run from the repository root:
+    python -m benchmarks.bench_middleware
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+import structlog
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from app.middlewares.exception_logging_middleware import ExceptionLoggingMiddleware
+from app.middlewares.request_id_middleware import RequestIDMiddleware
+from app.middlewares.standard_response_middleware import CustomResponseMiddleware
+
+SSE_EVENTS = 20
+SSE_INTERVAL_SECONDS = 0.002
+
+
+class LegacyRequestIDMiddleware(BaseHTTPMiddleware):
+    """The BaseHTTPMiddleware implementation this benchmark compares against."""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get('request_id') or request.headers.get('x-request-id') or f'{__name__}+{uuid.uuid4()}'
+        structlog.threadlocal.bind_threadlocal(request_id=request_id)
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        if response.status_code < 400:
+            structlog.get_logger("request_logger").info("HTTP request completed", method=request.method,
+                                                        path=request.url.path, status=response.status_code,
+                                                        duration=f"{time.perf_counter() - start_time:.3f}s")
+        response.headers['request_id'] = request_id
+        structlog.threadlocal.clear_threadlocal()
+        return response
+
+
+class LegacyExceptionLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            structlog.get_logger("error_logger").exception("Unhandled exception occurred")
+            raise
+
+
+async def small_json(request: Request) -> Response:
+    return Response(b'{"status":"success","data":{"answer":"0.91"}}', media_type="application/json")
+
+
+async def large_json(request: Request) -> Response:
+    return Response(b'{"data":"' + b"x" * 1_000_000 + b'"}', media_type="application/json")
+
+
+async def sse(request: Request) -> StreamingResponse:
+    async def events():
+        for i in range(SSE_EVENTS):
+            yield f"event: progress\ndata: {i}\n\n"
+            await asyncio.sleep(SSE_INTERVAL_SECONDS)
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def build_app(middleware: List[Middleware]) -> Starlette:
+    routes = [Route("/small", small_json), Route("/large", large_json), Route("/sse", sse)]
+    return Starlette(routes=routes, middleware=middleware)
+
+
+async def drive(app: Callable, path: str) -> Dict[str, float]:
+    """Runs one GET through the ASGI app, returning total and first-body-chunk times in ms."""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    timings: Dict[str, Any] = {"first_body": None}
+    request_sent = False
+    response_done = asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        # Like a server: the request body once, then block until the client goes away
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if timings["first_body"] is None:
+                timings["first_body"] = (time.perf_counter() - start) * 1000
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    timings["total"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+async def bench(app: Callable, path: str, number: int) -> Dict[str, float]:
+    for _ in range(10):
+        await drive(app, path)
+    runs = [await drive(app, path) for _ in range(number)]
+    return {"total": sum(r["total"] for r in runs) / number, "first_body": sum(r["first_body"] for r in runs) / number}
+
+
+async def run(number: int) -> None:
+    apps = {
+        "none": build_app([]),
+        "BaseHTTPMiddleware": build_app([Middleware(LegacyExceptionLoggingMiddleware), Middleware(LegacyRequestIDMiddleware)]),
+        "pure ASGI": build_app([Middleware(ExceptionLoggingMiddleware), Middleware(RequestIDMiddleware)]),
+        "pure ASGI + envelope": build_app([Middleware(CustomResponseMiddleware, included_paths=["/small", "/large"]),
+                                           Middleware(ExceptionLoggingMiddleware), Middleware(RequestIDMiddleware)]),
+    }
+    print(f"{'route':<10}{'middleware':<22}{'ms/request':>12}{'first chunk ms':>16}")
+    for path, requests in (("/small", number), ("/large", number // 10), ("/sse", max(number // 50, 5))):
+        for label, app in apps.items():
+            result = await bench(app, path, requests)
+            print(f"{path:<10}{label:<22}{result['total']:>12.3f}{result['first_body']:>16.3f}")
+
+
+def main(number: int = 2000) -> None:
+    logging.disable(logging.CRITICAL)
+    structlog.configure(logger_factory=structlog.stdlib.LoggerFactory(), wrapper_class=structlog.stdlib.BoundLogger)
+    asyncio.run(run(number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Serialization benchmark for typical agent responses.
+
+Compares the default FastAPI path (jsonable_encoder + stdlib json via JSONResponse)
+with SuccessResponse.ok (orjson, pydantic models serialized by pydantic-core), and
+reports bytes on the wire uncompressed, gzipped and brotli-compressed.
+
+Run from the repository root:
+    python -m benchmarks.bench_serialization
+"""
+import base64
+import dataclasses
+import gzip
+import os
+import timeit
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.agent_models import SavantAgentOutput, SavantChatMessage, ToolResult, ToolResultOutput
+from app.utils.success_wrapper import SuccessResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@dataclasses.dataclass
+class OutputData:
+    content_type: str
+    conv_text: str
+    content: Any | None = None
+    session_id: str | None = None
+
+
+def _agent_output(tools_results: list) -> SavantAgentOutput:
+    return SavantAgentOutput(
+        response=SavantChatMessage(role="assistant", content="The model relies mostly on prior fulfilment history. " * 8),
+        tools_results=tools_results,
+        session_id="2797d28318a05304c3715c47045787c9",
+    )
+
+
+def build_payloads() -> Dict[str, Any]:
+    # A SHAP summary plot PNG is ~150 KB; random bytes stand in for it (PNG data does not compress)
+    png = os.urandom(150_000)
+    feature_importance = [{"feature": f"feature_{i}", "mean_abs_shap": 1.0 / (i + 1), "rank": i + 1} for i in range(25)]
+    narrative = "Feature feature_3 raises the fulfilment probability for most patients. " * 40
+
+    def tool(name: str, content_type: str, content: Any, output_ref: str = None) -> ToolResult:
+        return ToolResult(tool_name=name, tool_input={"args": [], "kwargs": {}}, content=f"{name} executed",
+                          tool_output=ToolResultOutput(tool_name=name, session_id="s", conversation_id="c",
+                                                       content_type=content_type, content=content, output_ref=output_ref))
+
+    base64_image = base64.b64encode(png).decode("utf-8")
+    return {
+        "query_base64_image": OutputData(content_type="BASE64IMAGE", conv_text="Tool Executed Completed",
+                                         content=base64_image, session_id="s"),
+        "agent_query_base64_image": _agent_output([tool("SHAP_SUMMARY_PLOT", "BASE64IMAGE", base64_image)]),
+        "agent_query_artifact_refs": _agent_output([
+            tool("SHAP_SUMMARY_PLOT", "STORAGEARTIFACT", None, output_ref="0c0abe616e1ea045b9782945bbde9f41"),
+            tool("SHAP_FEATURE_IMPORTANCE", "JSON", feature_importance),
+            tool("SHAP_INSIGHT_NARRATIVE", "STRING", narrative),
+            tool("F1_SCORE", "STRING", "0.91"),
+        ]),
+    }
+
+
+def fastapi_default(payload: Any) -> bytes:
+    return JSONResponse(content=jsonable_encoder(SuccessResponse.envelope(request_id="bench", data=payload))).body
+
+
+def fast_json(payload: Any) -> bytes:
+    return SuccessResponse.ok(request_id="bench", data=payload).body
+
+
+def _time_ms(fn: Callable[[Any], bytes], payload: Any, number: int) -> float:
+    return min(timeit.repeat(lambda: fn(payload), number=number, repeat=5)) / number * 1000
+
+
+def main(number: int = 200) -> None:
+    print(f"{'payload':<28}{'serializer':<18}{'ms/op':>8}{'bytes':>10}{'gzip':>10}{'br':>10}")
+    for name, payload in build_payloads().items():
+        for label, fn in (("fastapi default", fastapi_default), ("orjson", fast_json)):
+            body = fn(payload)
+            gzipped = len(gzip.compress(body, compresslevel=6))
+            brotlied = len(brotli.compress(body, quality=4)) if brotli is not None else "n/a"
+            print(f"{name:<28}{label:<18}{_time_ms(fn, payload, number):>8.3f}{len(body):>10}{gzipped:>10}{brotlied:>10}")
+
+
+if __name__ == "__main__":
+    main()
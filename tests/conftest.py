@@ -0,0 +1,27 @@
+import pytest
+
+from app.cache.joblib_session_cache import JoblibSessionCache
+
+
+@pytest.fixture
+def make_joblib_cache(tmp_path, monkeypatch):
+    """
+    Builds JoblibSessionCache instances on the test's tmp_path, with the background
+    sweeper off (tests call `sweep` themselves). Keywords override environment settings;
+    several instances share the directory like the workers of one pod.
+    """
+    def make(**env) -> JoblibSessionCache:
+        monkeypatch.setenv("JOBLIB_CACHE_DIR", str(tmp_path))
+        monkeypatch.setenv("JOBLIB_CACHE_SWEEP_INTERVAL_SECONDS", "0")
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        cache = JoblibSessionCache.__new__(JoblibSessionCache)
+        cache._initialize()
+        return cache
+
+    return make
+
+
+@pytest.fixture
+def joblib_cache(make_joblib_cache) -> JoblibSessionCache:
+    return make_joblib_cache()
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.core.admission_controller import AdmissionController, AdmissionRejectedError
+
+
+def _new_controller(monkeypatch, **env) -> AdmissionController:
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    controller = AdmissionController.__new__(AdmissionController)
+    controller._initialize()
+    return controller
+
+
+@pytest.mark.asyncio
+async def test_per_key_limit_queues_then_rejects(monkeypatch):
+    controller = _new_controller(monkeypatch, AGENT_MAX_CONCURRENCY=4, AGENT_MAX_CONCURRENCY_PER_KEY=1,
+                                 AGENT_MAX_QUEUE=1, AGENT_QUEUE_TIMEOUT_SECONDS=5)
+    release = asyncio.Event()
+
+    async def hold(api_key: str):
+        async with controller.admit(api_key) as queue_time:
+            await release.wait()
+            return queue_time
+
+    first = asyncio.create_task(hold("key-a"))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(hold("key-a"))
+    other_key = asyncio.create_task(hold("key-b"))
+    await asyncio.sleep(0.01)
+
+    assert controller.stats()["active"] == 2
+    assert controller.stats()["waiting"] == 1
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        async with controller.admit("key-a"):
+            pass
+    assert rejected.value.reason == "queue_full"
+
+    release.set()
+    await asyncio.gather(first, queued, other_key)
+    stats = controller.stats()
+    assert stats["admitted"] == 3
+    assert stats["active"] == 0
+    assert stats["rejected"] == {"queue_full": 1, "timeout": 0}
+    assert stats["queue_time_seconds"]["max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_wait_times_out_and_frees_queue(monkeypatch):
+    controller = _new_controller(monkeypatch, AGENT_MAX_CONCURRENCY=1, AGENT_QUEUE_TIMEOUT_SECONDS=0.05)
+
+    async with controller.admit("key-a"):
+        with pytest.raises(AdmissionRejectedError) as rejected:
+            async with controller.admit("key-b"):
+                pass
+
+    assert rejected.value.reason == "timeout"
+    assert controller.stats()["waiting"] == 0
+    async with controller.admit("key-b"):
+        assert controller.stats()["active"] == 1
@@ -0,0 +1,50 @@
+import pytest
+from llama_index.core.llms import ChatMessage
+from llama_index.core.tools import FunctionTool
+from llama_index.core.workflow.context import Context
+
+from agent_apps.model_analyzer.agent.ds_model_agents import PharmaModelAnalyzerAgent
+from agent_apps.model_analyzer.agent.ds_model_kernels import ModelAnalyzerKernel
+from app.core.agent.agent_conversation import AgentConversation
+from app.core.agent.savant_agent_pool import SavantAgentPool
+from app.llms.llm_manager import LLMManager
+from app.llms.mock_function_llm import MockFunctionCallingLLM
+
+
+async def echo_session_id(ctx: Context) -> str:
+    """Echo the session id of the current model analysis session."""
+    return await ctx.get("session_id")
+
+
+echo_session_id_tool = FunctionTool.from_defaults(async_fn=echo_session_id, name="ECHO_SESSION_ID")
+
+
+@pytest.fixture
+def kernel(monkeypatch):
+    monkeypatch.setitem(LLMManager._instances, "mock", MockFunctionCallingLLM(max_tokens=128000))
+    pool = SavantAgentPool.get_instance()
+    pool.clear()
+    yield pool.get_kernel(PharmaModelAnalyzerAgent, tools=[echo_session_id_tool], llm_alias="mock",
+                          kernel_cls=ModelAnalyzerKernel)
+    pool.clear()
+
+
+@pytest.mark.asyncio
+async def test_turns_share_one_context(kernel):
+    earlier = [ChatMessage(role="user", content="Hello"), ChatMessage(role="assistant", content="Hi")]
+    conversation = AgentConversation(kernel, chat_history=earlier)
+    await conversation.bind(session_id="session-1")
+    context = conversation.context
+
+    first = await conversation.run("Echo the session id")
+    history_after_first = len(await conversation.history())
+    second = await conversation.run("Echo the session id again")
+
+    assert conversation.context is context
+    assert conversation.turns == 2
+    assert [call.tool_output.content for call in first.tool_calls] == ["session-1"]
+    assert [call.tool_output.content for call in second.tool_calls] == ["session-1"]
+    history = await conversation.history()
+    assert [message.content for message in history[:2]] == ["Hello", "Hi"]
+    assert len(history) > history_after_first
+    assert await context.get("conversation_id") == conversation.conversation_id
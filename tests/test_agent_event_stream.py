@@ -0,0 +1,33 @@
+import json
+
+from llama_index.core.agent.workflow.workflow_events import AgentStream, ToolCall, ToolCallResult
+from llama_index.core.tools import ToolOutput
+from llama_index.core.workflow import StopEvent
+
+from app.core.utils.agent_event_stream import AgentEventStream
+
+
+def test_agent_events_map_to_sse_frames():
+    delta = AgentStream(delta="Hel", response="Hel", current_agent_name="agent", tool_calls=[], raw=None)
+    tool_call = ToolCall(tool_name="F1_SCORE", tool_kwargs={}, tool_id="call-1")
+    tool_result = ToolCallResult(
+        tool_name="F1_SCORE",
+        tool_kwargs={},
+        tool_id="call-1",
+        tool_output=ToolOutput(content="0.91", tool_name="F1_SCORE", raw_input={}, raw_output=0.91),
+        return_direct=False,
+    )
+
+    assert AgentEventStream.to_sse(delta) == 'event: delta\ndata: {"agent":"agent","delta":"Hel"}\n\n'
+    assert AgentEventStream.to_message(tool_call)[0] == "tool_call"
+
+    event, payload = AgentEventStream.to_message(tool_result)
+    assert event == "tool_result"
+    assert json.loads(json.dumps(payload)) == {"tool_id": "call-1", "tool_name": "F1_SCORE", "is_error": False, "content": "0.91"}
+
+
+def test_silent_events_are_not_forwarded():
+    empty_delta = AgentStream(delta="", response="", current_agent_name="agent", tool_calls=[], raw=None)
+
+    assert AgentEventStream.to_sse(empty_delta) is None
+    assert AgentEventStream.to_sse(StopEvent()) is None
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from llama_index.core.tools import FunctionTool
+from llama_index.core.workflow.context import Context
+
+from agent_apps.model_analyzer.agent.ds_model_agents import PharmaModelAnalyzerAgent
+from agent_apps.model_analyzer.agent.ds_model_kernels import ModelAnalyzerKernel
+from app.core.agent.savant_agent_pool import SavantAgentPool
+from app.llms.llm_manager import LLMManager
+from app.llms.mock_function_llm import MockFunctionCallingLLM
+
+
+async def echo_session_id(ctx: Context) -> str:
+    """Echo the session id of the current model analysis session."""
+    return await ctx.get("session_id")
+
+
+echo_session_id_tool = FunctionTool.from_defaults(async_fn=echo_session_id, name="ECHO_SESSION_ID")
+
+
+@pytest.fixture
+def mock_llm_pool(monkeypatch):
+    monkeypatch.setitem(LLMManager._instances, "mock", MockFunctionCallingLLM(max_tokens=128000))
+    pool = SavantAgentPool.get_instance()
+    pool.clear()
+    yield pool
+    pool.clear()
+
+
+def test_pool_reuses_kernel_per_configuration(mock_llm_pool):
+    kernel = mock_llm_pool.get_kernel(PharmaModelAnalyzerAgent, tools=[echo_session_id_tool],
+                                      llm_alias="mock", kernel_cls=ModelAnalyzerKernel)
+    same_kernel = mock_llm_pool.get_kernel(PharmaModelAnalyzerAgent, tools=[echo_session_id_tool],
+                                           llm_alias="mock", kernel_cls=ModelAnalyzerKernel)
+    other_kernel = mock_llm_pool.get_kernel(PharmaModelAnalyzerAgent, tools=[echo_session_id_tool],
+                                            llm_alias="mock")
+
+    assert kernel is same_kernel
+    assert kernel is not other_kernel
+    assert isinstance(kernel, ModelAnalyzerKernel)
+    assert kernel._get_steps() is kernel._get_steps()
+
+
+@pytest.mark.asyncio
+async def test_pooled_kernel_isolates_concurrent_runs(mock_llm_pool):
+    kernel = mock_llm_pool.get_kernel(PharmaModelAnalyzerAgent, tools=[echo_session_id_tool],
+                                      llm_alias="mock", kernel_cls=ModelAnalyzerKernel)
+
+    async def run_for(session_id: str):
+        context = kernel.new_context()
+        await context.set("session_id", session_id)
+        response = await kernel.run(user_msg="Echo the session id", ctx=context)
+        return [call.tool_output.content for call in response.tool_calls]
+
+    results = await asyncio.gather(*(run_for(f"session-{i}") for i in range(5)))
+
+    assert results == [[f"session-{i}"] for i in range(5)]
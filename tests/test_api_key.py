@@ -0,0 +1,38 @@
+import pytest
+from fastapi import Depends, FastAPI, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.security import api_key
+from app.api.security.api_key import get_websocket_api_key, websocket_api_key_subprotocol
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket, key: str = Depends(get_websocket_api_key)):
+        await websocket.accept(subprotocol=websocket_api_key_subprotocol(websocket))
+        await websocket.send_text("ok")
+        await websocket.close()
+
+    return app
+
+
+def test_websocket_api_key_from_header_or_subprotocol_only(monkeypatch):
+    monkeypatch.setattr(api_key, "API_KEY", "secret")
+    client = TestClient(_app())
+
+    with client.websocket_connect("/ws", headers={"X-Api-Key": "secret"}) as websocket:
+        assert websocket.receive_text() == "ok"
+    with client.websocket_connect("/ws", subprotocols=["api-key.secret"]) as websocket:
+        assert websocket.accepted_subprotocol == "api-key.secret"
+        assert websocket.receive_text() == "ok"
+
+    # Keys in the URL end up in access logs
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/ws?api_key=secret"):
+            pass
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/ws", subprotocols=["api-key.wrong"]):
+            pass
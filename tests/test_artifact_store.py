@@ -0,0 +1,19 @@
+from app.cache.joblib_session_cache import JoblibSessionCache
+from app.storage.artifact_store import ArtifactStore
+
+
+def test_artifacts_are_content_addressed_per_session():
+    cache = JoblibSessionCache.get_instance()
+    store = ArtifactStore(cache)
+    png = b"\x89PNG\r\n\x1a\n" + b"plot" * 16
+
+    ref = store.put("artifact-test", png)
+    try:
+        assert store.put("artifact-test", png) == ref
+        artifact = store.get("artifact-test", ref)
+        assert artifact.data == png
+        assert artifact.media_type == "image/png"
+        assert store.get("other-session", ref) is None
+        assert store.get("artifact-test", "../artifact-test") is None
+    finally:
+        cache.delete("artifact-test", f"artifact_{ref}")
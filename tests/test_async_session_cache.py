@@ -0,0 +1,79 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.cache.memoized_session_cache import MemoizedSessionCache
+from app.cache.session_cache_manager import SessionCacheManager
+from app.storage.artifact_store import ArtifactStore
+
+
+@pytest.mark.asyncio
+async def test_joblib_async_api_round_trip(joblib_cache):
+    await joblib_cache.asave_many("s1", {"shap": np.ones((4, 2)), "features": ["a", "b"]})
+    await joblib_cache.asave("s1", "model", {"w": 1})
+
+    assert await joblib_cache.aexists("s1", "shap")
+    loaded = await joblib_cache.aload_many("s1", ["features", "model"])
+    assert loaded == {"features": ["a", "b"], "model": {"w": 1}}
+    np.testing.assert_array_equal(await joblib_cache.aload("s1", "shap"), np.ones((4, 2)))
+    await joblib_cache.adelete("s1", "shap")
+    assert not await joblib_cache.aexists("s1", "shap")
+
+
+@pytest.mark.asyncio
+async def test_memoized_async_loads_reach_the_backend_once(monkeypatch, joblib_cache):
+    joblib_cache.save_many("s1", {"shap": np.zeros(3), "features": ["a"]})
+    calls = []
+    aload_many = joblib_cache.aload_many
+
+    async def counting_aload_many(id, datatypes):
+        calls.append(list(datatypes))
+        return await aload_many(id, datatypes)
+
+    monkeypatch.setattr(joblib_cache, "aload_many", counting_aload_many)
+    cache = MemoizedSessionCache(joblib_cache)
+
+    first = await cache.aload_many("s1", ["shap", "features"])
+    second = await cache.aload_many("s1", ["shap"])
+
+    assert second["shap"] is first["shap"]
+    assert calls == [["shap", "features"]]
+
+
+@pytest.mark.asyncio
+async def test_artifact_store_async_put_and_get(joblib_cache):
+    store = ArtifactStore(joblib_cache)
+    png = b"\x89PNG\r\n\x1a\n" + b"plot" * 16
+
+    ref = await store.aput("s1", png)
+
+    assert await store.aput("s1", png) == ref
+    artifact = await store.aget("s1", ref)
+    assert artifact.data == png and artifact.media_type == "image/png"
+    assert await store.aget("other-session", ref) is None
+
+
+@pytest.mark.asyncio
+async def test_async_defaults_offload_the_blocking_methods():
+    class ThreadRecordingCache(SessionCacheManager):
+        def __init__(self):
+            self.threads = []
+
+        def save(self, id, datatype, data, ttl=None):
+            pass
+
+        def load(self, id, datatype):
+            self.threads.append(threading.current_thread().name)
+            return datatype
+
+        def exists(self, id, datatype):
+            return True
+
+        def delete(self, id, datatype):
+            pass
+
+    cache = ThreadRecordingCache()
+
+    assert await cache.aload_many("s1", ["model", "shap"]) == {"model": "model", "shap": "shap"}
+    assert all(name.startswith("io-worker") for name in cache.threads)
@@ -3,7 +3,9 @@
 
 from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
 from app.cache.joblib_session_cache import JoblibSessionCache
+from app.cache.memoized_session_cache import MemoizedSessionCache
 from app.storage.file_object_reader import FileObjectReader
+from app.storage.s3_object_reader import S3ObjectReader
 
 
 def test_model_analyzer_session():
@@ -14,3 +16,38 @@ def test_model_analyzer_session():
     model = session.get_model(session_id)
 
     assert model is not None
+
+
+def test_session_id_is_content_addressed():
+    memory = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(memory)
+    session_id = session.create_session(FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl"))
+    same_model_id = ModelAnalyzerSession.session_id_for(FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl"))
+    other_model_id = ModelAnalyzerSession.session_id_for(FileObjectReader("data/customer_churn_model.pkl"))
+
+    assert session_id == same_model_id
+    assert session_id != other_model_id
+    assert session.has_session(session_id)
+
+
+class _FakeS3Client:
+    def head_object(self, Bucket, Key):
+        return {"ETag": '"abc123"'}
+
+
+def test_s3_reader_identity_uses_etag():
+    reader = S3ObjectReader(bucket="models", key="churn.pkl", s3_client=_FakeS3Client())
+
+    assert reader.identity() == "s3://models/churn.pkl@abc123"
+
+
+def test_scoped_session_loads_each_artifact_once():
+    memory = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(memory)
+    session_id = session.create_session(FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl"))
+    scoped = session.scoped()
+
+    assert isinstance(scoped.session_cache, MemoizedSessionCache)
+    assert ModelAnalyzerSession.get_instance() is session
+    assert scoped.get_shap_values(session_id) is scoped.get_shap_values(session_id)
+    assert session.get_shap_values(session_id) is not session.get_shap_values(session_id)
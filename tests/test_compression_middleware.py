@@ -0,0 +1,77 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middlewares import compression_middleware
+from app.middlewares.compression_middleware import CompressionMiddleware
+
+LARGE_BODY = "model analysis " * 500
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE_BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["event: delta\ndata: {}\n\n"] * 200), media_type="text/event-stream")
+
+    @app.get("/chunks")
+    def chunks():
+        return StreamingResponse(iter([LARGE_BODY[:3000], LARGE_BODY[3000:]]), media_type="text/plain")
+
+    return TestClient(app)
+
+
+def test_negotiates_gzip_above_threshold():
+    client = _client()
+
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in large.headers["vary"].lower()
+    assert int(large.headers["content-length"]) < len(LARGE_BODY) / 10
+    assert large.text == LARGE_BODY
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "gzip;q=0"}).headers
+    assert "content-encoding" not in client.get("/events", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_streamed_bodies_are_compressed_chunk_by_chunk():
+    response = _client().get("/chunks", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == LARGE_BODY
+
+
+def test_prefers_brotli_when_available():
+    brotli = pytest.importorskip("brotli")
+    client = _client()
+
+    with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip, br"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(raw).decode() == LARGE_BODY
+
+
+def test_falls_back_to_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression_middleware, "brotli", None)
+
+    with _client().stream("GET", "/large", headers={"Accept-Encoding": "br, gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw).decode() == LARGE_BODY
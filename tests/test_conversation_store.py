@@ -0,0 +1,65 @@
+import fakeredis
+import pytest
+from llama_index.core.llms import ChatMessage
+
+from app.cache.joblib_session_cache import JoblibSessionCache
+from app.cache.redis_session_cache import RedisSessionCache
+from app.storage.conversation_store import ConversationStore
+
+
+def _messages(*contents):
+    return [ChatMessage(role="user", content=content) for content in contents]
+
+
+def test_conversation_is_an_append_only_log():
+    cache = JoblibSessionCache.get_instance()
+    store = ConversationStore(cache)
+    try:
+        assert store.load("conversation-test") == []
+        assert store.append("conversation-test", _messages("a", "b")) == 2
+        assert store.append("conversation-test", _messages("c")) == 3
+        # sync only appends what is past the stored prefix
+        assert store.sync("conversation-test", _messages("a", "b", "c", "d", "e")) == 5
+        assert store.sync("conversation-test", _messages("a", "b", "c", "d", "e")) == 5
+
+        assert store.exists("conversation-test")
+        assert [m.content for m in store.load("conversation-test")] == ["a", "b", "c", "d", "e"]
+        assert [m.content for m in store.load("conversation-test", start=1)] == ["b", "c", "d", "e"]
+        assert [m.content for m in store.load("conversation-test", start=3)] == ["d", "e"]
+        assert store.load("conversation-test", start=5) == []
+        assert cache.load("conversation-test", "conversation_meta") == {"segments": [2, 1, 2]}
+    finally:
+        store.delete("conversation-test")
+
+    assert not store.exists("conversation-test")
+    assert not cache.exists("conversation-test", "conversation_0")
+
+
+def test_segments_expire_with_the_conversation(monkeypatch):
+    monkeypatch.setenv("CONVERSATION_TTL_SECONDS", "600")
+    cache = RedisSessionCache.__new__(RedisSessionCache)
+    cache._initialize(client=fakeredis.FakeRedis())
+    store = ConversationStore(cache)
+
+    store.append("conversation-test", _messages("a", "b"))
+    cache.redis.expire(cache._get_key("conversation-test", "conversation_0"), 5)
+    store.append("conversation-test", _messages("c"))
+    # Every write keeps the earlier segments as long as the meta record
+    assert cache.redis.ttl(cache._get_key("conversation-test", "conversation_0")) > 5
+    assert cache.redis.ttl(cache._get_key("conversation-test", "conversation_meta")) > 5
+
+    # A conversation that lost a segment loads as expired and starts over on the next write
+    cache.redis.delete(cache._get_key("conversation-test", "conversation_0"))
+    assert store.load("conversation-test") == []
+    assert store.sync("conversation-test", _messages("a", "b", "c", "d")) == 4
+    assert [m.content for m in store.load("conversation-test", start=1)] == ["b", "c", "d"]
+    assert cache.load("conversation-test", "conversation_meta") == {"segments": [4]}
+
+
+def test_rejects_unsafe_conversation_ids():
+    store = ConversationStore(JoblibSessionCache.get_instance())
+
+    assert store.load("../conversation-test") == []
+    assert not store.exists("../conversation-test")
+    with pytest.raises(ValueError):
+        store.append("../conversation-test", _messages("a"))
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+import pytest
+
+from agent_apps.model_analyzer.session import model_analyzer_session
+from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
+from app.cache.distributed_lock import FileLock
+from app.cache.joblib_session_cache import JoblibSessionCache
+from app.core.worker_pool import WorkerPool
+from app.storage.file_object_reader import FileObjectReader
+
+SESSION_DATATYPES = ["model", "features", "X_test", "y_test", "X_test_transformed", "shap"]
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    worker_a, worker_b = FileLock(str(tmp_path)), FileLock(str(tmp_path))
+
+    token = worker_a.acquire("session_build_x", ttl=60)
+    assert token is not None
+    assert worker_b.acquire("session_build_x", ttl=60) is None
+    assert worker_b.acquire("session_build_y", ttl=60) is not None
+    assert worker_b.is_held("session_build_x") and worker_a.is_held("session_build_x")
+
+    worker_a.release("session_build_x", token)
+    assert not worker_b.is_held("session_build_x")
+    assert worker_b.acquire("session_build_x", ttl=60) is not None
+
+
+@pytest.mark.asyncio
+async def test_acreate_session_waits_for_build_holding_the_lock(monkeypatch):
+    monkeypatch.setenv("WORKER_POOL_CPU_MODE", "thread")
+    monkeypatch.setattr(model_analyzer_session, "SESSION_BUILD_POLL_SECONDS", 0.05)
+    pool = WorkerPool.__new__(WorkerPool)
+    pool._initialize()
+    monkeypatch.setattr(WorkerPool, "_instance", pool)
+
+    cache = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(cache)
+    reader = FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl")
+    other_worker = FileLock(cache.get_lock().directory)
+    token = other_worker.acquire("session_build_lock-test", ttl=60)
+    try:
+        waiting = asyncio.create_task(session.acreate_session(reader, "lock-test"))
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+
+        session.create_session(reader, "lock-test")  # the other worker's build lands
+        other_worker.release("session_build_lock-test", token)
+
+        assert await waiting == "lock-test"
+        assert pool.stats()["cpu"]["completed"] == 0
+    finally:
+        pool.shutdown()
+        for datatype in SESSION_DATATYPES:
+            cache.delete("lock-test", datatype)
+
+
+@pytest.mark.asyncio
+async def test_await_shared_build_follows_the_build_lock_of_other_workers(monkeypatch):
+    monkeypatch.setenv("WORKER_POOL_CPU_MODE", "thread")
+    monkeypatch.setattr(model_analyzer_session, "SESSION_BUILD_POLL_SECONDS", 0.05)
+    pool = WorkerPool.__new__(WorkerPool)
+    pool._initialize()
+    monkeypatch.setattr(WorkerPool, "_instance", pool)
+
+    cache = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(cache)
+    other_worker = FileLock(cache.get_lock().directory)
+    try:
+        assert not await session.await_shared_build("shared-build-test", timeout=1)
+
+        token = other_worker.acquire("session_build_shared-build-test", ttl=60)
+        with pytest.raises(TimeoutError):
+            await session.await_shared_build("shared-build-test", timeout=0.1)
+        other_worker.release("session_build_shared-build-test", token)
+
+        assert not await session.await_shared_build("shared-build-test", timeout=1)
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_build_releases_its_lock_off_the_event_loop(monkeypatch):
+    monkeypatch.setenv("WORKER_POOL_CPU_MODE", "thread")
+    pool = WorkerPool.__new__(WorkerPool)
+    pool._initialize()
+    monkeypatch.setattr(WorkerPool, "_instance", pool)
+
+    cache = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(cache)
+    lock = cache.get_lock()
+    release_threads = []
+    release = lock.release
+    monkeypatch.setattr(lock, "release", lambda *args: (release_threads.append(threading.current_thread()), release(*args)))
+
+    async def build_forever(*args):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(session, "_abuild", build_forever)
+    try:
+        building = asyncio.create_task(session.acreate_session(FileObjectReader("unused.pkl"), "cancel-test"))
+        await asyncio.sleep(0.2)
+        assert lock.is_held("session_build_cancel-test")
+
+        building.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await building
+        assert not lock.is_held("session_build_cancel-test")
+        assert release_threads and release_threads[0] is not threading.main_thread()
+    finally:
+        pool.shutdown()
@@ -0,0 +1,40 @@
+import dataclasses
+import json
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from app.models.agent_models import SavantAgentOutput, SavantChatMessage, ToolResult, ToolResultOutput
+from app.utils.success_wrapper import SuccessResponse
+
+
+@dataclasses.dataclass
+class _Output:
+    content_type: str
+    content: object
+
+
+def test_success_response_serializes_like_jsonable_encoder():
+    output = SavantAgentOutput(
+        response=SavantChatMessage(role="assistant", content="done"),
+        tools_results=[ToolResult(tool_name="SHAP_SUMMARY_PLOT", tool_input={"feature_num": 5}, content="ok",
+                                  tool_output=ToolResultOutput(tool_name="SHAP_SUMMARY_PLOT", content_type="STORAGEARTIFACT",
+                                                               content=None, output_ref="ab" * 16))],
+        session_id="s1",
+    )
+    data = {"agent": output, "table": _Output(content_type="JSON", content={"f1": 0.9})}
+
+    response = SuccessResponse.ok(request_id="r1", data=data)
+
+    assert response.status_code == 200
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == jsonable_encoder(SuccessResponse.envelope(request_id="r1", data=data))
+
+
+def test_success_response_serializes_numpy_and_status():
+    response = SuccessResponse.ok(request_id="r1", status_code=202, data={"shap": np.array([[0.5, -0.25]])},
+                                  headers={"Location": "/jobs/1"})
+
+    assert response.status_code == 202
+    assert response.headers["location"] == "/jobs/1"
+    assert json.loads(response.body)["data"] == {"shap": [[0.5, -0.25]]}
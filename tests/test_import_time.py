@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+import pytest
+
+# Only needed once a tool runs or a session is built, never to serve the first request
+DEFERRED_MODULES = ["shap", "matplotlib.pyplot", "seaborn", "sklearn", "watchtower", "openai"]
+
+
+@pytest.mark.parametrize("module", ["app.main", "app.api.api_router", "app.logger.log_config"])
+def test_import_does_not_load_heavy_modules(module):
+    code = f"import sys, {module}; print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_openai_llm_is_created_on_first_use(monkeypatch):
+    from app.llms import open_ai
+
+    created = []
+    monkeypatch.setattr(open_ai, "_llm_openAI", None)
+    monkeypatch.setattr("llama_index.llms.openai.OpenAI", lambda: created.append(1) or object())
+
+    llm = open_ai.get_openai_llm()
+
+    assert open_ai.llm_openAI is llm
+    assert open_ai.get_openai_llm() is llm
+    assert created == [1]
+
+
+def test_cloud_handler_disables_itself_when_creation_fails(monkeypatch, capsys):
+    import logging
+    from app.logger import cw_handler
+
+    def fail():
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setattr(cw_handler, "create_cloud_handler", fail)
+    handler = cw_handler.LazyCloudWatchHandler()
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello", None, None)
+
+    handler.handle(record)
+    handler._setup_thread.join(5)
+    handler.handle(record)
+    handler.flush()
+
+    assert capsys.readouterr().err.count("CloudWatch logging disabled") == 1
@@ -0,0 +1,93 @@
+import os
+import time
+
+import numpy as np
+
+from app.cache.joblib_session_cache import JoblibSessionCache
+from app.cache.session_index import SessionIndex
+
+
+def _set_last_access(cache: JoblibSessionCache, id: str, seconds_ago: float) -> None:
+    cache.index._connection().execute("UPDATE files SET last_access = ? WHERE id = ?", (time.time() - seconds_ago, id))
+
+
+def test_index_tracks_sessions_and_answers_exists(tmp_path, joblib_cache):
+    joblib_cache.save_many("s1", {"model": {"w": 1}, "shap": np.zeros(100)})
+    joblib_cache.save("s1", "artifact_" + "a" * 32, {"data": b"png"})
+    joblib_cache.save("conv_1", "conversation_meta", {"segments": []})
+
+    sessions = {session["id"]: session for session in joblib_cache.sessions()}
+
+    assert set(sessions) == {"s1", "conv_1"}
+    assert sessions["s1"]["bytes"] == sum(
+        os.path.getsize(tmp_path / file) for file in os.listdir(tmp_path) if file.startswith("s1_")) + sum(
+        os.path.getsize(tmp_path / "blobs" / file) for file in os.listdir(tmp_path / "blobs"))
+    assert joblib_cache.exists("s1", "shap") and joblib_cache.exists("s1", "artifact_" + "a" * 32)
+    joblib_cache.delete("s1", "shap")
+    assert not joblib_cache.exists("s1", "shap") and joblib_cache.exists("s1", "model")
+
+
+def test_sweep_evicts_expired_then_least_recently_used(tmp_path, make_joblib_cache):
+    cache = make_joblib_cache(JOBLIB_CACHE_TTL_SECONDS="3600")
+    for id in ("old", "lru", "recent"):
+        cache.save_many(id, {"shap": np.random.rand(1000)})
+    _set_last_access(cache, "old", 7200)
+    _set_last_access(cache, "lru", 600)
+    _set_last_access(cache, "recent", 60)
+    cache.max_bytes = cache.index.total_bytes() // 2
+
+    evicted = cache.sweep()
+
+    assert evicted == ["old", "lru"]
+    assert [session["id"] for session in cache.sessions()] == ["recent"]
+    assert not os.path.exists(cache._get_manifest_path("lru"))
+    assert len(os.listdir(tmp_path / "blobs")) == 1
+    assert cache.load("recent", "shap").shape == (1000,)
+
+
+def test_sessions_share_blobs_until_the_last_reference_goes(tmp_path, joblib_cache):
+    model, X_test = {"w": np.arange(1000)}, np.random.rand(500, 4)
+    joblib_cache.save_many("s1", {"model": model, "X_test": X_test, "shap": np.zeros(10)})
+    joblib_cache.save_many("s2", {"model": model, "X_test": X_test.copy(), "shap": np.ones(10)})
+
+    assert len(os.listdir(tmp_path / "blobs")) == 4
+    assert {session["id"] for session in joblib_cache.sessions()} == {"s1", "s2"}
+    # Each session counts what it references, the disk only holds it once
+    assert joblib_cache.index.total_bytes() < sum(session["bytes"] for session in joblib_cache.sessions())
+
+    joblib_cache.evict("s1")
+    assert len(os.listdir(tmp_path / "blobs")) == 3
+    np.testing.assert_array_equal(joblib_cache.load("s2", "X_test"), X_test)
+    joblib_cache.delete("s2", "model")
+    joblib_cache.save_many("s2", {"X_test": X_test})
+    assert len(os.listdir(tmp_path / "blobs")) == 1
+    joblib_cache.evict("s2")
+    assert os.listdir(tmp_path / "blobs") == [] and joblib_cache.index.total_bytes() == 0
+
+
+def test_index_is_rebuilt_from_existing_files(tmp_path, make_joblib_cache):
+    cache = make_joblib_cache()
+    cache.save_many("s1", {"model": {"w": 1}, "X_test": [1, 2]})
+    cache.save("my_conversation", "conversation_0", ["hello"])
+    cache.index.close()
+    for file in os.listdir(tmp_path):
+        if file.startswith(".index.sqlite"):
+            os.remove(tmp_path / file)
+
+    rebuilt = make_joblib_cache()
+
+    assert {session["id"] for session in rebuilt.sessions()} == {"s1", "my_conversation"}
+    assert rebuilt.exists("s1", "X_test")
+    assert rebuilt.exists("my_conversation", "conversation_0")
+    assert len(rebuilt.index.blobs_of("s1")) == 2 and rebuilt.index.total_bytes() > 0
+
+
+def test_touch_throttle_forgets_removed_and_least_recent_ids(tmp_path):
+    index = SessionIndex(str(tmp_path / "index.sqlite"), max_touched=2)
+    for id in ("a", "b", "c"):
+        index.add(id, f"{id}_model.pkl", ["model"], 10)
+        index.touch(id)
+
+    assert list(index._touched) == ["b", "c"]
+    index.remove_file("c", "c_model.pkl")
+    assert list(index._touched) == ["b"]
@@ -0,0 +1,103 @@
+import logging
+
+import structlog
+
+from app.logger.log_config import merge_record_context
+from app.logger.log_queue import DROP_OLDEST, BatchingQueueListener, BoundedQueueHandler
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.flushes = 0
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        self.flushes += 1
+
+
+def _record(msg, level=logging.INFO, args=None):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+def test_full_queue_drops_newest_records():
+    handler = BoundedQueueHandler(maxsize=2, sample_above=1.0)
+
+    for i in range(4):
+        handler.handle(_record(f"m{i}"))
+
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == ["m0", "m1"]
+    assert handler.take_counts() == (2, 0)
+    assert handler.take_counts() == (0, 0)
+
+
+def test_drop_oldest_keeps_latest_records():
+    handler = BoundedQueueHandler(maxsize=2, policy=DROP_OLDEST, sample_above=1.0)
+
+    for i in range(4):
+        handler.handle(_record(f"m{i}"))
+
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == ["m2", "m3"]
+    assert handler.take_counts() == (2, 0)
+
+
+def test_info_records_are_sampled_under_load_but_warnings_are_kept():
+    handler = BoundedQueueHandler(maxsize=100, sample_above=0.0, sample_rate=5)
+
+    for i in range(10):
+        handler.handle(_record(f"info{i}"))
+    handler.handle(_record("warn", level=logging.WARNING))
+
+    assert handler.queue.qsize() == 3
+    assert handler.take_counts() == (0, 8)
+
+
+def test_prepare_resolves_message_and_captures_context():
+    handler = BoundedQueueHandler()
+    structlog.contextvars.bind_contextvars(request_id="rid-1")
+    try:
+        handler.handle(_record("hello %s", args=("world",)))
+    finally:
+        structlog.contextvars.clear_contextvars()
+
+    record = handler.queue.get_nowait()
+    assert record.msg == "hello world" and record.args is None
+    event_dict = merge_record_context(None, "info", {"_record": record})
+    assert event_dict["request_id"] == "rid-1"
+    assert event_dict["timestamp"].endswith("Z")
+
+
+def test_listener_writes_batches_and_reports_drops():
+    queue_handler = BoundedQueueHandler(maxsize=3, sample_above=1.0)
+    sink = ListHandler()
+    listener = BatchingQueueListener(queue_handler, [sink], report_interval=0)
+
+    for i in range(5):
+        queue_handler.handle(_record(f"m{i}"))
+    listener.start()
+    listener.stop()
+
+    messages = [r.getMessage() for r in sink.records]
+    assert messages[:3] == ["m0", "m1", "m2"]
+    assert messages[3] == "Log records dropped under load: 2 dropped, 0 sampled out"
+    assert sink.flushes >= 1
+
+
+def test_listener_keeps_running_when_a_handler_fails():
+    class FailingHandler(logging.Handler):
+        def handle(self, record):
+            raise RuntimeError("sink down")
+
+    queue_handler = BoundedQueueHandler()
+    sink = ListHandler()
+    listener = BatchingQueueListener(queue_handler, [FailingHandler(), sink])
+
+    listener.start()
+    queue_handler.handle(_record("m0"))
+    queue_handler.handle(_record("m1"))
+    listener.stop()
+
+    assert [r.msg for r in sink.records] == ["m0", "m1"]
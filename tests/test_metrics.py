@@ -0,0 +1,109 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from llama_index.core.llms import ChatMessage, ChatResponse, MockLLM
+from llama_index.core.workflow import StartEvent, StopEvent, Workflow, step
+from prometheus_client import REGISTRY
+
+from app.core.metrics import datatype_label, install_llama_index_metrics, render_metrics, token_usage
+from app.middlewares.metrics_middleware import MetricsMiddleware
+from app.storage.s3_object_reader import S3ObjectReader
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_latency_is_labelled_with_the_full_route_template():
+    jobs = APIRouter()
+
+    @jobs.get("/jobs/{job_id}")
+    async def get_job(job_id: str):
+        return {"job_id": job_id}
+
+    api = APIRouter()
+    api.include_router(jobs, prefix="/session")
+    app = FastAPI()
+    app.include_router(api, prefix="/api/v1")
+    app.add_middleware(MetricsMiddleware)
+    labels = dict(method="GET", route="/api/v1/session/jobs/{job_id}", status="200")
+    before = _sample("http_request_duration_seconds_count", **labels)
+    unmatched = _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404")
+
+    client = TestClient(app)
+    client.get("/api/v1/session/jobs/1")
+    client.get("/api/v1/session/jobs/2")
+    client.get("/nowhere")
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404") == unmatched + 1
+
+
+class _OneStepWorkflow(Workflow):
+    @step
+    async def first(self, ev: StartEvent) -> StopEvent:
+        return StopEvent(result="done")
+
+
+def test_workflow_steps_and_llm_calls_are_timed():
+    install_llama_index_metrics()
+    step_labels = dict(workflow="_OneStepWorkflow", step="first", outcome="ok")
+    llm_labels = dict(model="MockLLM", outcome="ok")
+    steps_before = _sample("workflow_step_duration_seconds_count", **step_labels)
+    llm_before = _sample("llm_request_duration_seconds_count", **llm_labels)
+
+    async def run():
+        await _OneStepWorkflow().run()
+        # MockLLM implements chat on top of complete: one call, not two
+        await MockLLM(max_tokens=3).achat([ChatMessage(role="user", content="hi")])
+
+    asyncio.run(run())
+
+    assert _sample("workflow_step_duration_seconds_count", **step_labels) == steps_before + 1
+    assert _sample("llm_request_duration_seconds_count", **llm_labels) == llm_before + 1
+
+
+def test_token_usage_reads_openai_counts():
+    response = ChatResponse(message=ChatMessage(content="hi"), additional_kwargs={"prompt_tokens": 12, "completion_tokens": 3})
+    streamed = ChatResponse(message=ChatMessage(content="hi"), raw={"usage": SimpleNamespace(prompt_tokens=7, completion_tokens=1)})
+
+    assert token_usage(response) == {"prompt": 12, "completion": 3}
+    assert token_usage(streamed) == {"prompt": 7, "completion": 1}
+    assert token_usage(ChatResponse(message=ChatMessage(content="hi"))) == {}
+
+
+def test_datatype_label_drops_per_object_suffixes():
+    assert datatype_label("shap") == "shap"
+    assert datatype_label("artifact_" + "ab" * 16) == "artifact"
+    assert datatype_label("conversation_3") == "conversation"
+    assert datatype_label("conversation_meta") == "conversation_meta"
+
+
+def test_session_cache_hits_misses_and_bytes(joblib_cache):
+    hits = _sample("session_cache_lookups_total", backend="joblib", datatype="features", result="hit")
+    misses = _sample("session_cache_lookups_total", backend="joblib", datatype="features", result="miss")
+    read = _sample("session_cache_bytes_total", backend="joblib", datatype="features", direction="read")
+
+    joblib_cache.exists("s1", "features")
+    joblib_cache.save("s1", "features", ["a", "b"])
+    joblib_cache.load("s1", "features")
+
+    assert _sample("session_cache_lookups_total", backend="joblib", datatype="features", result="miss") == misses + 1
+    assert _sample("session_cache_lookups_total", backend="joblib", datatype="features", result="hit") == hits + 1
+    assert _sample("session_cache_bytes_total", backend="joblib", datatype="features", direction="read") > read
+
+
+def test_s3_download_bytes_are_counted():
+    class FakeS3Client:
+        def get_object(self, Bucket, Key):
+            return {"Body": io.BytesIO(b"x" * 100)}
+
+    before = _sample("s3_download_bytes_total")
+
+    S3ObjectReader(bucket="models", key="churn.pkl", s3_client=FakeS3Client()).read()
+
+    assert _sample("s3_download_bytes_total") == before + 100
+    assert b"s3_download_duration_seconds_count" in render_metrics()[0]
@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+import pytest
+import structlog
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middlewares.exception_logging_middleware import ExceptionLoggingMiddleware
+from app.middlewares.request_id_middleware import RequestIDMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ExceptionLoggingMiddleware)
+    app.add_middleware(RequestIDMiddleware)
+
+    @app.get("/context")
+    async def context():
+        # Yield to the other requests before reading the context back
+        await asyncio.sleep(0.01)
+        return PlainTextResponse(structlog.contextvars.get_contextvars().get("request_id", ""))
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+def test_request_id_is_echoed_or_generated():
+    client = TestClient(_app())
+
+    assert client.get("/context", headers={"x-request-id": "abc"}).headers["request_id"] == "abc"
+    assert client.get("/context", headers={"request_id": "def"}).text == "def"
+    assert client.get("/context").headers["request_id"].startswith("app.middlewares.request_id_middleware+")
+    assert structlog.contextvars.get_contextvars().get("request_id") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_keep_their_own_context():
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*[client.get("/context", headers={"x-request-id": f"req-{i}"}) for i in range(20)])
+
+    assert [r.text for r in responses] == [f"req-{i}" for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_pass_through_unbuffered():
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": "/stream", "raw_path": b"/stream", "root_path": "", "query_string": b"", "headers": [],
+             "client": ("127.0.0.1", 1), "server": ("test", 80)}
+    await _app()(scope, receive, send)
+
+    assert sent[0]["type"] == "http.response.start"
+    assert b"request_id" in dict(sent[0]["headers"])
+    bodies = [m["body"] for m in sent[1:] if m["body"]]
+    assert bodies == [f"data: {i}\n\n".encode() for i in range(5)]
+
+
+def test_unhandled_exception_is_logged_and_reraised():
+    client = TestClient(_app(), raise_server_exceptions=False)
+
+    with structlog.testing.capture_logs(processors=[structlog.contextvars.merge_contextvars]) as logs:
+        response = client.get("/boom", headers={"x-request-id": "boom-1"})
+
+    assert response.status_code == 500
+    errors = [log for log in logs if log["event"] == "Unhandled exception occurred"]
+    assert len(errors) == 1 and errors[0]["error"] == "boom"
+    assert errors[0]["request_id"] == "boom-1"
@@ -0,0 +1,155 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.cache.near_session_cache import INVALIDATION_CHANNEL, NearSessionCache, estimate_size
+from app.cache.session_cache_manager import SessionCacheManager
+
+
+class CountingCache(SessionCacheManager):
+    def __init__(self):
+        self.data = {}
+        self.loads = 0
+
+    def save(self, id, datatype, data, ttl=None):
+        self.data[(id, datatype)] = data
+
+    def load(self, id, datatype):
+        self.loads += 1
+        return self.data[(id, datatype)]
+
+    def exists(self, id, datatype):
+        return (id, datatype) in self.data
+
+    def delete(self, id, datatype):
+        self.data.pop((id, datatype), None)
+
+
+class FakePublisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, channel, message):
+        self.messages.append((channel, json.loads(message)))
+
+
+def _near(monkeypatch, backend, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    cache = NearSessionCache.__new__(NearSessionCache)
+    cache._initialize(backend)
+    return cache
+
+
+def test_loads_are_served_from_memory_after_the_first(monkeypatch):
+    backend = CountingCache()
+    backend.save("s1", "model", {"weights": [1, 2, 3]})
+    cache = _near(monkeypatch, backend)
+
+    first = cache.load("s1", "model")
+    second = cache.load("s1", "model")
+
+    assert first is second
+    assert backend.loads == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_saved_objects_are_cached_without_a_backend_load(monkeypatch):
+    backend = CountingCache()
+    cache = _near(monkeypatch, backend)
+
+    cache.save("s1", "shap", np.zeros(10))
+
+    assert cache.load("s1", "shap") is not None
+    assert backend.loads == 0
+
+
+def test_least_recently_used_entries_are_evicted_past_the_byte_budget(monkeypatch):
+    cache = _near(monkeypatch, CountingCache(), NEAR_CACHE_MAX_BYTES="2000")
+
+    cache.save("a", "shap", np.zeros(100))  # 800 bytes each
+    cache.save("b", "shap", np.zeros(100))
+    cache.load("a", "shap")
+    cache.save("c", "shap", np.zeros(100))
+
+    cached = {key[0] for key in cache._entries}
+    assert cached == {"a", "c"}
+    assert cache.current_bytes == 1600
+
+
+def test_per_datatype_policies(monkeypatch):
+    backend = CountingCache()
+    cache = _near(monkeypatch, backend, NEAR_CACHE_POLICIES='{"model": {"cache": false}, "shap": {"ttl_seconds": 60}}')
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.near_session_cache.time.monotonic", lambda: now[0])
+    backend.save("s1", "conversation_meta", {"segments": [2]})
+    backend.save("s1", "model", "m")
+
+    cache.load("s1", "conversation_meta")
+    cache.load("s1", "conversation_meta")
+    cache.load("s1", "model")
+    cache.save("s1", "shap", np.zeros(3))
+    now[0] += 61
+
+    assert backend.loads == 3
+    assert cache._get("s1", "shap") == (False, None)
+
+
+def test_saves_and_deletes_are_published_and_other_nodes_invalidate(monkeypatch):
+    cache = _near(monkeypatch, CountingCache())
+    cache._publisher = FakePublisher()
+
+    cache.save("s1", "shap", np.zeros(3))
+    cache.delete("s1", "shap")
+    cache.save("s1", "conversation_meta", {"segments": []})
+
+    assert [m["datatype"] for _, m in cache._publisher.messages] == ["shap", "shap"]
+    assert all(channel == INVALIDATION_CHANNEL for channel, _ in cache._publisher.messages)
+
+    cache.save("s2", "shap", np.zeros(3))
+    cache._on_invalidation({"data": json.dumps({"node": cache.node_id, "id": "s2", "datatype": "shap"})})
+    assert ("s2", "shap") in cache._entries
+    cache._on_invalidation({"data": json.dumps({"node": "other-pod", "id": "s2", "datatype": "shap"})})
+    assert ("s2", "shap") not in cache._entries
+
+
+def test_sessions_evicted_from_the_backend_are_not_served_partially(monkeypatch, make_joblib_cache):
+    backend = make_joblib_cache()
+    cache = _near(monkeypatch, backend)
+
+    cache.save_many("s1", {"model": {"w": 1}, "shap": np.ones(4)})
+    cache.invalidate("s1", "model")
+    # Evicted by another worker sharing the directory, so this process is not told
+    make_joblib_cache().evict("s1")
+
+    assert not cache.exists("s1", "shap")
+    with pytest.raises(FileNotFoundError):
+        cache.load_many("s1", ["model", "shap"])
+    assert not any(key[0] == "s1" for key in cache._entries)
+
+
+def test_hits_touch_the_backend_and_its_evictions_are_dropped(monkeypatch, joblib_cache):
+    touched = []
+    monkeypatch.setattr(joblib_cache.index, "touch", touched.append)
+    cache = _near(monkeypatch, joblib_cache, NEAR_CACHE_TOUCH_INTERVAL_SECONDS="60")
+    cache._publisher = FakePublisher()
+
+    cache.save_many("s1", {"model": {"w": 1}, "shap": np.ones(4)})
+    cache.load("s1", "model")
+    cache.load_many("s1", ["model", "shap"])
+    assert touched == ["s1"]  # throttled per id
+
+    cache._publisher.messages.clear()
+    joblib_cache.evict("s1")
+    assert not any(key[0] == "s1" for key in cache._entries)
+    assert cache._publisher.messages == [(INVALIDATION_CHANNEL, {"node": cache.node_id, "id": "s1", "datatype": None})]
+
+    cache.save("s2", "shap", np.zeros(3))
+    cache._on_invalidation({"data": json.dumps({"node": "other-pod", "id": "s2", "datatype": None})})
+    assert ("s2", "shap") not in cache._entries
+
+
+def test_estimate_size_counts_array_buffers():
+    assert estimate_size(np.zeros(1000)) == 8000
+    assert 8000 <= estimate_size({"values": np.zeros(1000), "name": "x"}) < 9000
@@ -0,0 +1,122 @@
+import pickle
+
+import fakeredis
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.cache import codecs
+from app.cache.redis_session_cache import RedisSessionCache
+
+
+def make_cache(monkeypatch, **env) -> RedisSessionCache:
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    server = fakeredis.FakeServer()
+    cache = RedisSessionCache.__new__(RedisSessionCache)
+    cache._initialize(
+        client=fakeredis.FakeRedis(server=server),
+        async_client_factory=lambda: fakeredis.FakeAsyncRedis(server=server),
+    )
+    return cache
+
+
+def test_bundle_round_trip_stores_shared_artifacts_once(monkeypatch):
+    cache = make_cache(monkeypatch)
+    X_test = pd.DataFrame({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    cache.save_many("s1", {"X_test": X_test, "X_test_transformed": X_test, "features": ["a", "b"]})
+
+    manifest = cache.redis.hgetall(cache._get_manifest_key("s1"))
+    assert manifest[b"entry:X_test"] == manifest[b"entry:X_test_transformed"]
+    assert len(cache.redis.keys("blob:*")) == 2
+    assert cache.redis.hget(cache._get_blob_key(manifest[b"entry:X_test"].decode()), "codec") == b"zlib"
+
+    loaded = cache.load_many("s1", ["X_test", "X_test_transformed", "features", "model"])
+    pd.testing.assert_frame_equal(loaded["X_test"], X_test)
+    assert loaded["X_test_transformed"] is loaded["X_test"]
+    assert loaded["features"] == ["a", "b"] and loaded["model"] is None
+    assert cache.load("s1", "features") == ["a", "b"]
+    assert cache.exists("s1", "X_test") and not cache.exists("s1", "model")
+
+
+def test_large_arrays_are_chunked_and_fetched_in_parallel(monkeypatch):
+    cache = make_cache(monkeypatch, REDIS_CHUNK_MIN_BYTES=1024, REDIS_CHUNK_BYTES=4096, REDIS_FETCH_CONCURRENCY=3)
+    shap = np.random.default_rng(0).random((100, 20))
+    cache.save_many("s1", {"shap": shap, "features": ["x"]})
+
+    blob_key = cache._get_blob_key(cache.redis.hget(cache._get_manifest_key("s1"), "entry:shap").decode())
+    chunks = [field for field in cache.redis.hkeys(blob_key) if field.startswith(b"chunk:")]
+    assert len(chunks) == 4  # 16000 bytes in 4096-byte chunks
+    assert all(len(cache.redis.hget(blob_key, field)) < 4096 + 16 for field in chunks)
+    loaded = cache.load_many("s1", ["shap", "features"])
+    np.testing.assert_array_equal(loaded["shap"], shap)
+    assert loaded["shap"].flags.writeable
+
+    # A missing chunk makes the datatype a miss, not a broken array
+    cache.redis.hdel(blob_key, chunks[0])
+    assert cache.load_many("s1", ["shap", "features"]) == {"shap": None, "features": ["x"]}
+
+
+def test_sessions_share_blobs_until_the_last_reference_goes(monkeypatch):
+    cache = make_cache(monkeypatch, REDIS_CHUNK_MIN_BYTES=1024, REDIS_CHUNK_BYTES=4096)
+    model, X_test = {"w": list(range(100))}, np.random.default_rng(0).random((500, 4))
+    cache.save_many("s1", {"model": model, "X_test": X_test, "shap": np.zeros(10)})
+    uploads = []
+    queue_put_blob = cache._queue_put_blob
+    monkeypatch.setattr(cache, "_queue_put_blob", lambda pipe, digest, *args: uploads.append(digest) or queue_put_blob(pipe, digest, *args))
+    cache.save_many("s2", {"model": model, "X_test": X_test.copy(), "shap": np.ones(10)})
+
+    assert len(uploads) == 1 and len(cache.redis.keys("blob:*")) == 4
+    shared = cache._get_blob_key(cache.redis.hget(cache._get_manifest_key("s1"), "entry:X_test").decode())
+    assert cache.redis.hget(shared, "refs") == b"2"
+
+    cache.delete("s1", "X_test")
+    assert cache.redis.hget(shared, "refs") == b"1"
+    np.testing.assert_array_equal(cache.load("s2", "X_test"), X_test)
+    # Saving a session again keeps one reference per blob and releases those it no longer uses
+    cache.save_many("s2", {"model": model, "X_test": X_test})
+    assert cache.redis.hget(shared, "refs") == b"1"
+    cache.save_many("s2", {"model": model})
+    assert not cache.redis.exists(shared)
+    assert len(cache.redis.keys("blob:*")) == 2  # s1's model and shap
+
+
+def test_hash_tags_keep_a_session_in_one_slot(monkeypatch):
+    cache = make_cache(monkeypatch, REDIS_HASH_TAGS="true", REDIS_CHUNK_MIN_BYTES=1024, REDIS_CHUNK_BYTES=4096)
+    cache.save("s1", "model", {"k": 1})
+    cache.save_many("s1", {"shap": np.zeros(2048)})
+
+    keys = {key.decode() for key in cache.redis.keys("*")}
+    assert {"model:{s1}", "manifest:{s1}"} <= keys
+    blob_keys = keys - {"model:{s1}", "manifest:{s1}"}
+    assert len(blob_keys) == 1 and blob_keys.pop().startswith("blob:{")
+    assert cache.load("s1", "model") == {"k": 1}
+    assert cache.load("s1", "shap").shape == (2048,)
+
+
+def test_values_are_framed_with_their_codec_and_legacy_values_still_load(monkeypatch):
+    cache = make_cache(monkeypatch, REDIS_CODEC="none")
+    cache.save("s1", "features", ["a"])
+    assert codecs.split_frame(cache.redis.get("features:s1"))[0] == "none"
+
+    # Written by the previous version: a raw pickle, readable whatever the codec now is
+    cache.redis.set("model:s1", pickle.dumps({"k": 1}))
+    cache.codec = codecs.get_codec("zlib")
+    assert cache.load_many("s1", ["features", "model"]) == {"features": ["a"], "model": {"k": 1}}
+
+
+@pytest.mark.asyncio
+async def test_async_methods_share_the_sync_layout(monkeypatch):
+    cache = make_cache(monkeypatch, REDIS_CHUNK_MIN_BYTES=1024, REDIS_CHUNK_BYTES=4096)
+    shap = np.arange(4000, dtype=np.float64)
+    await cache.asave_many("s1", {"shap": shap, "features": ["a"]})
+    await cache.asave("s1", "model", {"k": 1})
+
+    np.testing.assert_array_equal(cache.load("s1", "shap"), shap)
+    loaded = await cache.aload_many("s1", ["shap", "model", "missing"])
+    np.testing.assert_array_equal(loaded["shap"], shap)
+    assert loaded["model"] == {"k": 1} and loaded["missing"] is None
+    assert await cache.aexists("s1", "features")
+    await cache.adelete("s1", "features")
+    assert not await cache.aexists("s1", "features")
+    assert await cache.aload("s1", "features") is None
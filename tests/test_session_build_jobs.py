@@ -0,0 +1,73 @@
+import pytest
+
+from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
+from agent_apps.model_analyzer.session.session_build_jobs import SessionBuildJobManager, SessionBuildPendingError
+from app.cache.joblib_session_cache import JoblibSessionCache
+from app.core.worker_pool import WorkerPool
+from app.storage.file_object_reader import FileObjectReader
+
+SESSION_DATATYPES = ["model", "features", "X_test", "y_test", "X_test_transformed", "shap"]
+
+
+def _new_manager(store) -> SessionBuildJobManager:
+    manager = SessionBuildJobManager.__new__(SessionBuildJobManager)
+    manager._initialize(store=store)
+    return manager
+
+
+@pytest.fixture
+def job_manager(monkeypatch, joblib_cache):
+    monkeypatch.setenv("WORKER_POOL_CPU_MODE", "thread")
+    pool = WorkerPool.__new__(WorkerPool)
+    pool._initialize()
+    monkeypatch.setattr(WorkerPool, "_instance", pool)
+    yield _new_manager(joblib_cache)
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_session_build_job_reports_phases_and_dedupes(job_manager):
+    cache = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(cache)
+    reader = FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl")
+    try:
+        job = await job_manager.submit(session, reader, "build-job-test")
+
+        assert await job_manager.submit(session, reader, "build-job-test") is job
+        # submit yields to the event loop while storing the record, so the job may have started
+        assert job.to_dict()["status"] in ("queued", "running")
+        with pytest.raises(SessionBuildPendingError):
+            await job_manager.wait_for_session("build-job-test", timeout=0)
+
+        assert await job_manager.wait(job) == "build-job-test"
+        assert job.status == "done"
+        assert set(job.to_dict()["timings"]) == {"download", "unpickle", "shap", "persist"}
+        assert job_manager.get_job(job.job_id) is job
+        assert job_manager.get_in_flight("build-job-test") is None
+        assert session.has_session("build-job-test")
+    finally:
+        for datatype in SESSION_DATATYPES:
+            cache.delete("build-job-test", datatype)
+
+
+@pytest.mark.asyncio
+async def test_job_records_are_shared_with_other_workers(job_manager, joblib_cache):
+    cache = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(cache)
+    reader = FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl")
+    other_worker = _new_manager(joblib_cache)
+    try:
+        job = await job_manager.submit(session, reader, "build-job-shared")
+        assert (await other_worker.get_job_record(job.job_id))["status"] in ("queued", "running")
+
+        await job_manager.wait(job)
+        record = await other_worker.get_job_record(job.job_id)
+        assert record == job.to_dict() and record["status"] == "done"
+        assert await other_worker.get_job_record("unknown-job") is None
+
+        other_worker.job_ttl = -1
+        await other_worker._save_record(job)
+        assert await other_worker.get_job_record(job.job_id) is None
+    finally:
+        for datatype in SESSION_DATATYPES:
+            cache.delete("build-job-shared", datatype)
@@ -0,0 +1,117 @@
+import mmap
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.cache import session_bundle
+from app.cache.memoized_session_cache import MemoizedSessionCache
+
+
+def _artifacts():
+    X_test = pd.DataFrame({"age": np.arange(200), "dose": np.linspace(0, 1, 200)})
+    return {
+        "model": {"weights": [0.1, 0.2]},
+        "features": X_test.columns.tolist(),
+        "X_test": X_test,
+        "y_test": pd.Series(np.arange(200) % 2),
+        "X_test_transformed": X_test,
+        "shap": np.ones((200, 2)),
+    }
+
+
+def test_pack_stores_identical_content_once():
+    artifacts = _artifacts()
+    artifacts["y_copy"] = artifacts["y_test"].copy()
+
+    manifest, blobs = session_bundle.pack(artifacts)
+    entries = manifest["entries"]
+
+    assert entries["X_test"]["blob"] == entries["X_test_transformed"]["blob"]
+    assert entries["y_test"]["blob"] == entries["y_copy"]["blob"]
+    assert len(blobs) == 5
+    loaded = session_bundle.unpack_many(manifest, blobs, ["X_test", "X_test_transformed"])
+    assert loaded["X_test"] is loaded["X_test_transformed"]
+
+
+def test_joblib_bundle_round_trip(tmp_path, joblib_cache):
+    artifacts = _artifacts()
+
+    joblib_cache.save_many("s1", artifacts)
+
+    assert sorted(file for file in os.listdir(tmp_path) if not file.startswith(".")) == ["blobs", "s1_manifest.json"]
+    assert len(os.listdir(tmp_path / "blobs")) == 5
+    loaded = joblib_cache.load_many("s1", ["shap", "X_test_transformed", "model"])
+    assert list(loaded) == ["shap", "X_test_transformed", "model"]
+    np.testing.assert_array_equal(loaded["shap"], artifacts["shap"])
+    pd.testing.assert_frame_equal(loaded["X_test_transformed"], artifacts["X_test"])
+    assert joblib_cache.load("s1", "features") == ["age", "dose"]
+    assert joblib_cache.exists("s1", "y_test")
+    assert not joblib_cache.exists("s1", "conversation_meta")
+
+
+def _is_mapped(array: np.ndarray) -> bool:
+    base = array
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return isinstance(base, memoryview) and isinstance(base.obj, mmap.mmap)
+
+
+def test_joblib_bundle_maps_large_arrays(make_joblib_cache):
+    cache = make_joblib_cache(JOBLIB_MMAP_MIN_BYTES="1024")
+    artifacts = _artifacts()
+    cache.save_many("s1", artifacts)
+
+    loaded = cache.load_many("s1", ["shap", "X_test_transformed", "features"])
+
+    assert _is_mapped(loaded["shap"]) and not loaded["shap"].flags.writeable
+    assert all(_is_mapped(block.values) for block in loaded["X_test_transformed"]._mgr.blocks)
+    np.testing.assert_array_equal(loaded["shap"], artifacts["shap"])
+    pd.testing.assert_frame_equal(loaded["X_test_transformed"], artifacts["X_test"])
+    # Views stay valid when the blob file is removed
+    cache.delete("s1", "shap")
+    assert loaded["shap"].sum() == artifacts["shap"].sum()
+
+
+def test_joblib_load_many_reads_each_blob_once(monkeypatch, joblib_cache):
+    joblib_cache.save_many("s1", _artifacts())
+    joblib_cache.save("s1", "artifact_extra", {"data": b"png"})
+    reads = []
+    read_blob_file = session_bundle.read_blob_file
+    monkeypatch.setattr(session_bundle, "read_blob_file", lambda *args: reads.append(args) or read_blob_file(*args))
+
+    loaded = joblib_cache.load_many("s1", ["model", "X_test", "X_test_transformed", "artifact_extra"])
+
+    assert len(reads) == 2
+    assert loaded["X_test_transformed"] is loaded["X_test"]
+    assert loaded["artifact_extra"] == {"data": b"png"}
+    with pytest.raises(FileNotFoundError):
+        joblib_cache.load_many("s1", ["missing"])
+
+
+def test_joblib_delete_from_bundle(tmp_path, joblib_cache):
+    joblib_cache.save_many("s1", _artifacts())
+
+    joblib_cache.delete("s1", "shap")
+
+    assert not joblib_cache.exists("s1", "shap")
+    assert joblib_cache.load("s1", "model") == {"weights": [0.1, 0.2]}
+    for datatype in ("model", "features", "X_test", "y_test", "X_test_transformed"):
+        joblib_cache.delete("s1", datatype)
+    assert not os.path.exists(joblib_cache._get_manifest_path("s1"))
+    assert os.listdir(tmp_path / "blobs") == []
+
+
+def test_memoized_load_many_fetches_only_what_it_has_not_loaded(monkeypatch, joblib_cache):
+    joblib_cache.save_many("s1", _artifacts())
+    requested = []
+    load_many = joblib_cache.load_many
+    monkeypatch.setattr(joblib_cache, "load_many", lambda id, datatypes: requested.append(list(datatypes)) or load_many(id, datatypes))
+    cache = MemoizedSessionCache(joblib_cache)
+
+    shap, = cache.load_many("s1", ["shap"]).values()
+    loaded = cache.load_many("s1", ["shap", "features"])
+
+    assert loaded["shap"] is shap
+    assert requested == [["shap"], ["features"]]
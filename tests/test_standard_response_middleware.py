@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middlewares.standard_response_middleware import CustomResponseMiddleware
+from app.utils.response_envelope import envelope_response
+
+PATHS = ["/json", "/missing", "/empty", "/chunks", "/events", "/route"]
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CustomResponseMiddleware, included_paths=PATHS)
+
+    @app.get("/json")
+    def plain_json():
+        return JSONResponse({"answer": [1, 2, 3]})
+
+    @app.get("/missing")
+    def missing():
+        raise HTTPException(status_code=404, detail="not found")
+
+    @app.get("/empty")
+    def empty():
+        return Response(status_code=200, media_type="application/json")
+
+    @app.get("/chunks")
+    def chunks():
+        return StreamingResponse(iter([b'{"rows": [', b"1, 2", b"]}"]), media_type="application/json")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["event: delta\ndata: {}\n\n"] * 3), media_type="text/event-stream")
+
+    @app.get("/route")
+    def route():
+        return envelope_response({"answer": 42})
+
+    @app.get("/excluded")
+    def excluded():
+        return JSONResponse({"answer": 1})
+
+    return app
+
+
+def test_wraps_json_with_matching_content_length():
+    client = TestClient(_app())
+
+    response = client.get("/json")
+    assert response.json() == {"status_code": 200, "code": "SUCCESS", "message": "Request processed successfully.",
+                               "data": {"answer": [1, 2, 3]}}
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    missing = client.get("/missing")
+    assert missing.status_code == 404
+    assert missing.json()["code"] == "WARNING"
+    assert missing.json()["data"]["detail"] == "not found"
+
+    assert client.get("/empty").json()["data"] is None
+    assert client.get("/excluded").json() == {"answer": 1}
+    assert client.get("/events").text == "event: delta\ndata: {}\n\n" * 3
+
+
+def test_route_level_envelope_matches_middleware():
+    client = TestClient(_app())
+
+    assert client.get("/route").json() == {"status_code": 200, "code": "SUCCESS",
+                                           "message": "Request processed successfully.", "data": {"answer": 42}}
+    assert "x-response-envelope" not in client.get("/route").headers
+
+
+def test_streamed_json_is_wrapped_chunk_by_chunk():
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": "/chunks", "raw_path": b"/chunks", "root_path": "", "query_string": b"", "headers": [],
+             "client": ("127.0.0.1", 1), "server": ("test", 80)}
+    asyncio.run(_app()(scope, receive, send))
+
+    bodies = [m["body"] for m in sent if m["type"] == "http.response.body" and m["body"]]
+    assert bodies[0].endswith(b'"data":{"rows": [')
+    assert bodies[1:] == [b"1, 2", b"]}", b"}"]
+    assert json.loads(b"".join(bodies))["data"] == {"rows": [1, 2]}
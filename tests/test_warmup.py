@@ -0,0 +1,53 @@
+import pytest
+
+from app.core.warmup import StartupWarmup
+
+
+def _warmup() -> StartupWarmup:
+    warmup = StartupWarmup.__new__(StartupWarmup)
+    warmup._initialize()
+    warmup._steps.clear()
+    return warmup
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_steps_ran():
+    warmup = _warmup()
+    calls = []
+
+    def blocking_step(config):
+        calls.append(("blocking", config["llms"]))
+
+    async def async_step(config):
+        calls.append(("async", warmup.ready))
+
+    warmup.register("blocking", blocking_step)
+    warmup.register("async", async_step)
+
+    assert warmup.status == "pending" and not warmup.ready
+    assert await warmup.run({"llms": ["mock"]})
+    assert calls == [("blocking", ["mock"]), ("async", False)]
+    assert warmup.snapshot()["steps"]["blocking"]["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_failed_steps_only_block_readiness_when_strict():
+    def broken(config):
+        raise RuntimeError("no credentials")
+
+    lenient = _warmup()
+    lenient.register("broken", broken)
+    assert await lenient.run({})
+    assert lenient.results["broken"] == {"status": "failed", "seconds": lenient.results["broken"]["seconds"],
+                                         "error": "no credentials"}
+
+    strict = _warmup()
+    strict.register("broken", broken)
+    assert not await strict.run({"strict": True, "steps": ["broken", "missing"]})
+    assert strict.status == "failed"
+    assert strict.results["missing"]["error"] == "Unknown warm-up step 'missing'"
+
+    disabled = _warmup()
+    disabled.register("broken", broken)
+    assert await disabled.run({"enabled": False})
+    assert disabled.results == {}
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from agent_apps.model_analyzer.session.model_analyzer_session import ModelAnalyzerSession
+from app.cache.joblib_session_cache import JoblibSessionCache
+from app.core.worker_pool import WorkerPool, WorkerPoolFullError
+from app.storage.file_object_reader import FileObjectReader
+
+SESSION_DATATYPES = ["model", "features", "X_test", "y_test", "X_test_transformed", "shap"]
+
+
+def _new_pool(monkeypatch, **env) -> WorkerPool:
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    pool = WorkerPool.__new__(WorkerPool)
+    pool._initialize()
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_rejects_work_beyond_max_pending(monkeypatch):
+    pool = _new_pool(monkeypatch, WORKER_POOL_IO_WORKERS=1, WORKER_POOL_MAX_PENDING=2)
+    try:
+        running = [asyncio.create_task(pool.run_io(time.sleep, 0.2)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        assert pool.stats()["io"]["pending"] == 2
+        assert pool.stats()["io"]["queued"] == 1
+        with pytest.raises(WorkerPoolFullError):
+            await pool.run_io(time.sleep, 0)
+
+        await asyncio.gather(*running)
+        assert pool.stats()["io"] == {"workers": 1, "pending": 0, "queued": 0, "completed": 2,
+                                      "rejected": 1, "max_pending": 2}
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_acreate_session_builds_in_worker_process(monkeypatch):
+    pool = _new_pool(monkeypatch, WORKER_POOL_CPU_WORKERS=1)
+    monkeypatch.setattr(WorkerPool, "_instance", pool)
+    cache = JoblibSessionCache.get_instance()
+    session = ModelAnalyzerSession(cache)
+    try:
+        session_id = await session.acreate_session(
+            FileObjectReader("tests/test_data/pateint_fullfillment_model.pkl"), "worker-pool-test")
+
+        assert session_id == "worker-pool-test"
+        assert session.has_session(session_id)
+        assert session.get_features(session_id) == session.get_X_test_transformed(session_id).columns.tolist()
+        assert pool.stats()["cpu"]["completed"] == 1
+    finally:
+        pool.shutdown()
+        for datatype in SESSION_DATATYPES:
+            cache.delete("worker-pool-test", datatype)